@@ -0,0 +1,69 @@
+"""
+Event loop lag while LiteClient parses large BoCs.
+
+Real blocks can't be fetched offline, so a synthetic BoC of similar size (a wide tree of full cells) is parsed
+through `LiteClient.run_cpu` without an executor, with a thread pool and with a process pool.
+A ticker task measures how late the loop wakes it up meanwhile.
+Run: python examples/benchmarks/cpu_offload.py
+"""
+import asyncio
+import concurrent.futures
+import os
+import time
+
+from pytoniq_core.boc import Cell, begin_cell
+
+from fake_liteserver import FakeLiteServer
+
+
+def make_cell(refs: list) -> Cell:
+    builder = begin_cell().store_bytes(os.urandom(127))
+    for ref in refs:
+        builder.store_ref(ref)
+    return builder.end_cell()
+
+
+def make_boc(cells: int) -> bytes:
+    layer = [make_cell([]) for _ in range(cells // 2)]
+    while len(layer) > 1:
+        layer = [make_cell(layer[i:i + 4]) for i in range(0, len(layer), 4)]
+    return layer[0].to_boc()
+
+
+def parse(boc: bytes) -> bytes:
+    return Cell.one_from_boc(boc).hash
+
+
+async def ticker(lags: list, interval: float = 0.005):
+    loop = asyncio.get_running_loop()
+    while True:
+        s = loop.time()
+        await asyncio.sleep(interval)
+        lags.append((loop.time() - s - interval) * 1000)
+
+
+async def measure(executor, boc: bytes, jobs: int) -> tuple:
+    client = FakeLiteServer(block_size=0).client(executor=executor)  # not connected, only run_cpu is used
+    lags = []
+    tick = asyncio.create_task(ticker(lags))
+    await asyncio.sleep(0.05)
+    s = time.perf_counter()
+    await asyncio.gather(*[client.run_cpu(parse, boc) for _ in range(jobs)])
+    total = time.perf_counter() - s
+    await asyncio.sleep(0.05)  # let the ticker record the last lag
+    tick.cancel()
+    return total, max(lags)
+
+
+async def main(cells: int = 10000, jobs: int = 8):
+    boc = make_boc(cells)
+    print(f'BoC size {len(boc) / 2**20:.1f} MiB, {jobs} parses')
+    with concurrent.futures.ThreadPoolExecutor() as threads, concurrent.futures.ProcessPoolExecutor() as processes:
+        await asyncio.get_running_loop().run_in_executor(processes, parse, boc)  # warm up workers
+        for name, executor in (('inline', None), ('thread pool', threads), ('process pool', processes)):
+            total, lag = await measure(executor, boc, jobs)
+            print(f'{name:>12}: total {total * 1000:7.1f} ms, max loop lag {lag:7.1f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,216 @@
+import asyncio
+import base64
+import hashlib
+import multiprocessing
+import typing
+
+from pytoniq_core.crypto.ciphers import Client, get_random, create_aes_ctr_cipher, aes_ctr_encrypt, aes_ctr_decrypt, get_shared_key
+from pytoniq_core.tl.generator import TlGenerator
+from nacl.signing import VerifyKey
+
+from pytoniq import LiteClient
+
+
+ZERO_HASH = '00' * 32
+
+LAST_BLOCK = {'workchain': -1, 'shard': -9223372036854775808, 'seqno': 1, 'root_hash': ZERO_HASH, 'file_hash': ZERO_HASH}
+
+
+class FakeLiteServer:
+    """
+    Minimal in-process liteserver speaking ADNL over TCP.
+    It answers `tcp.ping`, `getMasterchainInfo`, `getTime` and `getBlock` (random bytes of `block_size`),
+    other methods can be added via `handlers`. `waitMasterchainSeqno` waits until `produce_block()` is called.
+    Used by the benchmarks in this folder only, it does not prove anything it returns.
+    """
+
+    def __init__(self, handlers: typing.Optional[typing.Dict[str, typing.Callable]] = None,
+                 latency: float = 0.0, block_size: int = 2**20, host: str = '127.0.0.1'):
+        self.host = host
+        self.port: int = None
+        self.latency = latency
+        self.key = Client(Client.generate_ed25519_private_key())
+        self.schemas = TlGenerator.with_default_schemas().generate()
+        # serialized once, so the server itself doesn't become the bottleneck
+        block = self.schemas.serialize('liteServer.blockData', {'id': LAST_BLOCK, 'data': get_random(block_size)})
+        self.last_block = dict(LAST_BLOCK)
+        self.handlers = {
+            'liteServer.getMasterchainInfo': lambda _: ('liteServer.masterchainInfo', {
+                'last': self.last_block, 'state_root_hash': ZERO_HASH,
+                'init': {'workchain': -1, 'root_hash': ZERO_HASH, 'file_hash': ZERO_HASH}
+            }),
+            'liteServer.getTime': lambda _: ('liteServer.currentTime', {'now': 1700000000}),
+            'liteServer.getBlock': lambda _: block,
+        }
+        if handlers:
+            self.handlers |= handlers
+        self.server: asyncio.AbstractServer = None
+        self.frames_received = 0
+        self._writers: typing.Set[asyncio.StreamWriter] = set()
+        self._waiting = []  # (seqno, query, writer, enc) of queries with waitMasterchainSeqno prefix
+
+    @property
+    def pub_key(self) -> str:
+        return base64.b64encode(self.key.ed25519_public.encode()).decode()
+
+    def client(self, cls: typing.Type[LiteClient] = LiteClient, **kwargs) -> LiteClient:
+        return cls(host=self.host, port=self.port, server_pub_key=self.pub_key, trust_level=2, **kwargs)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port or 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def produce_block(self):
+        """
+        Moves masterchain one block forward and answers queries waiting for it
+        """
+        self.last_block = dict(self.last_block, seqno=self.last_block['seqno'] + 1)
+        waiting, self._waiting = self._waiting, []
+        for seqno, query, writer, enc in waiting:
+            if seqno <= self.last_block['seqno']:
+                self._write(writer, enc, self._answer(query, writer, enc))
+            else:
+                self._waiting.append((seqno, query, writer, enc))
+
+    async def blip(self, duration: float):
+        """
+        Drops all connections and refuses new ones for `duration` seconds, as a restarting liteserver does
+        """
+        await self.close()
+        for writer in list(self._writers):
+            writer.close()
+        await asyncio.sleep(duration)
+        await self.start()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @classmethod
+    def spawn(cls, **kwargs) -> "RemoteLiteServer":
+        """
+        Runs the server in a separate process, so its CPU time doesn't mix with the client's one
+        """
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve, args=(child, kwargs), daemon=True)
+        process.start()
+        host, port, pub_key = parent.recv()
+        return RemoteLiteServer(host, port, pub_key, process)
+
+    def _handshake(self, data: bytes):
+        client_pub = VerifyKey(data[32:64]).to_curve25519_public_key()
+        checksum = data[64:96]
+        shared_key = get_shared_key(self.key.x25519_private.encode(), client_pub.encode())
+        init_cipher = create_aes_ctr_cipher(shared_key[0:16] + checksum[16:32], checksum[0:4] + shared_key[20:32])
+        rand = aes_ctr_decrypt(init_cipher, data[96:256])
+        assert hashlib.sha256(rand).digest() == checksum, 'bad handshake'
+        enc = create_aes_ctr_cipher(rand[0:32], rand[64:80])
+        dec = create_aes_ctr_cipher(rand[32:64], rand[80:96])
+        return enc, dec
+
+    @staticmethod
+    def _packet(data: bytes) -> bytes:
+        result = (len(data) + 64).to_bytes(4, 'little') + get_random(32) + data
+        return result + hashlib.sha256(result[4:]).digest()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            enc, dec = self._handshake(await reader.readexactly(256))
+            writer.write(aes_ctr_encrypt(enc, self._packet(b'')))
+            while True:
+                data_len = int.from_bytes(aes_ctr_decrypt(dec, await reader.readexactly(4)), 'little')
+                data = aes_ctr_decrypt(dec, await reader.readexactly(data_len))
+                self.frames_received += 1
+                answer = self._answer(self.schemas.deserialize(data[32:-32])[0], writer, enc)
+                if answer is None:
+                    continue
+                if self.latency:
+                    asyncio.get_running_loop().call_later(self.latency, self._write, writer, enc, answer)
+                else:
+                    self._write(writer, enc, answer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _write(self, writer: asyncio.StreamWriter, enc, answer: bytes):
+        if not writer.is_closing():
+            writer.write(aes_ctr_encrypt(enc, self._packet(answer)))
+
+    def _answer(self, query: dict, writer: asyncio.StreamWriter, enc) -> typing.Optional[bytes]:
+        if query['@type'] == 'tcp.ping':
+            return self.schemas.serialize('tcp.pong', {'random_id': query['random_id']})
+        request = query['query']['data']
+        if isinstance(request, list):  # waitMasterchainSeqno prefix
+            wait, request = request
+            if wait['seqno'] > self.last_block['seqno']:
+                self._waiting.append((wait['seqno'], dict(query, query={'data': request}), writer, enc))
+                return None
+        handler = self.handlers.get(request['@type'])
+        if handler is None:
+            answer = self.schemas.serialize('liteServer.error', {'code': -400, 'message': 'unsupported query'})
+        else:
+            answer = handler(request)  # already serialized answer or (schema name, data)
+            if isinstance(answer, tuple):
+                answer = self.schemas.serialize(*answer)
+        return self.schemas.serialize('adnl.message.answer', {'query_id': query['query_id'], 'answer': answer})
+
+
+def _serve(conn, kwargs: dict):
+    async def main():
+        server = FakeLiteServer(**kwargs)
+        await server.start()
+        conn.send((server.host, server.port, server.pub_key))
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+
+class RemoteLiteServer:
+
+    def __init__(self, host: str, port: int, pub_key: str, process: multiprocessing.Process):
+        self.host = host
+        self.port = port
+        self.pub_key = pub_key
+        self.process = process
+
+    client = FakeLiteServer.client
+
+    async def close(self):
+        self.process.terminate()
+
+
+class BenchLiteClient(LiteClient):
+    """
+    LiteClient which doesn't load shards on connect: fake liteserver can't produce shard proofs
+    """
+
+    async def update_last_blocks(self, masterchain_info: typing.Optional[dict] = None):
+        self.last_mc_block = await self.get_trusted_last_mc_block(masterchain_info)
+        self.last_shard_blocks = {}
+
+
+class StreamLiteClient(BenchLiteClient):
+    """
+    LiteClient receiving frames as it did before LiteServerProtocol:
+    StreamReader with two `readexactly` and two decrypt calls per frame, handled in the listener task
+    """
+
+    async def _open_connection(self):
+        self.reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        self.transport, self.protocol = writer.transport, writer  # only write() and drain() are used
+
+    async def receive(self, data_len: int) -> bytes:
+        return await self.reader.readexactly(data_len)
+
+    async def listen(self) -> None:
+        try:
+            while True:
+                data_len = int.from_bytes(self.decrypt(await self.receive(4)), 'little')
+                self._last_received = self.loop.time()
+                self.frame_received(memoryview(self.decrypt(await self.receive(data_len))))
+        except (asyncio.CancelledError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._cancel_all_tasks()
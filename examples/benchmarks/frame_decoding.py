@@ -0,0 +1,85 @@
+"""
+CPU time and peak memory of decoding one inbound liteserver frame (e.g. `getBlock` answer).
+
+Compares LiteServerProtocol, which decrypts socket chunks in place and decodes frames from its buffer,
+with the old decrypt -> slice -> hash -> slice pipeline.
+Run: python examples/benchmarks/frame_decoding.py
+"""
+import asyncio
+import hashlib
+import time
+import tracemalloc
+
+from pytoniq_core.crypto.ciphers import get_random, create_aes_ctr_cipher, aes_ctr_encrypt
+
+from pytoniq import LiteClient
+from pytoniq.liteclient.client import LiteServerProtocol
+from pytoniq.schemas import get_schemas
+
+from fake_liteserver import FakeLiteServer, LAST_BLOCK
+
+
+def build_frames(size: int, n: int, key: bytes, iv: bytes) -> list:
+    schemas = get_schemas()
+    answer = schemas.serialize('adnl.message.answer', {
+        'query_id': get_random(32).hex(),
+        'answer': schemas.serialize('liteServer.blockData', {'id': LAST_BLOCK, 'data': get_random(size)})
+    })
+    cipher = create_aes_ctr_cipher(key, iv)
+    frames = []
+    for _ in range(n):
+        data = get_random(32) + answer
+        data += hashlib.sha256(data).digest()
+        frames.append(aes_ctr_encrypt(cipher, len(data).to_bytes(4, 'little') + data))
+    return frames
+
+
+def old_decode(client: LiteClient, frame: bytes, chunk: int = 2**16):
+    # StreamReader gets socket chunks, then listener reads length prefix and frame with separate decrypt calls
+    reader = asyncio.StreamReader(loop=client.loop)
+    for i in range(0, len(frame), chunk):
+        reader.feed_data(frame[i:i + chunk])
+
+    async def listen():
+        data_len = int.from_bytes(client.decrypt(await reader.readexactly(4)), 'little')
+        data_decrypted = client.decrypt(await reader.readexactly(data_len))
+        assert hashlib.sha256(data_decrypted[:-32]).digest() == data_decrypted[-32:], 'incorrect checksum'
+        client.schemas.deserialize(data_decrypted[:-32][32:], boxed=True)
+
+    client.loop.run_until_complete(listen())
+
+
+def protocol_decode(client: LiteClient, frame: bytes, chunk: int = 2**16):
+    # socket chunks are delivered the way the event loop does: recv_into() the buffer, then buffer_updated()
+    for i in range(0, len(frame), chunk):
+        part = frame[i:i + chunk]
+        client.protocol.get_buffer(-1)[:len(part)] = part
+        client.protocol.buffer_updated(len(part))
+
+
+def run(name: str, decode, client: LiteClient, frames: list, key: bytes, iv: bytes):
+    client.dec_sipher = create_aes_ctr_cipher(key, iv)
+    decode(client, frames[0])  # warm up buffers
+    tracemalloc.start()
+    s = time.perf_counter()
+    for frame in frames[1:]:
+        decode(client, frame)
+    t = time.perf_counter() - s
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:>8}: {t / (len(frames) - 1) * 1000:7.2f} ms/frame, peak {peak / 2**20:6.1f} MiB')
+
+
+def main(size: int = 4 * 2**20, n: int = 11):
+    client = FakeLiteServer().client()
+    client.loop = asyncio.new_event_loop()
+    client.protocol = LiteServerProtocol(client)
+    key, iv = get_random(32), get_random(16)
+    frames = build_frames(size, n, key, iv)
+    print(f'frame size {len(frames[0]) / 2**20:.1f} MiB')
+    run('old', old_decode, client, frames, key, iv)
+    run('protocol', protocol_decode, client, frames, key, iv)
+
+
+if __name__ == '__main__':
+    main()
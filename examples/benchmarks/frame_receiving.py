@@ -0,0 +1,91 @@
+"""
+Pipelined workload of many small responses.
+
+Compares LiteServerProtocol, which decrypts every socket chunk at once and resolves futures right from
+`buffer_updated`, with the old StreamReader listener doing two `readexactly` and two decrypts per frame.
+First part feeds the same socket chunks of small answers to both receivers in-process, second one runs
+concurrent queries against the fake liteserver (noisy if it shares the CPU with the client).
+Run: python examples/benchmarks/frame_receiving.py
+"""
+import asyncio
+import hashlib
+import time
+
+from pytoniq_core.crypto.ciphers import get_random, create_aes_ctr_cipher, aes_ctr_encrypt
+
+from pytoniq.liteclient.client import LiteServerProtocol
+
+from fake_liteserver import FakeLiteServer, BenchLiteClient, StreamLiteClient
+
+
+def build_stream(client, n: int, key: bytes, iv: bytes) -> tuple:
+    cipher = create_aes_ctr_cipher(key, iv)
+    qids, stream = [], b''
+    for _ in range(n):
+        qid = get_random(32).hex()
+        answer = client.schemas.serialize('liteServer.currentTime', {'now': 1700000000})
+        data = get_random(32) + client.schemas.serialize('adnl.message.answer', {'query_id': qid, 'answer': answer})
+        data += hashlib.sha256(data).digest()
+        stream += len(data).to_bytes(4, 'little') + data
+        qids.append(qid)
+    return qids, aes_ctr_encrypt(cipher, stream)
+
+
+async def receive_stream(client, cls, qids: list, stream: bytes, chunk: int) -> float:
+    loop = asyncio.get_running_loop()
+    client.loop = loop
+    futures = [loop.create_future() for _ in qids]
+    client.tasks = dict(zip(qids, futures))
+    s = time.process_time()
+    if cls is StreamLiteClient:
+        client.reader = asyncio.StreamReader()
+        listener = asyncio.create_task(client.listen())
+        for i in range(0, len(stream), chunk):
+            client.reader.feed_data(stream[i:i + chunk])
+            await asyncio.sleep(0)  # socket readiness callback, listener runs after it
+        await asyncio.gather(*futures)
+        listener.cancel()
+    else:
+        protocol = LiteServerProtocol(client)
+        for i in range(0, len(stream), chunk):
+            part = stream[i:i + chunk]
+            protocol.get_buffer(-1)[:len(part)] = part
+            protocol.buffer_updated(len(part))
+            await asyncio.sleep(0)
+        await asyncio.gather(*futures)
+    return time.process_time() - s
+
+
+async def in_process(n: int = 20000, chunk: int = 2**16):
+    key, iv = get_random(32), get_random(16)
+    for name, cls in (('stream listener', StreamLiteClient), ('buffered protocol', BenchLiteClient)):
+        client = FakeLiteServer(block_size=0).client(cls)
+        qids, stream = build_stream(client, n, key, iv)
+        client.dec_sipher = create_aes_ctr_cipher(key, iv)
+        cpu = await receive_stream(client, cls, qids, stream, chunk)
+        print(f'{name:>18}: {cpu / n * 10**6:6.2f} us/frame to receive, decrypt, decode and resolve')
+
+
+async def measure(server, name: str, cls, concurrency: int, rounds: int):
+    client = server.client(cls)
+    await client.connect()
+    client.updater.cancel()
+    s, cpu = time.perf_counter(), time.process_time()
+    for _ in range(rounds):
+        await asyncio.gather(*[client.get_time() for _ in range(concurrency)])
+    t, cpu = time.perf_counter() - s, time.process_time() - cpu
+    n = concurrency * rounds
+    print(f'{name:>18}: {n / t:8.0f} queries/s, client cpu {cpu / n * 10**6:6.1f} us/query')
+    await client.close()
+
+
+async def main(concurrency: int = 1000, rounds: int = 20):
+    await in_process()
+    server = FakeLiteServer.spawn()
+    for name, cls in (('stream listener', StreamLiteClient), ('buffered protocol', BenchLiteClient)):
+        await measure(server, name, cls, concurrency, rounds)
+    await server.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Get-method calls per second on one account with a new TVM emulator per call (as `run_get_method_local` did)
+and with an emulator reused from `EmulatorCache`, where only gas limit, c7 and the stack are set per call.
+
+Account state and config can't be fetched offline, so the account is a tiny contract returning a constant
+and the config is a synthetic dictionary of a real config size. Network time of the account state request
+is not included, only the local part of the call.
+Requires pytvm: pip install "pytoniq[tvm]"
+Run: python examples/benchmarks/get_method_emulator.py
+"""
+import os
+import time
+
+from pytoniq_core import begin_cell, HashMap, Builder
+from pytoniq_core.crypto.ciphers import get_random
+from pytvm.tvm_emulator import TvmEmulator
+
+from pytoniq import BlockchainConfig, EmulatorCache
+
+
+ADDRESS = 'EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG'
+
+
+def make_config(params: int = 80) -> BlockchainConfig:
+    raw = {}
+    for i in range(100, 100 + params):  # numbers the emulator doesn't parse, so random contents are fine
+        cell = begin_cell().store_bytes(os.urandom(100)).store_ref(begin_cell().store_bytes(os.urandom(100)).end_cell())
+        raw[i] = cell.end_cell().begin_parse()
+    return BlockchainConfig(raw)
+
+
+def make_libraries(n: int = 2):
+    def value_serializer(src, dest: Builder):
+        dest.store_uint(0, 2).store_ref(src).store_maybe_ref(None)
+
+    libs = {i: begin_cell().store_uint(i, 256).end_cell() for i in range(n)}
+    hm = HashMap(256, value_serializer=value_serializer)
+    hm.map = libs
+    return hm
+
+
+def call_new(code, data, config: BlockchainConfig, libraries: HashMap):
+    emulator = TvmEmulator(code=code, data=data)
+    emulator.set_gas_limit(300000)
+    emulator.set_c7(address=ADDRESS, unixtime=1700000000, balance=10**9, rand_seed_hex=get_random(32).hex(),
+                    config=config.cell)
+    emulator.set_libraries(libraries.serialize())
+    return emulator.run_get_method('seqno', [])
+
+
+def call_cached(cache: EmulatorCache, code, data, config: BlockchainConfig, libraries: HashMap):
+    key = (code.hash, data.hash, config.cell.hash)
+    emulator = cache.get(key)
+    if emulator is None:
+        emulator = TvmEmulator(code=code, data=data)
+        emulator.set_libraries(libraries.serialize())
+        cache.put(key, emulator)
+    emulator.set_gas_limit(300000)
+    emulator.engine.tvm_emulator_set_c7(emulator.emulator, ADDRESS.encode(), 1700000000, 10**9,
+                                        get_random(32).hex().encode(), config.cell_b64)
+    return emulator.run_get_method('seqno', [])
+
+
+def measure(name: str, call, calls: int):
+    s = time.perf_counter()
+    for _ in range(calls):
+        assert call()['stack'] == [2]
+    t = time.perf_counter() - s
+    print(f'{name:>16}: {calls / t:8.0f} calls/s, {t / calls * 10**6:7.1f} us/call')
+
+
+def main(calls: int = 2000):
+    code = begin_cell().store_uint(0x30, 8).store_uint(0x72, 8).end_cell()  # DROP, PUSHINT 2
+    data = begin_cell().store_bytes(os.urandom(64)).end_cell()
+    config = make_config()
+    libraries = make_libraries()
+    print(f'config BoC {len(config.cell.to_boc())} bytes')
+    measure('new emulator', lambda: call_new(code, data, config, libraries), calls)
+    cache = EmulatorCache()
+    measure('cached emulator', lambda: call_cached(cache, code, data, config, libraries), calls)
+    print(cache.to_dict())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Event loop lag and throughput of heavy local get methods run in the event loop
+and in thread and process pools, as `LiteClient(get_method_executor=...)` runs them.
+
+The account is a contract looping 2^18 times in its get method (about 0.1 s of TVM time),
+the config is synthetic. A ticker task measures how late the loop wakes it up meanwhile.
+Requires pytvm: pip install "pytoniq[tvm]"
+Run: python examples/benchmarks/get_method_executor.py
+"""
+import asyncio
+import concurrent.futures
+import os
+import time
+
+from pytoniq_core import begin_cell
+from pytoniq_core.crypto.ciphers import get_random
+from pytoniq_core.tlb.vm_stack import VmStack
+
+from pytoniq.liteclient.emulation import run_get_method_boc
+
+from get_method_emulator import make_config, ADDRESS
+
+# DROP, PUSHPOW2 17, PUSHCONT {}, REPEAT, PUSHINT 2
+CODE = begin_cell().store_uint(0x30, 8).store_uint(0x8310, 16).store_uint(0x90, 8).store_uint(0xE4, 8) \
+    .store_uint(0x72, 8).end_cell()
+DATA = begin_cell().end_cell()
+
+
+async def ticker(lags: list, interval: float = 0.005):
+    loop = asyncio.get_running_loop()
+    while True:
+        s = loop.time()
+        await asyncio.sleep(interval)
+        lags.append((loop.time() - s - interval) * 1000)
+
+
+async def measure(executor, config, calls: int) -> tuple:
+    key = (CODE.hash, DATA.hash, config.cell.hash, b'')
+    args = (key, CODE.to_boc(), DATA.to_boc(), None, ADDRESS, 1700000000, 10**9, config.cell_b64, 'seqno',
+            VmStack.serialize([]).to_boc(), 10**8)
+
+    async def call():
+        if executor is None:
+            return run_get_method_boc(*args, get_random(32))
+        return await asyncio.get_running_loop().run_in_executor(executor, run_get_method_boc, *args, get_random(32))
+
+    lags = []
+    tick = asyncio.create_task(ticker(lags))
+    await asyncio.sleep(0.05)
+    s = time.perf_counter()
+    results = await asyncio.gather(*[call() for _ in range(calls)])
+    total = time.perf_counter() - s
+    await asyncio.sleep(0.05)  # let the ticker record the last lag
+    tick.cancel()
+    assert all(r['vm_exit_code'] == 0 for r in results)
+    return total, max(lags)
+
+
+async def main(calls: int = 16):
+    config = make_config()
+    workers = os.cpu_count()
+    print(f'{calls} get methods, {workers} workers')
+    with concurrent.futures.ThreadPoolExecutor(workers) as threads, \
+            concurrent.futures.ProcessPoolExecutor(workers) as processes:
+        for name, executor in (('inline', None), ('thread pool', threads), ('process pool', processes)):
+            await measure(executor, config, workers)  # warm up workers and their emulators
+            total, lag = await measure(executor, config, calls)
+            print(f'{name:>12}: {calls / total:6.1f} calls/s, max loop lag {lag:7.1f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
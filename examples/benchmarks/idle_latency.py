@@ -0,0 +1,71 @@
+"""
+Latency of the first request after an idle period.
+
+Compares current event-driven listener with the old one that polled `self.tasks` every 20 ms while idle.
+Run: python examples/benchmarks/idle_latency.py
+"""
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+
+from fake_liteserver import FakeLiteServer, BenchLiteClient, StreamLiteClient
+
+
+class PollingLiteClient(StreamLiteClient):
+    """
+    Listener as it was before: sleeps 20 ms in a loop while there are no pending requests
+    """
+    delta = 0.02
+
+    async def listen(self) -> None:
+        try:
+            while True:
+                while not self.tasks:
+                    await asyncio.sleep(self.delta)
+                data_len = int(self.decrypt(await self.receive(4))[::-1].hex(), 16)
+                data_decrypted = self.decrypt(await self.receive(data_len))
+                assert hashlib.sha256(data_decrypted[:-32]).digest() == data_decrypted[-32:], 'incorrect checksum'
+                result = self.deserialize_adnl_query(data_decrypted[:-32]) or {}
+                qid = result.get('query_id', result.get('random_id'))
+                request = self.tasks.pop(qid, None)
+                if request is not None and not request.done():
+                    request.set_result(result.get('answer', {}))
+        except (asyncio.CancelledError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._cancel_all_tasks()
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def measure(server: FakeLiteServer, cls, samples: int) -> list:
+    client = server.client(cls)
+    await client.connect()
+    client.updater.cancel()  # its long poll keeps a request pending, so the old listener would never go idle
+    result = []
+    for _ in range(samples):
+        await asyncio.sleep(random.uniform(0.05, 0.15))  # idle gap
+        s = time.perf_counter()
+        await client.get_time()
+        result.append((time.perf_counter() - s) * 1000)
+    await client.close()
+    return result
+
+
+async def main(samples: int = 100):
+    server = FakeLiteServer()
+    await server.start()
+    for name, cls in (('polling listener', PollingLiteClient), ('event-driven listener', BenchLiteClient)):
+        lat = await measure(server, cls, samples)
+        print(f'{name:>22}: p50 {percentile(lat, 0.5):6.2f} ms, p99 {percentile(lat, 0.99):6.2f} ms, '
+              f'mean {statistics.mean(lat):6.2f} ms')
+    await server.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Latency of new masterchain block notifications.
+
+Compares the old way, consumers polling `client.last_mc_block` every 100 ms while the block updater asks
+getMasterchainInfo once more after each long-poll answer, with `subscribe_masterchain()` consumers
+woken right by the long-poll answer.
+Run: python examples/benchmarks/mc_subscription.py
+"""
+import asyncio
+import statistics
+
+from fake_liteserver import FakeLiteServer, BenchLiteClient
+
+
+class OldUpdaterLiteClient(BenchLiteClient):
+
+    async def block_updater(self):
+        while True:
+            try:
+                await self.wait_masterchain_seqno(self.last_mc_block.seqno + 1, timeout_ms=10000, schema_name='getMasterchainInfo', data={})
+            except asyncio.TimeoutError:
+                continue
+            await self.update_last_blocks()
+
+
+async def polling_consumer(client, produced: dict, latencies: list, blocks: int):
+    loop = asyncio.get_running_loop()
+    seqno = client.last_mc_block.seqno
+    while len(latencies) < blocks:
+        while client.last_mc_block.seqno <= seqno:
+            await asyncio.sleep(0.1)
+        seqno = client.last_mc_block.seqno
+        latencies.append(loop.time() - produced[seqno])
+
+
+async def subscribed_consumer(client, produced: dict, latencies: list, blocks: int):
+    loop = asyncio.get_running_loop()
+    first = True
+    async for mc_block, _ in client.subscribe_masterchain():
+        if first:  # current block
+            first = False
+            continue
+        latencies.append(loop.time() - produced[mc_block.seqno])
+        if len(latencies) == blocks:
+            return
+
+
+async def main(blocks: int = 20, consumers: int = 10, interval: float = 0.25):
+    server = FakeLiteServer(latency=0.01)
+    await server.start()
+    loop = asyncio.get_running_loop()
+    for name, cls, consumer in (('polling', OldUpdaterLiteClient, polling_consumer),
+                                ('subscribe_masterchain', BenchLiteClient, subscribed_consumer)):
+        client = server.client(cls)
+        await client.connect()
+        produced, results = {}, [[] for _ in range(consumers)]
+        tasks = [asyncio.create_task(consumer(client, produced, r, blocks)) for r in results]
+        await asyncio.sleep(interval)
+        for _ in range(blocks):
+            server.produce_block()
+            produced[server.last_block['seqno']] = loop.time()
+            await asyncio.sleep(interval)
+        await asyncio.gather(*tasks)
+        latencies = [x * 1000 for r in results for x in r]
+        print(f'{name:>22}: mean {statistics.mean(latencies):6.1f} ms, max {max(latencies):6.1f} ms '
+              f'({consumers} consumers, {blocks} blocks)')
+        await client.close()
+    await server.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
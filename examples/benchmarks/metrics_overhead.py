@@ -0,0 +1,41 @@
+"""
+Cost of the per-method metrics hook.
+
+Compares client CPU per query without a hook and with `LiteClientMetrics` attached,
+and prints what the hook collected.
+Run: python examples/benchmarks/metrics_overhead.py
+"""
+import asyncio
+import time
+
+from fake_liteserver import FakeLiteServer, BenchLiteClient
+
+from pytoniq import LiteClientMetrics
+
+
+async def measure(server, name: str, metrics, concurrency: int, rounds: int):
+    client = server.client(BenchLiteClient, metrics=metrics)
+    await client.connect()
+    s, cpu = time.perf_counter(), time.process_time()
+    for _ in range(rounds):
+        await asyncio.gather(*[client.get_time() for _ in range(concurrency)])
+    t, cpu = time.perf_counter() - s, time.process_time() - cpu
+    n = concurrency * rounds
+    print(f'{name:>12}: {n / t:8.0f} queries/s, client cpu {cpu / n * 10**6:6.1f} us/query')
+    await client.close()
+
+
+async def main(concurrency: int = 200, rounds: int = 50):
+    server = FakeLiteServer.spawn()
+    metrics = LiteClientMetrics()
+    for name, hook in (('no hook', None), ('metrics', metrics), ('no hook', None), ('metrics', metrics)):
+        await measure(server, name, hook, concurrency, rounds)
+    get_time = metrics.methods['getTime']
+    print(f'getTime: {get_time.requests} requests, p50 <= {get_time.percentile(0.5) * 1000:.1f} ms, '
+          f'p99 <= {get_time.percentile(0.99) * 1000:.1f} ms, network wait {get_time.network_wait:.2f} s, '
+          f'decrypt {get_time.decrypt:.3f} s, decode {get_time.decode:.3f} s')
+    await server.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+Queries during a short liteserver outage.
+
+Several workers query the fake liteserver while it drops all connections and refuses new ones for half a second.
+Compares the default client, which closes on connection loss, with `auto_reconnect=True`,
+which parks queries until the session is back in background.
+Run: python examples/benchmarks/reconnect_blip.py
+"""
+import asyncio
+import time
+
+from fake_liteserver import FakeLiteServer, BenchLiteClient
+
+
+async def measure(name: str, auto_reconnect: bool, workers: int = 5, queries: int = 50, outage: float = 0.5):
+    server = FakeLiteServer(latency=0.01)
+    await server.start()
+    client = server.client(BenchLiteClient, auto_reconnect=auto_reconnect)
+    await client.connect()
+    errors, latencies = 0, []
+
+    async def worker():
+        nonlocal errors
+        for _ in range(queries):
+            s = time.perf_counter()
+            try:
+                await client.get_time()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - s)
+            await asyncio.sleep(0.02)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    await asyncio.sleep(0.3)
+    await server.blip(outage)
+    await asyncio.gather(*tasks)
+    print(f'{name:>16}: {errors:3} errors of {workers * queries} queries, max latency {max(latencies) * 1000:6.1f} ms')
+    await client.close()
+    await server.close()
+
+
+async def main():
+    await measure('default', False)
+    await measure('auto_reconnect', True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
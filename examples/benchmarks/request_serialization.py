@@ -0,0 +1,53 @@
+"""
+Liteserver requests serialized per second.
+
+Compares serializing the nested `adnl.message.query` -> `liteServer.query` -> method objects from dicts
+(as it was before) with precompiled envelopes, where only the query id and the method payload are spliced in.
+Run: python examples/benchmarks/request_serialization.py
+"""
+import time
+
+from pytoniq_core.crypto.ciphers import get_random
+
+from pytoniq import LiteClient
+
+
+ZERO_HASH = '00' * 32
+BLOCK = {'workchain': -1, 'shard': -9223372036854775808, 'seqno': 1, 'root_hash': ZERO_HASH, 'file_hash': ZERO_HASH}
+
+REQUESTS = (
+    ('getMasterchainInfo', {}),
+    ('getAccountState', {'id': BLOCK, 'account': {'workchain': 0, 'id': ZERO_HASH}}),
+    ('runSmcMethod', {'mode': 4, 'id': BLOCK, 'account': {'workchain': 0, 'id': ZERO_HASH},
+                      'method_id': 85143, 'params': b'\x00' * 64}),
+)
+
+
+def nested(client: LiteClient, name: str, data: dict):
+    schemas = client.schemas
+    schema = schemas.get_by_name('liteServer.' + name)
+    qid = get_random(32)
+    return schemas.serialize(client.adnl_query_sch, {
+        'query_id': qid,
+        'query': schemas.serialize(client.ls_query_sch, {'data': schemas.serialize(schema, data)})
+    }), qid[::-1].hex()
+
+
+def measure(func, client: LiteClient, name: str, data: dict, seconds: float = 1.0) -> float:
+    n, s = 0, time.perf_counter()
+    while time.perf_counter() - s < seconds:
+        for _ in range(1000):
+            func(client, name, data)
+        n += 1000
+    return n / (time.perf_counter() - s)
+
+
+def main():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    for name, data in REQUESTS:
+        old, new = measure(nested, client, name, data), measure(LiteClient.serialize_ls_request, client, name, data)
+        print(f'{name:>20}: nested {old:9.0f} req/s, compiled {new:9.0f} req/s, x{new / old:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Latency of small queries while the same LiteClient downloads big blocks in background.
+
+Compares one ADNL session with a pool that has a dedicated session for large responses.
+Run: python examples/benchmarks/session_pool.py
+"""
+import asyncio
+import time
+
+from fake_liteserver import FakeLiteServer, BenchLiteClient, LAST_BLOCK
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def scan_blocks(client: BenchLiteClient, stop: asyncio.Event, parallel: int = 2):
+    async def worker():
+        while not stop.is_set():
+            await client.liteserver_request('getBlock', {'id': LAST_BLOCK})  # raw request: fake blocks can't be deserialized
+    await asyncio.gather(*[worker() for _ in range(parallel)])
+
+
+async def measure(server, name: str, samples: int, **kwargs):
+    client = server.client(BenchLiteClient, timeout=30, **kwargs)
+    await client.connect()
+    stop = asyncio.Event()
+    scanner = asyncio.create_task(scan_blocks(client, stop))
+    await asyncio.sleep(0.5)
+    lat = []
+    for _ in range(samples):
+        s = time.perf_counter()
+        await client.get_time()
+        lat.append((time.perf_counter() - s) * 1000)
+        await asyncio.sleep(0.01)
+    stop.set()
+    await scanner
+    print(f'{name:>32}: p50 {percentile(lat, 0.5):7.2f} ms, p99 {percentile(lat, 0.99):7.2f} ms')
+    await client.close()
+
+
+async def main(samples: int = 100):
+    server = FakeLiteServer.spawn(block_size=4 * 2**20)
+    await measure(server, 'single session', samples)
+    await measure(server, 'pool_size=2, dedicated_sessions=1', samples, pool_size=2, dedicated_sessions=1)
+    await server.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+"""
+Time to construct LiteClients for every liteserver of a config, as LiteBalancer.from_config does.
+
+Compares shared TL schemas registry with parsing all schemas for every client.
+Run: python examples/benchmarks/startup_time.py
+"""
+import time
+
+from pytoniq_core.tl.generator import TlGenerator
+
+from pytoniq import LiteClient
+from pytoniq.schemas import _generate
+
+from fake_liteserver import FakeLiteServer
+
+
+def main(n: int = 25):
+    pub_key = FakeLiteServer().pub_key
+
+    s = time.perf_counter()
+    for _ in range(n):
+        TlGenerator.with_default_schemas().generate()  # what every LiteClient.__init__ used to do
+        LiteClient(host='127.0.0.1', port=1, server_pub_key=pub_key)
+    old = time.perf_counter() - s
+
+    _generate.cache_clear()  # so the first client pays for parsing as on a real start
+    s = time.perf_counter()
+    for _ in range(n):
+        LiteClient(host='127.0.0.1', port=1, server_pub_key=pub_key)
+    new = time.perf_counter() - s
+
+    print(f'{n} clients, schemas parsed per client: {old * 1000:8.1f} ms')
+    print(f'{n} clients, shared schemas registry:   {new * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
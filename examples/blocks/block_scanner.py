@@ -37,25 +37,26 @@ class BlockScanner:
         for shard in shards_prev:
             self.shards_storage[self.get_shard_id(shard)] = shard.seqno
 
-        while True:
-            await self.blks_queue.put(master_blk)
-
-            shards = await self.client.get_all_shards_info(master_blk)
-            for shard in shards:
-                await self.get_not_seen_shards(shard)
-                self.shards_storage[self.get_shard_id(shard)] = shard.seqno
-
-            while not self.blks_queue.empty():
-                await self.block_handler(self.blks_queue.get_nowait())
-
-            while True:
-                if master_blk.seqno + 1 == self.client.last_mc_block.seqno:
-                    master_blk = self.client.last_mc_block
-                    break
-                elif master_blk.seqno + 1 < self.client.last_mc_block.seqno:
+        await self.scan_mc_block(master_blk)
+
+        async for last_mc_blk, _ in self.client.subscribe_masterchain():
+            while master_blk.seqno < last_mc_blk.seqno:
+                if master_blk.seqno + 1 == last_mc_blk.seqno:
+                    master_blk = last_mc_blk
+                else:
                     master_blk, _ = await self.client.lookup_block(wc=-1, shard=-9223372036854775808, seqno=master_blk.seqno + 1)
-                    break
-                await asyncio.sleep(0.1)
+                await self.scan_mc_block(master_blk)
+
+    async def scan_mc_block(self, master_blk: BlockIdExt):
+        await self.blks_queue.put(master_blk)
+
+        shards = await self.client.get_all_shards_info(master_blk)
+        for shard in shards:
+            await self.get_not_seen_shards(shard)
+            self.shards_storage[self.get_shard_id(shard)] = shard.seqno
+
+        while not self.blks_queue.empty():
+            await self.block_handler(self.blks_queue.get_nowait())
 
     async def get_not_seen_shards(self, shard: BlockIdExt):
         if self.shards_storage.get(self.get_shard_id(shard)) == shard.seqno:
@@ -9,10 +9,10 @@ import typing
 from asyncio import transports
 from typing import Any
 
-from pytoniq_core.tl.generator import TlGenerator
-
 from pytoniq_core.crypto.ciphers import Server, Client, AdnlChannel, get_random, aes_ctr_encrypt, aes_ctr_decrypt, get_shared_key, create_aes_ctr_sipher_from_key_n_data
 
+from ..schemas import get_schemas
+
 
 class SocketProtocol(asyncio.DatagramProtocol):
 
@@ -139,10 +139,7 @@ class AdnlTransport:
         self.local_address = local_address
 
         """########### TL ###########"""
-        if tl_schemas_path is None:
-            self.schemas = TlGenerator.with_default_schemas().generate()
-        else:
-            self.schemas = TlGenerator(tl_schemas_path).generate()
+        self.schemas = get_schemas(tl_schemas_path)
         self.adnl_query_sch = self.schemas.get_by_name('adnl.message.query')
         self.adnl_packet_content_sch = self.schemas.get_by_name('adnl.packetContents')
         self.create_channel_sch = self.schemas.get_by_name('adnl.message.createChannel')
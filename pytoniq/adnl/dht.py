@@ -9,9 +9,9 @@ import struct
 import requests
 from pytoniq_core.crypto.ciphers import Client, Server
 from pytoniq_core.crypto.signature import verify_sign
-from pytoniq_core.tl import TlGenerator
 
 from .adnl import Node, AdnlTransport
+from ..schemas import get_schemas
 from .overlay import OverlayNode, OverlayTransport
 
 
@@ -50,7 +50,7 @@ class DhtNode(Node):
 
         # check signature
         if check_signature:
-            schemas = TlGenerator.with_default_schemas().generate()
+            schemas = get_schemas()
             signed_message = schemas.serialize(schema=schemas.get_by_name('dht.node'), data=data)
             if not verify_sign(pub_k, signed_message, signature):
                 raise Exception('invalid node signature!')
@@ -70,10 +70,7 @@ class DhtClient:
         self.adnl_transport: AdnlTransport = adnl_transport
         self.nodes_set: set = set(nodes)
         assert len(nodes) >= 1, 'expected at least 1 node in the list'
-        if tl_schemas_path is None:
-            self.schemas = TlGenerator.with_default_schemas().generate()
-        else:
-            self.schemas = TlGenerator(tl_schemas_path).generate()
+        self.schemas = get_schemas(tl_schemas_path)
 
     async def close(self):
         """
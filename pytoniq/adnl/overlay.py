@@ -4,12 +4,11 @@ import time
 import hashlib
 import typing
 
-from pytoniq_core.tl.generator import TlGenerator
-
 from pytoniq_core import BlockIdExt, Block, Slice
 from pytoniq_core.crypto.ciphers import get_random
 
 from .adnl import Node, AdnlTransport, AdnlTransportError
+from ..schemas import get_schemas
 
 
 class OverlayTransportError(AdnlTransportError):
@@ -61,7 +60,7 @@ class OverlayTransport(AdnlTransport):
         if isinstance(zero_state_file_hash, bytes):
             zero_state_file_hash = zero_state_file_hash.hex()
 
-        schemes = TlGenerator.with_default_schemas().generate()
+        schemes = get_schemas()
 
         sch = schemes.get_by_name('tonNode.shardPublicOverlayId')
         data = {
@@ -2,5 +2,9 @@ import typing
 
 from .client import LiteClient, LiteClientError, RunGetMethodError, BlockId, BlockIdExt, LiteServerError
 from .balancer import LiteBalancer, BalancerError
+from .metrics import MetricsHook, LiteClientMetrics, RequestStats
+from .cache import BlockCache, LibraryCache, BlockchainConfig, ConfigCache, EmulatorCache
+from .store import DiskStore
+from .index import MasterchainIndex
 
 LiteClientLike = typing.Union[LiteClient, LiteBalancer]
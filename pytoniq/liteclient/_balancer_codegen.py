@@ -3,7 +3,9 @@ codegen_text2 = '''    """CODE ABOVE IS AUTOGENERATED. DO NOT EDIT MANUALLY"""\n
 
 
 exceptions = {
-    'raw_send_message'
+    'raw_send_message',
+    'iter_transactions',
+    'iter_accounts_transactions',
 }
 
 
@@ -21,7 +23,7 @@ def main():
                 offset = True
             if not offset:
                 continue
-            if 'async def' in line:
+            if line.startswith('    async def '):  # methods only, not nested functions
                 name = line[line.index('    async def ') + 14: line.index('(')]
                 if name in exceptions or name.startswith('_'):
                     continue
@@ -9,6 +9,10 @@ from pytoniq_core import BlockIdExt, Block, Address, Account, ShardAccount, Simp
 from pytoniq_core.tlb.block import BinTree
 
 from .client import LiteClient, LiteClientError, LiteServerError
+from .cache import BlockCache, LibraryCache, BlockchainConfig
+from .store import DiskStore
+from .index import MasterchainIndex
+from .pagination import iter_transactions, iter_accounts_transactions
 
 
 class BalancerError(LiteClientError):
@@ -17,9 +21,25 @@ class BalancerError(LiteClientError):
 
 class LiteBalancer:
 
-    def __init__(self, peers: typing.List[LiteClient], timeout: int = 10):
+    def __init__(self, peers: typing.List[LiteClient], timeout: int = 10, block_cache: typing.Optional[BlockCache] = None,
+                 disk_store: typing.Optional[DiskStore] = None, library_cache: typing.Optional[LibraryCache] = None,
+                 mc_index: typing.Optional[MasterchainIndex] = None):
 
         self._peers = peers
+        if library_cache is None and peers:
+            library_cache = peers[0].libs
+        if library_cache is not None:
+            self.library_cache = library_cache  # so every library is downloaded once, not by each peer
+        for peer in peers[1:]:
+            peer.configs = peers[0].configs  # the same for configs, loaded once per key block
+        if mc_index is None and peers:
+            mc_index = peers[0].mc_index
+        if mc_index is not None:
+            self.mc_index = mc_index
+        if block_cache is not None:
+            self.block_cache = block_cache
+        if disk_store is not None:
+            self.disk_store = disk_store
         self._alive_peers: typing.Set[int] = set()
         self._archival_peers = set()
 
@@ -57,6 +77,54 @@ class LiteBalancer:
                 return p.last_mc_block
         return None
 
+    @property
+    def block_cache(self) -> typing.Optional[BlockCache]:
+        """
+        Cache shared by all peers, so a block fetched from one of them isn't fetched again from another
+        """
+        return self._peers[0].block_cache if self._peers else None
+
+    @block_cache.setter
+    def block_cache(self, cache: typing.Optional[BlockCache]) -> None:
+        for peer in self._peers:
+            peer.block_cache = cache
+
+    @property
+    def library_cache(self) -> typing.Optional[LibraryCache]:
+        """
+        Library cache shared by all peers
+        """
+        return self._peers[0].libs if self._peers else None
+
+    @library_cache.setter
+    def library_cache(self, cache: LibraryCache) -> None:
+        for peer in self._peers:
+            peer.libs = cache
+
+    @property
+    def disk_store(self) -> typing.Optional[DiskStore]:
+        """
+        Persistent store shared by all peers
+        """
+        return self._peers[0].disk_store if self._peers else None
+
+    @disk_store.setter
+    def disk_store(self, store: typing.Optional[DiskStore]) -> None:
+        for peer in self._peers:
+            peer.disk_store = store
+
+    @property
+    def mc_index(self) -> typing.Optional[MasterchainIndex]:
+        """
+        Masterchain blocks index shared by all peers
+        """
+        return self._peers[0].mc_index if self._peers else None
+
+    @mc_index.setter
+    def mc_index(self, index: MasterchainIndex) -> None:
+        for peer in self._peers:
+            peer.mc_index = index
+
     def set_max_retries(self, retries_num: int) -> None:
         self.max_retries = retries_num
 
@@ -161,6 +229,8 @@ class LiteBalancer:
                         else:
                             self._alive_peers.discard(i)
                             continue
+                    if i in self._alive_peers:
+                        continue  # client keepalive already checks the connection, only peers left out are pinged
                     ping_res = await self._ping_peer(client)
                     if ping_res:
                         self._alive_peers.add(i)
@@ -178,11 +248,20 @@ class LiteBalancer:
     def _build_priority_list(self, only_archive: bool = False):
         sorted_peers = sorted(
             list(self._alive_peers) if not only_archive else list(self._archival_peers),
-            key=lambda e: (self._mc_blocks.get(e, 0), -self._av_resp_time.get(e, self.timeout * 1000)),
+            key=lambda e: (self._mc_blocks.get(e, 0), -self._peer_latency(e)),
             reverse=True
-        )  # first peers are with biggest masterchain seqno and lowest avg time response
+        )  # first peers are with biggest masterchain seqno and lowest round trip time
         return sorted_peers
 
+    def _peer_latency(self, ls_index: int) -> float:
+        """
+        :return: peer connection round trip time in ms, average response time if it's not measured yet
+        """
+        rtt = self._peers[ls_index].rtt
+        if rtt is not None:
+            return rtt * 1000
+        return self._av_resp_time.get(ls_index, self.timeout * 1000)
+
     def _choose_peer(self, only_archive: bool = False):
         peers = self._build_priority_list(only_archive)
         min_req = float('inf')
@@ -336,6 +415,14 @@ class LiteBalancer:
                            utime: typing.Optional[int] = None, **kwargs) -> typing.Tuple[BlockIdExt, Block]:
         return await self.execute_method('lookup_block', **self._get_args(locals())) 
 
+    async def lookup_mc_block(self, seqno: typing.Optional[int] = None, lt: typing.Optional[int] = None,
+                              utime: typing.Optional[int] = None, **kwargs) -> BlockIdExt:
+        return await self.execute_method('lookup_mc_block', **self._get_args(locals())) 
+
+    async def backfill_mc_index(self, from_seqno: int, to_seqno: typing.Optional[int] = None,
+                                concurrency: int = 16, **kwargs) -> int:
+        return await self.execute_method('backfill_mc_index', **self._get_args(locals())) 
+
     async def raw_get_block(self, block: BlockIdExt, **kwargs) -> Block:
         return await self.execute_method('raw_get_block', **self._get_args(locals())) 
 
@@ -349,6 +436,11 @@ class LiteBalancer:
                                     , **kwargs) -> typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]:
         return await self.execute_method('raw_get_account_state', **self._get_args(locals())) 
 
+    async def get_account_states(self, addresses: typing.Sequence[typing.Union[str, Address]],
+                                 block: typing.Optional[BlockIdExt] = None, concurrency: int = 64
+                                 , **kwargs) -> typing.List[typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]]:
+        return await self.execute_method('get_account_states', **self._get_args(locals())) 
+
     async def get_account_state(self, address: typing.Union[str, Address], **kwargs) -> SimpleAccount:
         return await self.execute_method('get_account_state', **self._get_args(locals())) 
 
@@ -364,11 +456,29 @@ class LiteBalancer:
                                     , **kwargs) -> list:
         return await self.execute_method('run_get_method_remote', **self._get_args(locals())) 
 
+    async def run_get_methods_remote(self, address: typing.Union[Address, str],
+                                     methods: typing.List[typing.Tuple[typing.Union[int, str], list]],
+                                     block: BlockIdExt = None
+                                     , **kwargs) -> typing.List[list]:
+        return await self.execute_method('run_get_methods_remote', **self._get_args(locals())) 
+
+    async def run_get_methods(self, address: typing.Union[Address, str],
+                              methods: typing.List[typing.Tuple[typing.Union[int, str], list]],
+                              block: BlockIdExt = None
+                              , **kwargs) -> typing.List[list]:
+        return await self.execute_method('run_get_methods', **self._get_args(locals())) 
+
     async def run_get_method_local(self, address: typing.Union[Address, str],
                                    method: typing.Union[int, str], stack: list,
                                    block: BlockIdExt = None, gas_limit: int = 300000, **kwargs) -> list:
         return await self.execute_method('run_get_method_local', **self._get_args(locals())) 
 
+    async def run_get_methods_local(self, address: typing.Union[Address, str],
+                                    methods: typing.List[typing.Tuple[typing.Union[int, str], list]],
+                                    block: BlockIdExt = None, gas_limit: int = 300000
+                                    , **kwargs) -> typing.List[list]:
+        return await self.execute_method('run_get_methods_local', **self._get_args(locals())) 
+
     async def raw_get_shard_info(self, block: typing.Optional[BlockIdExt] = None,
                                  wc: int = 0, shard: int = -9223372036854775808,
                                  exact: bool = True
@@ -422,6 +532,9 @@ class LiteBalancer:
     async def prove_block(self, target_block: BlockIdExt, **kwargs) -> None:
         return await self.execute_method('prove_block', **self._get_args(locals())) 
 
+    async def get_config(self, blk: typing.Optional[BlockIdExt] = None, **kwargs) -> BlockchainConfig:
+        return await self.execute_method('get_config', **self._get_args(locals())) 
+
     async def get_config_all(self, blk: typing.Optional[BlockIdExt] = None, **kwargs) -> dict:
         return await self.execute_method('get_config_all', **self._get_args(locals())) 
 
@@ -431,6 +544,9 @@ class LiteBalancer:
     async def get_libraries(self, library_list: typing.List[typing.Union[bytes, str]], **kwargs) -> typing.Dict[str, typing.Optional[Cell]]:
         return await self.execute_method('get_libraries', **self._get_args(locals())) 
 
+    async def prefetch_libraries(self, library_list: typing.List[typing.Union[bytes, str]], **kwargs) -> int:
+        return await self.execute_method('prefetch_libraries', **self._get_args(locals())) 
+
     async def get_out_msg_queue_sizes(self, wc: int = None, shard: int = None, **kwargs):
         return await self.execute_method('get_out_msg_queue_sizes', **self._get_args(locals())) 
 
@@ -467,6 +583,23 @@ class LiteBalancer:
             return 1
         raise exc  # raise last exception
 
+    async def iter_transactions(self, address: typing.Union[Address, str],
+                                from_lt: int = None, from_hash: typing.Optional[bytes] = None,
+                                to_lt: int = 0, page_size: int = 16
+                                ) -> typing.AsyncIterator[Transaction]:
+        # the same paging as LiteClient has, but every page request goes to the best peer at the moment
+        async for transaction in iter_transactions(self.raw_get_account_state, self.raw_get_transactions, address,
+                                                   from_lt, from_hash, to_lt, page_size):
+            yield transaction
+
+    async def iter_accounts_transactions(self, accounts: typing.Iterable[typing.Union[Address, str, tuple]],
+                                         concurrency: int = 16, page_size: int = 16
+                                         ) -> typing.AsyncIterator[typing.Tuple[Address, typing.List[Transaction]]]:
+        # every page request is balanced on its own, so concurrent walks are spread over the alive peers
+        async for item in iter_accounts_transactions(self.raw_get_account_state, self.raw_get_transactions, accounts,
+                                                     concurrency, page_size):
+            yield item
+
     async def close_all(self):
         for peer in self._peers:
             self._check_errors(peer)
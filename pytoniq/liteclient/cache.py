@@ -0,0 +1,349 @@
+import base64
+import bisect
+import collections
+import time
+import typing
+
+from pytoniq_core import HashMap, Builder
+from pytoniq_core.boc import Cell, Slice
+from pytoniq_core.tlb.config import ConfigParam
+
+
+class BlockCache:
+    """
+    LRU cache of verified data of blocks: blocks, block headers, seqno lookups, block transactions and transactions.
+    Such data never changes for a given BlockIdExt, so entries are never invalidated, only evicted
+    when the total size goes above `max_bytes`. Sizes are approximate and based on the answers BoC sizes.
+    One instance can be shared by several clients, e.g. by all LiteBalancer peers:
+    >>> cache = BlockCache(max_bytes=512 * 2**20)
+    >>> balancer = LiteBalancer(peers, block_cache=cache)
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: typing.OrderedDict[tuple, typing.Tuple[typing.Any, int]] = collections.OrderedDict()
+        self.hits: typing.Dict[str, int] = {}  # kind (first element of the key) : count
+        self.misses: typing.Dict[str, int] = {}
+        self.evictions: typing.Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def get(self, key: tuple) -> typing.Any:
+        """
+        :param key: tuple, first element is the data kind, e.g. `('block', block_id)`
+        :return: cached value or None
+        """
+        entry = self._entries.get(key)
+        kind = key[0]
+        if entry is None:
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return entry[0]
+
+    def put(self, key: tuple, value: typing.Any, size: int) -> None:
+        """
+        :param key: tuple, first element is the data kind
+        :param value: not None value
+        :param size: approximate value size in bytes, values larger than `max_bytes` are not cached
+        """
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self._entries[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions[evicted_key[0]] = self.evictions.get(evicted_key[0], 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'size': self.size,
+            'max_bytes': self.max_bytes,
+            'entries': len(self._entries),
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+            'evictions': dict(self.evictions),
+        }
+
+
+class LibraryCache:
+    """
+    Library cells by hash, shared by clients (all LiteBalancer peers share one by default), bounded by `max_libraries`
+    with LRU eviction. Also keeps serialized library dictionaries for `run_get_method_local`,
+    built once per set of libraries. Libraries are persisted by the client `disk_store` if it's set.
+    Hashes the liteserver doesn't know are remembered for `not_found_ttl` seconds (a library may be published later)
+    with the same LRU bound, so a missing library costs one request, not one per get method call
+    """
+
+    def __init__(self, max_libraries: int = 1024, max_dicts: int = 256, not_found_ttl: float = 60):
+        self.max_libraries = max_libraries
+        self.max_dicts = max_dicts
+        self.not_found_ttl = not_found_ttl
+        self._libs: typing.OrderedDict[str, Cell] = collections.OrderedDict()  # hash hex : library cell
+        self._dicts: typing.OrderedDict[typing.FrozenSet[str], Cell] = collections.OrderedDict()
+        self._not_found: typing.OrderedDict[str, float] = collections.OrderedDict()  # hash hex : monotonic time
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._libs)
+
+    def __contains__(self, lib_hash: str) -> bool:
+        return lib_hash in self._libs
+
+    def get(self, lib_hash: str) -> typing.Optional[Cell]:
+        lib = self._libs.get(lib_hash)
+        if lib is None:
+            self.misses += 1
+            return None
+        self._libs.move_to_end(lib_hash)
+        self.hits += 1
+        return lib
+
+    def put(self, lib_hash: str, lib: Cell) -> None:
+        self._not_found.pop(lib_hash, None)
+        self._libs[lib_hash] = lib
+        self._libs.move_to_end(lib_hash)
+        while len(self._libs) > self.max_libraries:
+            evicted, _ = self._libs.popitem(last=False)
+            self.evictions += 1
+            for key in [k for k in self._dicts if evicted in k]:
+                del self._dicts[key]
+
+    def put_not_found(self, lib_hash: str) -> None:
+        """
+        Remembers that the liteserver has no library with `lib_hash`
+        """
+        self._not_found[lib_hash] = time.monotonic()
+        self._not_found.move_to_end(lib_hash)
+        while len(self._not_found) > self.max_libraries:
+            self._not_found.popitem(last=False)
+            self.evictions += 1
+
+    def is_not_found(self, lib_hash: str) -> bool:
+        found_at = self._not_found.get(lib_hash)
+        if found_at is None:
+            return False
+        if time.monotonic() - found_at > self.not_found_ttl:
+            del self._not_found[lib_hash]
+            return False
+        return True
+
+    def missing(self, lib_hashes: typing.Iterable[str]) -> typing.List[str]:
+        """
+        :return: hashes from `lib_hashes` which are not in the cache and not known to be absent on the liteserver
+        """
+        return [h for h in lib_hashes if self.get(h) is None and not self.is_not_found(h)]
+
+    def get_dict(self, lib_hashes: typing.Iterable[str]) -> typing.Optional[Cell]:
+        """
+        :param lib_hashes: libraries hashes in hex
+        :return: serialized `HashmapE 256 LibDescr`-like dictionary of cached libraries from `lib_hashes`
+            as TVM emulator expects it, None if none of them is cached
+        """
+        key = frozenset(h for h in lib_hashes if h in self._libs)
+        if not key:
+            return None
+        result = self._dicts.get(key)
+        if result is not None:
+            self._dicts.move_to_end(key)
+            return result
+
+        def value_serializer(src: Cell, dest: Builder):
+            dest.store_uint(0, 2).store_ref(src).store_maybe_ref(None)
+
+        hm = HashMap(256, value_serializer=value_serializer)
+        hm.map = {int(h, 16): self._libs[h] for h in key}
+        result = self._dicts[key] = hm.serialize()
+        while len(self._dicts) > self.max_dicts:
+            self._dicts.popitem(last=False)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            'libraries': len(self._libs),
+            'dicts': len(self._dicts),
+            'not_found': len(self._not_found),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class BlockchainConfig:
+    """
+    Blockchain config of one key block: raw params cells, params parsed on first access
+    and the config dictionary serialized as TVM emulator expects it
+    """
+
+    def __init__(self, params: typing.Dict[int, Slice], key_block_seqno: typing.Optional[int] = None):
+        self.raw = params  # param number : param cell slice
+        self.key_block_seqno = key_block_seqno
+        self._parsed: typing.Dict[int, typing.Any] = {}
+        self._cell: typing.Optional[Cell] = None
+        self._cell_b64: typing.Optional[bytes] = None
+
+    @property
+    def cell(self) -> Cell:
+        if self._cell is None:
+            hm = HashMap(32, value_serializer=lambda src, dest: dest.store_ref(src.to_cell()))
+            hm.map = self.raw
+            self._cell = hm.serialize()
+        return self._cell
+
+    @property
+    def cell_b64(self) -> bytes:
+        """
+        Base64 BoC of `cell`, as TVM emulator takes it
+        """
+        if self._cell_b64 is None:
+            self._cell_b64 = base64.b64encode(self.cell.to_boc())
+        return self._cell_b64
+
+    def get_param(self, i: int) -> typing.Any:
+        """
+        :return: deserialized ConfigParam if it's known, its slice otherwise
+        """
+        result = self._parsed.get(i)
+        if result is None:
+            v = self.raw[i]
+            result = self._parsed[i] = ConfigParam.params[i].deserialize(v) if i in ConfigParam.params else v
+        return result
+
+    def get_params(self, params: typing.Iterable[int]) -> dict:
+        """
+        :return: parsed params, the objects are cached and shared by all callers, so they must not be changed
+        """
+        return {i: self.get_param(i) for i in params if i in self.raw}
+
+    def get_all(self) -> dict:
+        return self.get_params(self.raw)
+
+
+class ConfigCache:
+    """
+    Blockchain configs by config dictionary hash. Config changes only in key blocks,
+    so configs are also found by the key block the masterchain block belongs to:
+    as soon as a newer key block is seen, lookups for later blocks miss and the new config is loaded
+    """
+
+    def __init__(self, max_configs: int = 8, max_blocks: int = 1024):
+        self.max_configs = max_configs
+        self.max_blocks = max_blocks
+        self._configs: typing.OrderedDict[bytes, BlockchainConfig] = collections.OrderedDict()
+        self._by_key_block: typing.Dict[int, BlockchainConfig] = {}  # key block seqno : config
+        self._key_blocks: typing.OrderedDict[int, int] = collections.OrderedDict()  # mc block seqno : key block seqno
+        self._seqnos: typing.List[int] = []  # sorted keys of `_key_blocks`
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def get(self, config_hash: bytes) -> typing.Optional[BlockchainConfig]:
+        config = self._configs.get(config_hash)
+        self._count(config)
+        if config is not None:
+            self._configs.move_to_end(config_hash)
+        return config
+
+    def get_by_key_block(self, key_block_seqno: int) -> typing.Optional[BlockchainConfig]:
+        config = self._by_key_block.get(key_block_seqno)
+        self._count(config)
+        return config
+
+    def put(self, config_hash: bytes, config: BlockchainConfig) -> None:
+        self._configs[config_hash] = config
+        self._configs.move_to_end(config_hash)
+        if config.key_block_seqno is not None:
+            self._by_key_block[config.key_block_seqno] = config
+        while len(self._configs) > self.max_configs:
+            _, evicted = self._configs.popitem(last=False)
+            if evicted not in self._configs.values() and self._by_key_block.get(evicted.key_block_seqno) is evicted:
+                del self._by_key_block[evicted.key_block_seqno]
+
+    def get_key_block(self, mc_seqno: int) -> typing.Optional[int]:
+        """
+        :return: seqno of the key block, config of which is used in the masterchain block, if known
+            or if the nearest known blocks around it show there is no key block between them
+        """
+        key_block = self._key_blocks.get(mc_seqno)
+        if key_block is not None:
+            return key_block
+        known = self._seqnos
+        i = bisect.bisect_left(known, mc_seqno)
+        if 0 < i < len(known) and self._key_blocks[known[i]] <= known[i - 1]:
+            return self._key_blocks[known[i]]
+        return None
+
+    def set_key_block(self, mc_seqno: int, key_block_seqno: int) -> None:
+        if mc_seqno not in self._key_blocks:
+            bisect.insort(self._seqnos, mc_seqno)
+        self._key_blocks[mc_seqno] = key_block_seqno
+        while len(self._key_blocks) > self.max_blocks:
+            evicted, _ = self._key_blocks.popitem(last=False)
+            del self._seqnos[bisect.bisect_left(self._seqnos, evicted)]
+
+    def _count(self, config: typing.Optional[BlockchainConfig]) -> None:
+        if config is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def to_dict(self) -> dict:
+        return {'configs': len(self._configs), 'hits': self.hits, 'misses': self.misses}
+
+
+class EmulatorCache:
+    """
+    TVM emulators used by `run_get_method_local` by (code hash, data hash, config hash, libraries dictionary hash),
+    with LRU eviction.
+    An emulator keeps account code, data, libraries and config, so only per-call parts are set on each call
+    """
+
+    def __init__(self, max_emulators: int = 64):
+        self.max_emulators = max_emulators
+        self._emulators: typing.OrderedDict[typing.Tuple[bytes, bytes, bytes, bytes], typing.Any] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._emulators)
+
+    def get(self, key: typing.Tuple[bytes, bytes, bytes, bytes]) -> typing.Any:
+        emulator = self._emulators.get(key)
+        if emulator is None:
+            self.misses += 1
+            return None
+        self._emulators.move_to_end(key)
+        self.hits += 1
+        return emulator
+
+    def put(self, key: typing.Tuple[bytes, bytes, bytes, bytes], emulator: typing.Any) -> None:
+        self._emulators[key] = emulator
+        self._emulators.move_to_end(key)
+        while len(self._emulators) > self.max_emulators:
+            self._emulators.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._emulators.clear()
+
+    def to_dict(self) -> dict:
+        return {'emulators': len(self._emulators), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
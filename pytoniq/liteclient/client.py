@@ -1,36 +1,71 @@
 import base64
 import hashlib
 import logging
+import random
 import asyncio
+import concurrent.futures
+import functools
+import importlib.util
 import socket
 import struct
 import typing
+import time
 from contextlib import suppress
 
 import requests
-from pytoniq_core import HashMap, Builder
 
 from .sync import choose_key_block, sync
 from .utils import init_mainnet_blocks, init_testnet_blocks
-from pytoniq_core.boc import Slice, Cell, begin_cell
-from pytoniq_core.proof.check_proof import check_block_header_proof, check_shard_proof, check_account_proof, check_proof, \
-    check_block_signatures, compute_validator_set
+from .parsing import parse_block, parse_block_transactions_ext, parse_account_state, check_block_link, \
+    check_account_shard_proof, parse_account_states
+from .metrics import MetricsHook, RequestStats
+from .cache import BlockCache, LibraryCache, BlockchainConfig, ConfigCache, EmulatorCache
+from .store import DiskStore
+from .index import MasterchainIndex
+from .emulation import create_emulator, run_emulator, run_get_method_boc, ConfigNotLoaded
+from .pagination import iter_transactions, iter_accounts_transactions
+from ..schemas import get_schemas
+from pytoniq_core.boc import Slice, Cell
+from pytoniq_core.proof.check_proof import check_block_header_proof, check_shard_proof, check_proof
 from pytoniq_core.boc.address import Address
 
 from pytoniq_core.crypto.ciphers import Server, Client, get_random, create_aes_ctr_cipher, aes_ctr_encrypt, aes_ctr_decrypt, get_shared_key
 from pytoniq_core.crypto.crc import crc16
 
-from pytoniq_core.tl.generator import TlGenerator, TlSchema
+from pytoniq_core.tl.generator import TlSchema, TlError
 from pytoniq_core.tl.block import BlockIdExt, BlockId  # do not remove this import!
-from pytoniq_core.tlb.config import ConfigParam34, ConfigParam28, ConfigParam
 from pytoniq_core.tlb.transaction import Transaction
 from pytoniq_core.tlb.utils import deserialize_shard_hashes
 
 from pytoniq_core.tlb.vm_stack import VmStack
-from pytoniq_core.tlb.block import Block, ShardDescr, BinTree, ShardStateUnsplit, KeyExtBlkRef, BlockExtra
+from pytoniq_core.tlb.block import Block, BlockInfo, ShardDescr, BinTree, ShardStateUnsplit, BlockExtra
 from pytoniq_core.tlb.account import Account, SimpleAccount, ShardAccount, AccountBlock
 
 
+def tl_bytes(data: bytes) -> bytes:
+    """
+    :return: data serialized as TL `bytes`: length prefix, data and zero padding to 4 bytes
+    """
+    length = len(data)
+    if length <= 253:
+        return b''.join((length.to_bytes(1, 'little'), data, b'\x00' * (-(length + 1) % 4)))
+    return b''.join((b'\xFE', length.to_bytes(3, 'little'), data, b'\x00' * (-length % 4)))
+
+
+async def run_workers(worker: typing.Callable[[], typing.Awaitable], count: int) -> None:
+    """
+    Runs `count` copies of `worker` until all of them finish. If one of them fails or the caller is cancelled,
+    the others are cancelled and awaited before the error is raised, so nothing keeps running in background
+    """
+    tasks = [asyncio.ensure_future(worker()) for _ in range(count)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 class LiteClientError(Exception):
     pass
 
@@ -50,8 +85,120 @@ class RunGetMethodError(LiteClientError):
         super().__init__(f'Get method "{method}" for account {address} returned exit code {exit_code}')
 
 
+class LiteServerProtocol(asyncio.BufferedProtocol):
+    """
+    Liteserver connection transport: every chunk the socket delivers is received straight into one buffer
+    and decrypted in place, then all complete frames in it are handed to the client at once
+    """
+
+    min_free_space = 1 << 16
+    max_buffer_size = 1 << 20  # buffer grown for bigger frames is dropped once they are handled, so we don't hold it forever
+
+    def __init__(self, client: "LiteClient"):
+        self.client = client
+        self.transport: asyncio.Transport = None
+        self.closed = client.loop.create_future()  # result is the exception connection was lost with, if any
+        self._buffer = bytearray(2 * self.min_free_space)
+        self._start = 0  # beginning of not handled data
+        self._end = 0  # end of received data
+        self._frame_size = 0  # size of incomplete frame at the beginning, with length prefix
+        self._paused = False
+        self._drain_waiters: typing.List[asyncio.Future] = []
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+
+    def connection_lost(self, exc: typing.Optional[Exception]) -> None:
+        if not self.closed.done():
+            self.closed.set_result(exc)
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_exception(ConnectionResetError('Connection lost'))
+        self._drain_waiters = []
+
+    def pause_writing(self) -> None:
+        self._paused = True
+
+    def resume_writing(self) -> None:
+        self._paused = False
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._drain_waiters = []
+
+    async def drain(self) -> None:
+        if self.transport.is_closing():
+            await asyncio.sleep(0)  # let connection_lost() be called, as StreamWriter does
+            raise ConnectionResetError('Connection lost')
+        if not self._paused:
+            return
+        waiter = self.client.loop.create_future()
+        self._drain_waiters.append(waiter)
+        await waiter
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if len(self._buffer) - self._end < self.min_free_space:
+            self._compact()
+        return memoryview(self._buffer)[self._end:]
+
+    def _compact(self) -> None:
+        """
+        Moves not handled data to the beginning of the buffer, growing it so the whole incomplete frame fits
+        """
+        pending = self._end - self._start
+        size = max(pending, self._frame_size) + self.min_free_space
+        if size <= len(self._buffer):
+            self._buffer[:pending] = self._buffer[self._start:self._end]
+        else:
+            buffer = bytearray(size)
+            buffer[:pending] = self._buffer[self._start:self._end]
+            self._buffer = buffer
+        self._start, self._end = 0, pending
+
+    def buffer_updated(self, nbytes: int) -> None:
+        client = self.client
+        start, end = self._start, self._end + nbytes
+        view = memoryview(self._buffer)
+        chunk = view[self._end:end]
+        measured = client._metrics is not None
+        if measured:
+            decrypt_started = time.perf_counter()
+        client.dec_sipher.decrypt(chunk, output=chunk)
+        decrypt_rate = (time.perf_counter() - decrypt_started) / nbytes if measured else 0.0
+        self._end = end
+        client._last_received = client.loop.time()
+
+        self._frame_size = 0
+        try:
+            while end - start >= 4:
+                size = int.from_bytes(view[start:start + 4], 'little') + 4
+                if end - start < size:
+                    self._frame_size = size
+                    break
+                client.frame_received(view[start + 4:start + size], size * decrypt_rate)
+                start += size
+        except Exception:
+            client.logger.exception('failed to handle liteserver frame')
+            self.transport.close()
+            return
+        finally:
+            chunk.release()
+            view.release()
+
+        if start == end:
+            start = end = 0
+            if len(self._buffer) > self.max_buffer_size:
+                self._buffer = bytearray(2 * self.min_free_space)
+        self._start, self._end = start, end
+
+
 class LiteClient:
 
+    large_response_methods = {'getBlock', 'getState', 'listBlockTransactionsExt', 'getConfigAll', 'getBlockProof',
+                              'getShardBlockProof', 'nonfinal.getCandidate'}  # go to dedicated sessions if any
+    rtt_excluded_methods = large_response_methods | {'waitMasterchainSeqno', 'runSmcMethod'}  # server time dominates
+    account_states_batch = 64  # accounts parsed in one `run_cpu` call by get_account_states
+
     def __init__(self,
                  host: str,  # ipv4 host
                  port: int,
@@ -60,9 +207,56 @@ class LiteClient:
                  tl_schemas_path: typing.Optional[str] = None,
                  trust_level: int = 1,
                  init_key_block: BlockIdExt = None,
+                 max_in_flight: typing.Optional[int] = None,
+                 pool_size: int = 1,
+                 dedicated_sessions: int = 0,
+                 executor: typing.Optional[concurrent.futures.Executor] = None,
+                 metrics: typing.Optional[MetricsHook] = None,
+                 keepalive_interval: float = 3,
+                 auto_reconnect: bool = False,
+                 reconnect_delay: float = 0.1,
+                 max_reconnect_delay: float = 10,
+                 block_cache: typing.Optional[BlockCache] = None,
+                 disk_store: typing.Optional[DiskStore] = None,
+                 library_cache: typing.Optional[LibraryCache] = None,
+                 get_method_executor: typing.Optional[concurrent.futures.Executor] = None,
+                 deduplicate: bool = False,
+                 mc_index: typing.Optional[MasterchainIndex] = None,
                  ) -> None:
         """
         ADNL over TCP client for `liteservers` usage
+        :param max_in_flight: maximum number of liteserver queries waiting for answer at once (per session),
+            further queries wait (within their timeout) for a free slot. None means unlimited
+        :param pool_size: number of ADNL sessions to the liteserver used for ordinary queries,
+            every query goes to the least loaded one
+        :param dedicated_sessions: number of additional sessions used only for methods from `large_response_methods`,
+            so multi-megabyte answers don't block small queries behind them
+        :param executor: thread or process pool to run BoC deserialization and proof checks of blocks,
+            block transactions, block proofs and account states in, instead of the event loop
+        :param metrics: hook receiving per-method numbers of every liteserver query, e.g. `LiteClientMetrics()`.
+            Nothing is measured when it's None
+        :param keepalive_interval: seconds without inbound traffic after which `tcp.ping` is sent.
+            If pong doesn't come within `timeout` the connection is closed
+        :param auto_reconnect: when connection is lost, reconnect in background instead of closing the client.
+            Known blocks are kept, queries wait (within their timeout) until the session is back
+            and those which were sent to the lost connection are sent again
+        :param reconnect_delay: delay after the first failed reconnection attempt, it's doubled after each next one
+        :param max_reconnect_delay: maximum delay between reconnection attempts
+        :param block_cache: cache of verified blocks, block headers and block transactions, may be shared by clients.
+            Nothing is cached when it's None
+        :param disk_store: persistent store of blocks, transactions and libraries, checked before the liteserver
+            is asked for them, so warm restarts and re-scans are served locally. At trust_level 0 stored blocks
+            are still proven and stored transactions are not used, as any client may have written them
+        :param library_cache: libraries used by `run_get_method_local`, may be shared by clients.
+            New unshared `LibraryCache()` if not provided
+        :param get_method_executor: thread or process pool to run `run_get_method_local` TVM emulation in,
+            its workers number is the number of get methods run in parallel. In the event loop if not provided
+        :param deduplicate: coalesce concurrent identical account state requests and get method calls
+            (same arguments and block) into one query, every caller gets the result of it.
+            Off by default: callers of coalesced `raw_get_account_state` get the same `Account` and `ShardAccount`
+            objects, so enable it only if they don't modify them. Get method result stacks are built for every caller
+        :param mc_index: index of masterchain blocks for `lookup_mc_block`, may be shared by clients and persisted.
+            New empty `MasterchainIndex()` if not provided, filled with every masterchain header the client checks
         """
 
         """########### init ###########"""
@@ -71,13 +265,41 @@ class LiteClient:
         self._closing = False
         self.logger = logging.getLogger(self.__class__.__name__)
         self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self._in_flight_limiter: typing.Optional[asyncio.Semaphore] = None
+        self._timed_out_requests = 0
+        self.deduplicate = deduplicate
+        self._single_flights: typing.Dict[tuple, asyncio.Future] = {}  # call key : its result
+        self.deduplicated_calls = 0  # calls which got the result of already running identical call
+        self.mc_index = mc_index if mc_index is not None else MasterchainIndex()
+
+        """########### metrics ###########"""
+        self._metrics = metrics
+        self._frame_stats = {}  # qid : (received at, frame bytes, decrypt time, decode time), filled only with metrics
+
+        """########### pool ###########"""
+        if pool_size < 1 or dedicated_sessions < 0:
+            raise LiteClientError('pool size should be at least 1 and dedicated sessions number non-negative')
+        self.pool_size = pool_size
+        self.dedicated_sessions = dedicated_sessions
+        self._pool: typing.List[LiteClient] = []  # additional sessions for ordinary queries, self is the first one
+        self._dedicated_pool: typing.List[LiteClient] = []
+        self._reopening: typing.Dict[LiteClient, asyncio.Task] = {}  # dead pooled session : task reopening it
+
+        """########### CPU offload ###########"""
+        self.executor = executor
+        self.get_method_executor = get_method_executor
+        self._executor_configs: typing.Set[bytes] = set()  # hashes of configs already sent to executor workers
 
         """########### sync ###########"""
+        self.block_cache = block_cache
+        self.disk_store = disk_store
         self.last_mc_block: BlockIdExt = None
         self.last_shard_blocks: typing.Dict[int, BlockIdExt] = None
         self.last_key_block: BlockIdExt = None
         self.trust_level = trust_level
         self.init_key_block: BlockIdExt = init_key_block
+        self._mc_updates: typing.Optional[asyncio.Future] = None  # next masterchain update, only while anyone is subscribed
         if not self.trust_level and not init_key_block:
             raise LiteClientError('trust level is zero but no init block provided')
 
@@ -88,30 +310,42 @@ class LiteClient:
         self.dec_sipher = None
 
         """########### connection ###########"""
-        self.reader: asyncio.StreamReader = None
-        self.writer: asyncio.StreamWriter = None
+        self.transport: asyncio.Transport = None
+        self.protocol: LiteServerProtocol = None
         self.loop: asyncio.AbstractEventLoop = None
-        self.delta = 0.02  # listen delay
 
         self.listener: asyncio.Task = None
         self.pinger: asyncio.Task = None
         self.updater: asyncio.Task = None
+        self.reconnector: asyncio.Task = None
+
+        self.keepalive_interval = keepalive_interval
+        self._last_received = 0.0  # loop time of the last inbound frame
+        self._srtt: typing.Optional[float] = None  # smoothed round trip time, as in RFC 6298
+        self._rttvar: typing.Optional[float] = None
+
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._reconnected: typing.Optional[asyncio.Future] = None  # pending while reconnecting in background
 
         """########### TL ###########"""
-        if tl_schemas_path is None:
-            self.schemas = TlGenerator.with_default_schemas().generate()
-        else:
-            self.schemas = TlGenerator(tl_schemas_path).generate()
+        self._tl_schemas_path = tl_schemas_path
+        self.schemas = get_schemas(tl_schemas_path)
         # for better performance:
         self.ping_sch = self.schemas.get_by_name('tcp.ping')
         self.pong_sch = self.schemas.get_by_name('tcp.pong')
         self.adnl_query_sch = self.schemas.get_by_name('adnl.message.query')
         self.ls_query_sch = self.schemas.get_by_name('liteServer.query')
+        self.adnl_answer_id = self.schemas.get_by_name('adnl.message.answer').little_id()
+        self.adnl_query_id = self.adnl_query_sch.little_id()
+        self.ls_query_id = self.ls_query_sch.little_id()
+        self._ls_methods = {}  # method name : (schema, serialized liteServer.query if method has no args else None)
 
         """########### Get methods ###########"""
-        self._block_states = {}  # block root hash : block state
-        self.libs = {}  # library hash : library cell
-        self.configs = {}  # config hash : config cell
+        self.libs = library_cache if library_cache is not None else LibraryCache()
+        self.configs = ConfigCache()
+        self.emulators = EmulatorCache()
 
     def encrypt(self, data: bytes) -> bytes:
         return aes_ctr_encrypt(self.enc_sipher, data)
@@ -119,76 +353,124 @@ class LiteClient:
     def decrypt(self, data: bytes) -> bytes:
         return aes_ctr_decrypt(self.dec_sipher, data)
 
+    def decode_frame(self, data: typing.Union[bytes, memoryview]) -> dict:
+        """
+        Checks hashsum of decrypted inbound frame and deserializes it
+        :param data: decrypted frame without length prefix
+        :return: deserialized adnl message
+        """
+        payload = data[:-32]
+        # check hashsum
+        assert hashlib.sha256(payload).digest() == data[-32:], 'incorrect checksum'
+        return self.deserialize_adnl_query(payload)
+
+    def frame_received(self, data: memoryview, decrypt_time: float = 0.0) -> None:
+        """
+        Resolves the query the frame answers. Called by the transport for every decrypted frame
+        :param data: decrypted frame without length prefix, valid only during the call
+        :param decrypt_time: time spent on decrypting the frame, for metrics
+        """
+        measured = self._metrics is not None
+        if measured:
+            decode_started = time.perf_counter()
+
+        result = self.decode_frame(data)
+
+        if not result:
+            # for handshake
+            result = {}
+
+        qid = result.get('query_id', result.get('random_id'))  # return query_id for ordinary requests, random_id for ping-pong requests, None for handshake
+
+        request: asyncio.Future = self.tasks.pop(qid, None)
+        if request is None:
+            self.logger.debug(msg=f'received answer for unknown query {qid}')
+            return
+
+        if measured and 'query_id' in result:
+            self._frame_stats[qid] = (decode_started - decrypt_time, len(data) + 4, decrypt_time,
+                                      time.perf_counter() - decode_started)
+
+        if not request.done():
+            request.set_result(result.get('answer', {}))
+
     async def _drain(self):
         try:
-            await self.writer.drain()
+            await self.protocol.drain()
         except ConnectionError:
-            await self.close()
+            if self.auto_reconnect:
+                self._connection_lost()
+            else:
+                await self.close()
             raise
 
     async def send(self, data: bytes, qid: typing.Union[str, int, None]) -> asyncio.Future:
         future = self.loop.create_future()
-        self.writer.write(data)
+        self.tasks[qid] = future  # register before writing, the answer can arrive while we are draining
+        self.transport.write(data)
         await self._drain()
-        self.tasks[qid] = future
         return future
 
     async def send_and_encrypt(self, data: bytes, qid: str) -> asyncio.Future:
-        future = self.loop.create_future()
-        self.writer.write(self.encrypt(data))
-        await self._drain()
-        self.tasks[qid] = future
-        return future
-
-    async def receive(self, data_len: int) -> bytes:
-        try:
-            return await self.reader.readexactly(data_len)
-        except (ConnectionError, asyncio.IncompleteReadError):
-            await self.close()
-            raise
-
-    async def receive_and_decrypt(self, data_len: int) -> bytes:
-        data = self.decrypt(await self.receive(data_len))
-        return data
+        return await self.send(self.encrypt(data), qid)
 
     async def listen(self) -> None:
+        """
+        Frames are handled by the protocol as soon as they are received, listener only waits for the connection end
+        """
+        protocol = self.protocol
         try:
-            while True:
-                while not self.tasks:
-                    await asyncio.sleep(self.delta)
-
-                data_len_encrypted = await self.receive(4)
-                data_len = int(self.decrypt(data_len_encrypted)[::-1].hex(), 16)
-
-                self.logger.debug(msg=f'received {data_len // 8} bytes of data')
-
-                data_encrypted = await self.receive(data_len)
-                data_decrypted = self.decrypt(data_encrypted)
-                # check hashsum
-                assert hashlib.sha256(data_decrypted[:-32]).digest() == data_decrypted[-32:], 'incorrect checksum'
-                result = self.deserialize_adnl_query(data_decrypted[:-32])
-
-                if not result:
-                    # for handshake
-                    result = {}
-
-                qid = result.get('query_id', result.get('random_id'))  # return query_id for ordinary requests, random_id for ping-pong requests, None for handshake
+            exc = await asyncio.shield(protocol.closed)
+        except asyncio.CancelledError:
+            return
+        finally:
+            if protocol is self.protocol:  # not replaced by a new session yet
+                self._cancel_all_tasks()
+        if exc is not None:
+            self.logger.debug(msg=f'connection lost: {exc}')
+        if self.auto_reconnect:
+            self._connection_lost()
+        else:
+            await self.close()
 
-                request: asyncio.Future = self.tasks.pop(qid)
+    @property
+    def reconnecting(self) -> bool:
+        return self._reconnected is not None and not self._reconnected.done()
 
-                result = result.get('answer', {})
-                if not request.done():
-                    request.set_result(result)
-        except asyncio.CancelledError:
-            pass
-        except (ConnectionResetError, asyncio.IncompleteReadError, ConnectionAbortedError, TimeoutError):
+    def _connection_lost(self) -> None:
+        if self._closing or self.reconnecting or self.transport is None:
             return
-        except Exception as e:
-            self.logger.exception('listener crashed')
-            asyncio.create_task(self.close())
+        self._reconnected = self.loop.create_future()
+        self._cancel_all_tasks()  # queries sent to the lost connection will be sent again once it's back
+        self.reconnector = asyncio.create_task(self._reconnect_in_background())
+
+    async def _reconnect_in_background(self) -> None:
+        delay = self.reconnect_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await self._reopen_session()
+            except Exception as e:
+                self.logger.info(f'Background reconnection attempt {attempt} failed: {type(e)}: {e}')
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))  # jitter, so clients don't come back all at once
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            self.logger.info(f'Reconnected in background after {attempt} attempt(s)')
+            self._reconnected.set_result(None)
             return
-        finally:
-            self._cancel_all_tasks()
+
+    async def _reopen_session(self) -> None:
+        """
+        Opens new ADNL session to the same liteserver, keeping known blocks and block updater
+        """
+        for task in (self.pinger, self.listener):
+            if task is not None and not task.done():
+                task.cancel()
+        if self.transport is not None:
+            self.transport.abort()
+        await self._open_session()
+        self.pinger = asyncio.create_task(self.ping())
 
     def _cancel_all_tasks(self):
         if self.tasks:
@@ -202,20 +484,126 @@ class LiteClient:
     async def connect(self) -> None:
         if self.inited:
             raise LiteClientError('The client is already connected')
+        await self._open_session()
+        if self.pool_size > 1 or self.dedicated_sessions:
+            self._pool = [self._new_session() for _ in range(self.pool_size - 1)]
+            self._dedicated_pool = [self._new_session() for _ in range(self.dedicated_sessions)]
+            await asyncio.gather(*[s.connect_session() for s in self._pool + self._dedicated_pool])
+        await self.update_last_blocks()
+        self._publish_mc_update()
+        self.pinger = asyncio.create_task(self.ping())
+        self.updater = asyncio.create_task(self.block_updater())
+        self.inited = True
+
+    async def _open_session(self) -> None:
         self.loop = asyncio.get_running_loop()
+        self._last_received = self.loop.time()
+        if not self.reconnecting:  # queries waiting for the reconnect hold the old one
+            self._in_flight_limiter = asyncio.Semaphore(self.max_in_flight) if self.max_in_flight else None
         handshake = self.handshake()
-        self.reader, self.writer = await asyncio.wait_for(
-            asyncio.open_connection(self.server.host, self.server.port),
-            self.timeout
-        )
+        await asyncio.wait_for(self._open_connection(), self.timeout)
         future = await asyncio.wait_for(self.send(handshake, None), self.timeout)
         self.listener = asyncio.create_task(self.listen())
         await asyncio.wait_for(future, self.timeout)
-        await self.update_last_blocks()
+
+    async def _open_connection(self) -> None:
+        self.transport, self.protocol = await self.loop.create_connection(
+            lambda: LiteServerProtocol(self), self.server.host, self.server.port
+        )
+
+    async def connect_session(self) -> None:
+        """
+        Connects only the ADNL session: no blocks sync and no block updater. Used for pooled sessions
+        """
+        if self.inited:
+            raise LiteClientError('The client is already connected')
+        await self._open_session()
         self.pinger = asyncio.create_task(self.ping())
-        self.updater = asyncio.create_task(self.block_updater())
         self.inited = True
 
+    def _new_session(self) -> "LiteClient":
+        """
+        Pooled session only carries queries, so it uses the caches of this client instead of its own
+        """
+        session = LiteClient(
+            host=self.server.host,
+            port=self.server.port,
+            server_pub_key=base64.b64encode(self.server.ed25519_public.encode()).decode(),
+            timeout=self.timeout,
+            tl_schemas_path=self._tl_schemas_path,
+            trust_level=self.trust_level,
+            init_key_block=self.init_key_block,
+            max_in_flight=self.max_in_flight,
+            metrics=self._metrics,
+            keepalive_interval=self.keepalive_interval,
+            auto_reconnect=self.auto_reconnect,
+            reconnect_delay=self.reconnect_delay,
+            max_reconnect_delay=self.max_reconnect_delay,
+            executor=self.executor,
+            block_cache=self.block_cache,
+            disk_store=self.disk_store,
+            library_cache=self.libs,
+            mc_index=self.mc_index,
+        )
+        session.configs = self.configs
+        session.emulators = self.emulators
+        return session
+
+    @staticmethod
+    def _is_alive(session: "LiteClient") -> bool:
+        return session.transport is not None and session.listener is not None and not session.listener.done()
+
+    def _choose_session(self, tl_schema_name: str) -> "LiteClient":
+        """
+        :return: least loaded alive session for the method, dedicated one for methods with large responses if any
+        """
+        if self._dedicated_pool and tl_schema_name in self.large_response_methods:
+            sessions = self._alive_sessions(self._dedicated_pool)
+            if sessions:
+                return min(sessions, key=lambda s: len(s.tasks))
+        if not self._pool:
+            return self
+        sessions = self._alive_sessions([self] + self._pool) or [self]
+        return min(sessions, key=lambda s: len(s.tasks))
+
+    def _alive_sessions(self, sessions: typing.List["LiteClient"]) -> typing.List["LiteClient"]:
+        """
+        :return: alive ones of `sessions`, dead pooled sessions are skipped and reopened in background
+        """
+        alive = []
+        for session in sessions:
+            if self._is_alive(session):
+                alive.append(session)
+            elif session is not self and not session.auto_reconnect and session not in self._reopening \
+                    and not self._closing:
+                self._reopening[session] = asyncio.create_task(self._reopen_pooled_session(session))
+        return alive
+
+    async def _reopen_pooled_session(self, session: "LiteClient") -> None:
+        try:
+            if session.inited:
+                await session.close()
+            await session.connect_session()
+            self.logger.info('pooled session reopened')
+        except Exception as e:
+            self.logger.info(f'Failed to reopen pooled session: {type(e)}: {e}')
+            await asyncio.sleep(self.reconnect_delay)  # so it's not retried on every query
+        finally:
+            self._reopening.pop(session, None)
+
+    @property
+    def sessions(self) -> typing.List["LiteClient"]:
+        return [self] + self._pool + self._dedicated_pool
+
+    @property
+    def metrics(self) -> typing.Optional[MetricsHook]:
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, hook: typing.Optional[MetricsHook]) -> None:
+        for session in self.sessions:
+            session._metrics = hook
+
     async def reconnect(self, max_retries: int = 5, retry_delay: int = 2) -> None:
         """
         :param max_retries: maximum number of reconnection attempts
@@ -240,8 +628,21 @@ class LiteClient:
             return
         self._closing = True
         self._cancel_all_tasks()
+        if self._mc_updates is not None and not self._mc_updates.done():
+            self._mc_updates.set_exception(LiteClientError('Connection is closed'))
+            self._mc_updates.exception()
+        self._mc_updates = None
+        if self.reconnecting:
+            self._reconnected.set_exception(LiteClientError('Connection is closed'))
+            self._reconnected.exception()
+        pool, self._pool, self._dedicated_pool = self._pool + self._dedicated_pool, [], []
+        reopening, self._reopening = list(self._reopening.values()), {}
+        for task in reopening:
+            task.cancel()
+        for session in pool:
+            await session.close()
         try:
-            for task_name in ("pinger", "updater", "listener"):
+            for task_name in ("reconnector", "pinger", "updater", "listener"):
                 task = getattr(self, task_name, None)
                 if task is None:
                     continue
@@ -256,13 +657,12 @@ class LiteClient:
 
             self.inited = False
             self.tasks.clear()
-            self.reader = None
-            w = self.writer
-            self.writer = None
+            transport, protocol = self.transport, self.protocol
+            self.transport = self.protocol = None
             with suppress(Exception):
-                w.close()
+                transport.close()
             with suppress(Exception):
-                await asyncio.wait_for(w.wait_closed(), timeout=1.0)
+                await asyncio.wait_for(asyncio.shield(protocol.closed), timeout=1.0)
         finally:
             self._closing = False
         self.logger.info('client has been closed')
@@ -291,19 +691,66 @@ class LiteClient:
         :param data: dict
         :return: result_bytes, qid
         """
-        qid = get_random(32)
-        res = self.schemas.serialize(
-            self.adnl_query_sch,
-            {'query_id': qid,
-             'query': self.schemas.serialize(self.ls_query_sch,
-                                             {'data': self.schemas.serialize(schema, data)}
-                                             )
-             }
-        )
-        return res, qid[::-1].hex()
+        return self.pack_adnl_ls_query(self.pack_ls_query(self.schemas.serialize(schema, data)))
 
-    def deserialize_adnl_query(self, data: bytes) -> dict:
-        return self.schemas.deserialize(data[32:], boxed=True)[0]
+    def pack_ls_query(self, payload: bytes) -> bytes:
+        """
+        :param payload: serialized liteserver method
+        :return: liteServer.query with the payload, already serialized as TL bytes field of adnl.message.query
+        """
+        # the same as serializing liteServer.query into `bytes` field, without building nested objects:
+        # inner bytes are 4-aligned and so is the constructor id, thus outer bytes need padding only for 1-byte length
+        inner = tl_bytes(payload)
+        length = len(inner) + 4
+        if length <= 253:
+            return b''.join((length.to_bytes(1, 'little'), self.ls_query_id, inner, b'\x00\x00\x00'))
+        return b''.join((b'\xFE', length.to_bytes(3, 'little'), self.ls_query_id, inner))
+
+    def pack_adnl_ls_query(self, ls_query: bytes, qid: typing.Optional[bytes] = None) -> typing.Tuple[bytes, str]:
+        """
+        :param ls_query: result of `pack_ls_query`
+        :param qid: 32 bytes of query id, random by default
+        :return: adnl.message.query bytes, qid
+        """
+        if qid is None:
+            qid = get_random(32)
+        return self.adnl_query_id + qid + ls_query, qid.hex()
+
+    def serialize_ls_request(self, tl_schema_name: str, data: dict) -> typing.Tuple[bytes, str]:
+        """
+        :param tl_schema_name: liteserver method name without `liteServer.` prefix
+        :param data: method args
+        :return: adnl.message.query bytes, qid
+        """
+        schema, ls_query = self._ls_methods.get(tl_schema_name) or self._compile_method(tl_schema_name)
+        if ls_query is None:
+            ls_query = self.pack_ls_query(self.schemas.serialize(schema, data))
+        return self.pack_adnl_ls_query(ls_query)
+
+    def _compile_method(self, tl_schema_name: str) -> tuple:
+        schema = self.schemas.get_by_name('liteServer.' + tl_schema_name)
+        if schema is None:
+            raise TlError(f'unknown TL schema liteServer.{tl_schema_name}')
+        static = self.pack_ls_query(schema.little_id()) if not schema.args else None
+        self._ls_methods[tl_schema_name] = compiled = (schema, static)
+        return compiled
+
+    def deserialize_adnl_query(self, data: typing.Union[bytes, memoryview]) -> dict:
+        data = data[32:]  # skip nonce
+        if data[:4] == self.adnl_answer_id:
+            # adnl.message.answer envelope is parsed by hand, so the (possibly multi-megabyte) answer is copied only once
+            if data[36] == 0xFE:
+                answer_len, start = int.from_bytes(data[37:40], 'little'), 40
+            else:
+                answer_len, start = data[36], 37
+            answer = bytes(data[start:start + answer_len])
+            try:
+                result, read = self.schemas.deserialize(answer)
+            except TlError:
+                result, read = answer, answer_len
+            if read == answer_len:
+                return {'@type': 'adnl.message.answer', 'query_id': data[4:36].hex(), 'answer': result}
+        return self.schemas.deserialize(bytes(data), boxed=True)[0]
 
     def get_ping_query(self):
         ping_sch = self.schemas.get_by_name('tcp.ping')
@@ -315,28 +762,196 @@ class LiteClient:
 
     async def ping(self):
         while True:
-            await asyncio.sleep(3)
+            idle = self.loop.time() - self._last_received
+            if idle < self.keepalive_interval:
+                # connection is in use, any answer proves it's alive
+                await asyncio.sleep(self.keepalive_interval - idle)
+                continue
             ping_query, qid = self.get_ping_query()
+            sent = self.loop.time()
             pong = await self.send(ping_query, qid)
-            await pong
+            try:
+                await asyncio.wait_for(pong, self.timeout)
+            except asyncio.TimeoutError:
+                self.logger.info('no pong from liteserver, dropping connection')
+                self.transport.abort()  # listener closes the client or reconnects
+                return
+            finally:
+                self.tasks.pop(qid, None)
+            self.update_rtt(self.loop.time() - sent)
             self.logger.debug(msg=f'ping - pong')
 
-    async def liteserver_query(self, query: bytes, qid: str) -> dict:
-        data = self.serialize_packet(query)
-        resp = await self.send_and_encrypt(data, qid)
-        await asyncio.wait_for(resp, self.timeout)
+    def update_rtt(self, sample: float) -> None:
+        """
+        Updates round trip time estimate with a new measurement, as TCP does (RFC 6298)
+        """
+        if self._srtt is None:
+            self._srtt, self._rttvar = sample, sample / 2
+        else:
+            self._rttvar = 0.75 * self._rttvar + 0.25 * abs(self._srtt - sample)
+            self._srtt = 0.875 * self._srtt + 0.125 * sample
+
+    @property
+    def rtt(self) -> typing.Optional[float]:
+        """
+        :return: smoothed round trip time of the connection in seconds, measured by pings and quick queries. None if unknown yet
+        """
+        return self._srtt
+
+    @property
+    def rtt_var(self) -> typing.Optional[float]:
+        return self._rttvar
+
+    async def run_cpu(self, func: typing.Callable, *args, method: typing.Optional[str] = None):
+        """
+        Runs CPU-heavy function in the client executor if it's set, otherwise just calls it
+        :param method: TL method name to report the time to metrics hook as proof checking time
+        """
+        if self._metrics is None or method is None:
+            if self.executor is None:
+                return func(*args)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        started = time.perf_counter()
+        try:
+            if self.executor is None:
+                return func(*args)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self._report(self._metrics.on_proof, method, time.perf_counter() - started)
+
+    async def _single_flight(self, key: tuple, call: typing.Callable[[], typing.Awaitable]) -> typing.Any:
+        """
+        Runs `call()` unless an identical call is already running, in that case waits for its result.
+        Cancelling one of the callers doesn't cancel the call for others
+        :param key: hashable call description: method, canonical arguments and block
+        """
+        if not self.deduplicate:
+            return await call()
+        future = self._single_flights.get(key)
+        if future is not None:
+            self.deduplicated_calls += 1
+        else:
+            future = self._single_flights[key] = asyncio.ensure_future(call())
+            future.add_done_callback(functools.partial(self._single_flight_done, key))
+        return await asyncio.shield(future)
+
+    def _single_flight_done(self, key: tuple, future: asyncio.Future) -> None:
+        if self._single_flights.get(key) is future:
+            del self._single_flights[key]
+        if not future.cancelled():
+            future.exception()  # retrieved, even if all callers were cancelled
+
+    def _report(self, callback: typing.Callable, method: str, stats: typing.Any) -> None:
+        try:
+            callback(method, stats)
+        except Exception:
+            self.logger.exception('metrics hook failed')
+
+    def _report_request(self, method: str, started: float, sent: typing.Optional[float], request_bytes: int,
+                        frame: typing.Optional[tuple], error_code: typing.Optional[int] = None,
+                        timed_out: bool = False) -> None:
+        stats = RequestStats(time.perf_counter() - started, request_bytes, error_code=error_code, timed_out=timed_out)
+        if frame is not None:
+            received, stats.response_bytes, stats.decrypt, stats.decode = frame
+            stats.network_wait = received - sent
+        self._report(self._metrics.on_request, method, stats)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        :return: number of sent queries (including pings) waiting for an answer in all sessions
+        """
+        return sum(len(s.tasks) for s in self.sessions)
+
+    @property
+    def timed_out_requests(self) -> int:
+        """
+        :return: number of queries which hit their deadline in all sessions
+        """
+        return sum(s._timed_out_requests for s in self.sessions)
+
+    async def liteserver_query(self, query: bytes, qid: str, timeout: typing.Optional[float] = None,
+                               method: typing.Optional[str] = None) -> dict:
+        """
+        :param query: serialized adnl.message.query
+        :param qid: query id
+        :param timeout: seconds until the deadline of this query, including waiting for free in-flight slot
+            and for background reconnect. Client timeout by default
+        :param method: TL method name to report the query under to metrics hook, not reported if None
+        :return: answer dict
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if not self.auto_reconnect:
+            return await self._query(query, qid, timeout, method)
+        deadline = self.loop.time() + timeout
+        while True:
+            if self.reconnecting:
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._reconnected), max(deadline - self.loop.time(), 0))
+                except asyncio.TimeoutError:
+                    self._timed_out_requests += 1
+                    raise
+            try:
+                return await self._query(query, qid, max(deadline - self.loop.time(), 0), method)
+            except LiteServerError:
+                raise
+            except (LiteClientError, ConnectionError):
+                if not self.reconnecting:
+                    raise
+                # connection was lost while the query was in flight, it goes again to the new session
+
+    async def _query(self, query: bytes, qid: str, timeout: float, method: typing.Optional[str]) -> dict:
+        measured = self._metrics is not None and method is not None
+        if measured:
+            started = time.perf_counter()
+        sent = frame = None
+        deadline = self.loop.time() + timeout
+        limiter = self._in_flight_limiter
+        if limiter is not None:
+            try:
+                await asyncio.wait_for(limiter.acquire(), timeout)
+            except asyncio.TimeoutError:
+                self._timed_out_requests += 1
+                if measured:
+                    self._report_request(method, started, sent, len(query), frame, timed_out=True)
+                raise
+        try:
+            data = self.serialize_packet(query)
+            if measured:
+                sent = time.perf_counter()
+            rtt_start = self.loop.time()
+            resp = await self.send_and_encrypt(data, qid)
+            await asyncio.wait_for(resp, max(deadline - self.loop.time(), 0))
+            if method is not None and method not in self.rtt_excluded_methods:
+                self.update_rtt(self.loop.time() - rtt_start)
+            if measured:
+                frame = self._frame_stats.pop(qid, None)
+        except asyncio.TimeoutError:
+            self._timed_out_requests += 1
+            if measured:
+                self._report_request(method, started, sent, len(query), frame, timed_out=True)
+            raise
+        finally:
+            self.tasks.pop(qid, None)  # answer won't be awaited anymore, a late one will be just dropped by the listener
+            self._frame_stats.pop(qid, None)
+            if limiter is not None:
+                limiter.release()
         result = resp.result()
 
-        if 'code' in result and 'message' in result:
+        error = 'code' in result and 'message' in result
+        if measured:
+            self._report_request(method, started, sent, len(query), frame, result['code'] if error else None)
+
+        if error:
             raise LiteServerError(result["code"], result["message"])
 
-        return resp.result()
+        return result
 
     async def liteserver_request(self, tl_schema_name: str, data: dict) -> dict:
-        schema = self.schemas.get_by_name('liteServer.' + tl_schema_name)
-        self.logger.info(msg=f'requesting {tl_schema_name} with provided data {data}')
-        data, qid = self.serialize_adnl_ls_query(schema, data)
-        return await self.liteserver_query(data, qid)
+        self.logger.info('requesting %s with provided data %s', tl_schema_name, data)  # formatted only if enabled
+        data, qid = self.serialize_ls_request(tl_schema_name, data)
+        return await self._choose_session(tl_schema_name).liteserver_query(data, qid, method=tl_schema_name)
 
     @staticmethod
     def pack_block_id_ext(**kwargs):
@@ -348,8 +963,13 @@ class LiteClient:
             kwargs['file_hash'] = kwargs['file_hash'].hex()
         return {'id': {'workchain': kwargs['wc'], 'shard': kwargs['shard'], 'seqno': kwargs['seqno'], 'root_hash': kwargs['root_hash'], 'file_hash': kwargs['file_hash']}}
 
-    async def get_trusted_last_mc_block(self):
-        last_block = BlockIdExt.from_dict((await self.get_masterchain_info())['last'])
+    async def get_trusted_last_mc_block(self, masterchain_info: typing.Optional[dict] = None):
+        """
+        :param masterchain_info: already received liteServer.masterchainInfo, requested if not provided
+        """
+        if masterchain_info is None:
+            masterchain_info = await self.get_masterchain_info()
+        last_block = BlockIdExt.from_dict(masterchain_info['last'])
         if self.trust_level:
             return last_block
         if not self.last_key_block:
@@ -357,8 +977,8 @@ class LiteClient:
         await self.get_mc_block_proof(known_block=self.last_key_block, target_block=last_block)
         return last_block
 
-    async def update_last_blocks(self):
-        self.last_mc_block = await self.get_trusted_last_mc_block()
+    async def update_last_blocks(self, masterchain_info: typing.Optional[dict] = None):
+        self.last_mc_block = await self.get_trusted_last_mc_block(masterchain_info)
         shards = await self.raw_get_all_shards_info(self.last_mc_block)
         shard_result = {}
         for k, v in shards.items():
@@ -373,10 +993,41 @@ class LiteClient:
             self.last_mc_block = await self.get_trusted_last_mc_block()
         while True:
             try:
-                await self.wait_masterchain_seqno(self.last_mc_block.seqno + 1, timeout_ms=10000, schema_name='getMasterchainInfo', data={})
+                info = await self.wait_masterchain_seqno(self.last_mc_block.seqno + 1, timeout_ms=10000, schema_name='getMasterchainInfo', data={})
             except asyncio.TimeoutError:
                 continue
-            await self.update_last_blocks()
+            await self.update_last_blocks(info)  # the answer is already fresh masterchain info, no need to ask again
+            self._publish_mc_update()
+
+    def _publish_mc_update(self) -> None:
+        waiter = self._mc_updates
+        if waiter is None or waiter.done():  # nobody is subscribed
+            return
+        self._mc_updates = self.loop.create_future()
+        waiter.set_result((self.last_mc_block, self.last_shard_blocks, self._mc_updates))
+
+    async def subscribe_masterchain(self) -> typing.AsyncIterator[typing.Tuple[BlockIdExt, typing.Dict[int, BlockIdExt]]]:
+        """
+        Async iterator over masterchain updates: the current last masterchain block first, then every newer one
+        the block updater learns about. Any number of consumers can subscribe, they all share the client long-poll.
+        Blocks may be skipped if several were produced between two updates, a slow consumer doesn't miss updates.
+
+        >>> async for mc_block, shard_blocks in client.subscribe_masterchain():
+        ...     print(mc_block.seqno, shard_blocks[0].seqno)
+
+        :return: (last masterchain block, {workchain: last shard block})
+        """
+        if self._mc_updates is None or self._mc_updates.done():
+            self._mc_updates = asyncio.get_running_loop().create_future()
+        waiter = self._mc_updates
+        block, shard_blocks = self.last_mc_block, self.last_shard_blocks
+        if block is not None:
+            yield block, shard_blocks
+        while True:
+            new_block, new_shard_blocks, waiter = await asyncio.shield(waiter)
+            if block is None or new_block.seqno > block.seqno:
+                block, shard_blocks = new_block, new_shard_blocks
+                yield block, shard_blocks
 
     async def get_masterchain_info(self):
         return await self.liteserver_request('getMasterchainInfo', {})
@@ -384,16 +1035,8 @@ class LiteClient:
     async def raw_wait_masterchain_seqno(self, seqno: int, timeout_ms: int, suffix: bytes = b''):
         prefix = self.schemas.serialize(schema=self.schemas.get_by_name('liteServer.waitMasterchainSeqno'), data={'seqno': seqno, 'timeout_ms': timeout_ms})
 
-        qid = get_random(32)
-        data = self.schemas.serialize(
-            self.adnl_query_sch,
-            {'query_id': qid,
-             'query': self.schemas.serialize(self.ls_query_sch,
-                                             {'data': prefix + suffix}
-                                             )
-             }
-        )
-        return await self.liteserver_query(data, qid[::-1].hex())
+        data, qid = self.pack_adnl_ls_query(self.pack_ls_query(prefix + suffix))
+        return await self.liteserver_query(data, qid, method='waitMasterchainSeqno')
 
     async def wait_masterchain_seqno(self, seqno: int, timeout_ms: int, schema_name: str, data: dict = None):
         if data is None:
@@ -420,6 +1063,12 @@ class LiteClient:
         return await self.liteserver_request('getState', block)
 
     async def raw_get_block_header(self, block: BlockIdExt) -> Block:
+        if self.block_cache is not None:
+            # full block has the header too
+            cached = self.block_cache.get(('block', block)) if ('block', block) in self.block_cache else \
+                self.block_cache.get(('header', block))
+            if cached is not None:
+                return cached
         result = await self.liteserver_request('getBlockHeader', {'id': block.to_dict()} | {'mode': 0})
         h_proof = Cell.one_from_boc(result['header_proof'])
         block_id = BlockIdExt.from_dict(result['id'])
@@ -430,7 +1079,11 @@ class LiteClient:
                 await self.get_shard_block_proof(block_id)
             else:
                 await self.get_mc_block_proof(known_block=self.last_key_block, target_block=block_id)
-        return Block.deserialize(h_proof[0].begin_parse())
+        header = Block.deserialize(h_proof[0].begin_parse())
+        self._index_mc_block(block, header.info)
+        if self.block_cache is not None:
+            self.block_cache.put(('header', block), header, len(result['header_proof']))
+        return header
 
     async def get_block_header(self, wc: int, shard: typing.Optional[int], seqno: int,
                                root_hash: typing.Union[str, bytes],
@@ -466,6 +1119,12 @@ class LiteClient:
         if utime is not None:
             mode = 4
 
+        cache_key = ('lookup', wc, shard, seqno)  # only seqno lookups, lt and utime ones map ranges to blocks
+        if mode == 1 and self.block_cache is not None:
+            cached = self.block_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         data = {'mode': mode, 'id': {'workchain': wc, 'shard': shard, 'seqno': seqno}, 'lt': lt, 'utime': utime}
 
         result = await self.liteserver_request('lookupBlock', data)
@@ -479,18 +1138,89 @@ class LiteClient:
                 else:
                     await self.get_mc_block_proof(known_block=self.last_key_block, target_block=block_id)
 
-        return BlockIdExt.from_dict(result['id']), Block.deserialize(h_proof[0].begin_parse())
+        header = Block.deserialize(h_proof[0].begin_parse())
+        self._index_mc_block(block_id, header.info)
+        if self.block_cache is not None:
+            size = len(result['header_proof'])
+            self.block_cache.put(('header', block_id), header, size)
+            if mode == 1:
+                self.block_cache.put(cache_key, (block_id, header), size)
+        return block_id, header
+
+    async def lookup_mc_block(self, seqno: typing.Optional[int] = None, lt: typing.Optional[int] = None,
+                              utime: typing.Optional[int] = None) -> BlockIdExt:
+        """
+        Masterchain block by seqno, lt or unix time (exactly one of them), answered from `mc_index`
+        when it has the blocks around, by `lookup_block` otherwise
+        :param lt: the block which lt range contains it is returned
+        :param utime: the first block generated not earlier than it is returned, as liteservers do
+        """
+        if (seqno, lt, utime).count(None) != 2:
+            raise LiteClientError('exactly one of seqno, lt and utime must be provided')
+        if seqno is not None:
+            block = self.mc_index.get(seqno)
+        elif lt is not None:
+            block = self.mc_index.find_by_lt(lt)
+        else:
+            block = self.mc_index.find_by_utime(utime)
+        if block is None:
+            block, _ = await self.lookup_block(-1, -2**63, -1 if seqno is None else seqno, lt, utime)
+        return block
+
+    async def backfill_mc_index(self, from_seqno: int, to_seqno: typing.Optional[int] = None,
+                                concurrency: int = 16) -> int:
+        """
+        Fetches headers of masterchain blocks missing in `mc_index`, so later lookups in the range are local
+        :param from_seqno: first block seqno
+        :param to_seqno: seqno after the last block, next after the last known masterchain block if not provided
+        :param concurrency: maximum number of header requests at once
+        :return: number of added blocks
+        """
+        if to_seqno is None:
+            to_seqno = self.last_mc_block.seqno + 1
+        missing = iter(self.mc_index.missing(from_seqno, to_seqno))
+
+        async def worker():
+            for seqno in missing:
+                await self.lookup_block(-1, -2**63, seqno)  # which adds the block to the index
+
+        before = len(self.mc_index)
+        await run_workers(worker, concurrency)
+        return len(self.mc_index) - before
+
+    def _index_mc_block(self, block: BlockIdExt, info: typing.Optional[BlockInfo]) -> None:
+        """
+        Adds a masterchain block to `mc_index` and remembers its key block, so `get_config` doesn't ask for it
+        :param info: info from the checked block header
+        """
+        if block.workchain == -1 and info is not None:
+            self.mc_index.add(block, info.gen_utime, info.start_lt, info.end_lt)
+            self.configs.set_key_block(block.seqno, block.seqno if info.key_block else info.prev_key_block_seqno)
 
     async def raw_get_block(self, block: BlockIdExt) -> Block:
-        result = await self.liteserver_request('getBlock', {'id': block.to_dict()})
-        block_id = BlockIdExt.from_dict(result['id'])
-        assert block_id == block
-        result_block = Cell.one_from_boc(result['data'])
-        if self.trust_level <= 1:
-            check_block_header_proof(result_block, block_hash=block.root_hash)
-            if not self.trust_level:
-                await self.prove_block(block_id)
-        return Block.deserialize(result_block.begin_parse())
+        if self.block_cache is not None:
+            cached = self.block_cache.get(('block', block))
+            if cached is not None:
+                return cached
+        data = self.disk_store.get('blocks', block.root_hash) if self.disk_store is not None else None
+        if data is not None:
+            # the file matches the root hash, but the store may be filled by a client which trusts liteservers
+            result_block = await self.run_cpu(parse_block, data, block.root_hash, True, method='getBlock')
+        else:
+            result = await self.liteserver_request('getBlock', {'id': block.to_dict()})
+            block_id = BlockIdExt.from_dict(result['id'])
+            assert block_id == block
+            data = result['data']
+            result_block = await self.run_cpu(parse_block, data, block.root_hash, self.trust_level <= 1,
+                                              method='getBlock')
+            if self.disk_store is not None:
+                self.disk_store.put('blocks', block.root_hash, data)
+        if not self.trust_level:
+            await self.prove_block(block)
+        self._index_mc_block(block, result_block.info)
+        if self.block_cache is not None:
+            self.block_cache.put(('block', block), result_block, len(data))
+        return result_block
 
     async def get_block(self, wc: int, shard: typing.Optional[int],
                         seqno: int, root_hash: typing.Union[str, bytes],
@@ -501,33 +1231,81 @@ class LiteClient:
     async def raw_get_account_state(self, address: typing.Union[str, Address],
                                     block: typing.Optional[BlockIdExt] = None
                                     ) -> typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]:
+        if isinstance(address, str):
+            address = Address(address)
+        return await self._single_flight(('getAccountState', address.wc, address.hash_part, block or self.last_mc_block),
+                                         functools.partial(self._raw_get_account_state, address, block))
+
+    async def _raw_get_account_state(self, address: Address, block: typing.Optional[BlockIdExt] = None,
+                                     proofs: typing.Optional[list] = None
+                                     ) -> typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]:
+        """
+        :param proofs: if provided, (block proof BoC, shard proof BoC) of the answer is appended to it,
+            `run_get_methods_local` takes the shard state and the config from them
+        """
         trusted = False
         if block is None or block == self.last_mc_block:
             block = self.last_mc_block
             trusted = True
-        if isinstance(address, str):
-            address = Address(address)
         account = address.to_tl_account_id()
 
         data = {'id': block.to_dict(), 'account': account}
         result = await self.liteserver_request('getAccountState', data)
-        shrd_blk = BlockIdExt.from_dict(result['shardblk'])
         if not result['state']:
             return None, None  # account_none$0 = Account;
 
-        account_state_root = Cell.one_from_boc(result['state'])
+        if not trusted and not self.trust_level:
+            await self.get_mc_block_proof(known_block=self.last_key_block, target_block=block)
+        if proofs is not None:
+            proofs.append((result['proof'], result['shard_proof']))
 
-        if self.trust_level <= 1:
-            check_shard_proof(shard_proof=result['shard_proof'], blk=block, shrd_blk=shrd_blk)
-            if not trusted and not self.trust_level:
-                await self.get_mc_block_proof(known_block=self.last_key_block, target_block=block)
-        if address.hash_part in self._block_states:
-            self._block_states[address.hash_part] = (result['proof'], result['shard_proof'])
-        shard_account = check_account_proof(proof=result['proof'], shrd_blk=shrd_blk, address=address, account_state_root=account_state_root, return_account_descr=True)
-        account = Account.deserialize(account_state_root.begin_parse())
-        full_shard_account_cell = begin_cell().store_bytes(shard_account.cell.begin_parse().load_bytes(40)).store_ref(account_state_root).end_cell()
+        return await self.run_cpu(parse_account_state, result, block, address, self.trust_level <= 1,
+                                   method='getAccountState')
+
+    async def get_account_states(self, addresses: typing.Sequence[typing.Union[str, Address]],
+                                 block: typing.Optional[BlockIdExt] = None, concurrency: int = 64
+                                 ) -> typing.List[typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]]:
+        """
+        Bulk version of `raw_get_account_state`: queries are sent concurrently
+        and each distinct shard proof is checked once instead of once per account
+        :param addresses: accounts addresses
+        :param block: masterchain block, last one if not provided
+        :param concurrency: maximum number of queries at once
+        :return: (account, shard account) for each address in the input order, (None, None) if account doesn't exist
+        """
+        trusted = False
+        if block is None or block == self.last_mc_block:
+            block = self.last_mc_block
+            trusted = True
+        addresses = [Address(address) if isinstance(address, str) else address for address in addresses]
+
+        results = [None] * len(addresses)
+        indexes = iter(range(len(addresses)))  # shared by the workers
+
+        async def worker():
+            for i in indexes:
+                results[i] = await self.liteserver_request('getAccountState', {'id': block.to_dict(),
+                                                                               'account': addresses[i].to_tl_account_id()})
+
+        await run_workers(worker, min(concurrency, len(addresses)))
+
+        if not trusted and not self.trust_level:
+            await self.get_mc_block_proof(known_block=self.last_key_block, target_block=block)
 
-        return account, ShardAccount.deserialize(full_shard_account_cell.begin_parse())
+        if self.trust_level <= 1:
+            shard_proofs = {}
+            for result in results:
+                if result['state']:
+                    shard_proofs.setdefault((result['shard_proof'], BlockIdExt.from_dict(result['shardblk'])), result)
+            for result in shard_proofs.values():
+                await self.run_cpu(check_account_shard_proof, result, block, method='getAccountState')
+
+        batch = self.account_states_batch
+        parsed = await asyncio.gather(*[
+            self.run_cpu(parse_account_states, results[i:i + batch], block, addresses[i:i + batch], method='getAccountState')
+            for i in range(0, len(results), batch)
+        ])
+        return [state for states in parsed for state in states]
 
     async def get_account_state(self, address: typing.Union[str, Address]) -> SimpleAccount:
         """
@@ -548,14 +1326,46 @@ class LiteClient:
                                     method: typing.Union[int, str], stack: list,
                                     block: BlockIdExt = None
                                     ) -> list:
+        return (await self.run_get_methods_remote(address, [(method, stack)], block))[0]
+
+    async def run_get_methods_remote(self, address: typing.Union[Address, str],
+                                     methods: typing.List[typing.Tuple[typing.Union[int, str], list]],
+                                     block: BlockIdExt = None
+                                     ) -> typing.List[list]:
+        """
+        Runs several get methods of one account at one block on the liteserver: requests are sent concurrently
+        and each distinct shard proof is checked once
+        :param methods: list of (method, stack)
+        :param block: masterchain block, last one if not provided
+        :return: result stacks in the order of `methods`
+        """
         if self.trust_level <= 1:
             self.logger.warning('remote get method result is not provable, use run_get_method_local for local tvm execution')
-        mode = 7  # 111
         if block is None:
             block = self.last_mc_block
 
         if isinstance(address, str):
             address = Address(address)
+
+        queries = [self._pack_run_smc_method(address, method, stack, block) for method, stack in methods]
+        results = await asyncio.gather(*[self._single_flight(
+            ('runSmcMethod', address.wc, address.hash_part, data['method_id'], data['params'], block),
+            functools.partial(self.liteserver_request, 'runSmcMethod', data)
+        ) for data in queries])  # answers are only read here, so they can be shared
+
+        for (method, _), result in zip(methods, results):
+            if result['exit_code'] != 0:
+                raise RunGetMethodError(address=address, method=method, exit_code=result['exit_code'])
+        if self.trust_level <= 1:
+            shard_proofs = {(result['shard_proof'], BlockIdExt.from_dict(result['shardblk'])) for result in results}
+            for shard_proof, shrd_blk in shard_proofs:
+                check_shard_proof(shard_proof=shard_proof, blk=block, shrd_blk=shrd_blk)
+
+        return [VmStack.deserialize(Slice.one_from_boc(result['result'])) for result in results]
+
+    @staticmethod
+    def _pack_run_smc_method(address: Address, method: typing.Union[int, str], stack: list, block: BlockIdExt) -> dict:
+        mode = 7  # 111
         account = address.to_tl_account_id()
 
         if isinstance(method, str):
@@ -570,25 +1380,7 @@ class LiteClient:
         else:
             raise LiteClientError('provided stack in unknown form')
 
-        data = {'mode': mode, 'id': block.to_dict(), 'account': account, 'method_id': method_id, 'params': stack.to_boc()}
-        result = await self.liteserver_request('runSmcMethod', data)
-
-        if result['exit_code'] != 0:
-            raise RunGetMethodError(address=address, method=method, exit_code=result['exit_code'])
-        if self.trust_level <= 1:
-            shrd_blk = BlockIdExt.from_dict(result['shardblk'])
-            check_shard_proof(shard_proof=result['shard_proof'], blk=block, shrd_blk=shrd_blk)
-
-        return VmStack.deserialize(Slice.one_from_boc(result['result']))
-
-    async def _get_config_cell(self, blk: BlockIdExt):
-        res = await self.liteserver_request('getConfigAll', {'mode': 0, 'id': blk.to_dict()})
-        config_proof = Cell.one_from_boc(res['config_proof'])
-        shard = ShardStateUnsplit.deserialize(config_proof[0].begin_parse())
-        config = shard.custom.config.config
-        hm = HashMap(32, value_serializer=lambda src, dest: dest.store_ref(src.to_cell()))
-        hm.map = config
-        return hm.serialize()
+        return {'mode': mode, 'id': block.to_dict(), 'account': account, 'method_id': method_id, 'params': stack.to_boc()}
 
     @staticmethod
     def _find_libs(cell: Cell, libs: list):
@@ -601,70 +1393,122 @@ class LiteClient:
                 res = True
         return res
 
+    async def run_get_methods(self, address: typing.Union[Address, str],
+                              methods: typing.List[typing.Tuple[typing.Union[int, str], list]],
+                              block: BlockIdExt = None
+                              ) -> typing.List[list]:
+        """
+        Runs several get methods of one account at one block, requests are sent concurrently
+        :param methods: list of (method, stack)
+        :param block: masterchain block, last one at the moment of the call if not provided
+        :return: result stacks in the order of `methods`
+        """
+        return await self.run_get_methods_remote(address, methods, block)  # as run_get_method, will be local in future
+
     async def run_get_method_local(self, address: typing.Union[Address, str],
                                    method: typing.Union[int, str], stack: list,
                                    block: BlockIdExt = None, gas_limit: int = 300000) -> list:
+        return (await self.run_get_methods_local(address, [(method, stack)], block, gas_limit))[0]
+
+    async def run_get_methods_local(self, address: typing.Union[Address, str],
+                                    methods: typing.List[typing.Tuple[typing.Union[int, str], list]],
+                                    block: BlockIdExt = None, gas_limit: int = 300000
+                                    ) -> typing.List[list]:
+        """
+        Runs several get methods of one account locally: the account state, its proofs and the config
+        are fetched and checked once and all methods are run against the same snapshot
+        :param methods: list of (method, stack)
+        :param block: masterchain block, last one if not provided
+        :param gas_limit: gas limit of each method
+        :return: result stacks in the order of `methods`
+        """
         if block is None:
             block = self.last_mc_block
-        try:
-            from pytvm.tvm_emulator import TvmEmulator
-        except ImportError:
+        if importlib.util.find_spec('pytvm') is None:
             raise ImportError('pytvm is required to run get method locally. Use `pip install "pytoniq[tvm]"` or `pip install pytvm`')
-        if isinstance(address, Address):
-            address = address.to_str()
-        hash_part = Address(address).hash_part
-        self._block_states[hash_part] = None
-        try:
-            _, account = await self.raw_get_account_state(address, block)
-        finally:
-            shard_state_boc, mc_state_boc = self._block_states.pop(hash_part)
+        if isinstance(address, str):
+            address = Address(address)
+        methods = [(method, VmStack.serialize(stack)) for method, stack in methods]
+        key = ('runGetMethodsLocal', address.wc, address.hash_part, tuple((method, stack.hash) for method, stack in methods),
+               block, gas_limit)
+        results = await self._single_flight(key, functools.partial(self._run_get_methods_local, address.to_str(),
+                                                                   methods, block, gas_limit))
+        return [VmStack.deserialize(Slice.one_from_boc(result['stack'])) for result in results]
+
+    async def _run_get_methods_local(self, address: str, methods: typing.List[typing.Tuple[typing.Union[int, str], Cell]],
+                                     block: BlockIdExt, gas_limit: int) -> typing.List[dict]:
+        """
+        :param methods: list of (method, serialized stack)
+        :return: raw emulator results, each caller deserializes result stacks itself
+        """
+        proofs = []  # of this call only, concurrent calls for the same account get their own
+        _, account = await self._raw_get_account_state(Address(address), block, proofs)
+        if account is None or account.account.storage.state.type_ != 'account_active':
+            raise RunGetMethodError(address=address, method=methods[0][0] if methods else None, exit_code=-256)
+        shard_state_boc, mc_state_boc = proofs[0]
         state = account.account.storage.state
-        if state.type_ != 'account_active':
-            raise RunGetMethodError(address=address, method=method, exit_code=-256)
-        emulator = TvmEmulator(
-            code=account.account.storage.state.state_init.code,
-            data=account.account.storage.state.state_init.data
-        )
-        emulator.set_gas_limit(gas_limit)
-        # set c7
+        code, data = state.state_init.code, state.state_init.data
 
         # get config
         config = Cell.from_boc(mc_state_boc)[1][0][3][1]
         assert config.type_ == 1  # pruned branch
         config_hash = config.get_hash(0)
-        if config_hash not in self.configs:
-            self.configs[config_hash] = await self._get_config_cell(block)
-        sstate = ShardStateUnsplit.deserialize(Cell.from_boc(shard_state_boc)[1][0].begin_parse())
-        emulator.set_c7(
-            address=address,
-            unixtime=sstate.gen_utime,
-            balance=account.account.storage.balance.grams,
-            rand_seed_hex=get_random(32).hex(),
-            config=self.configs[config_hash]
-        )
+        config = self.configs.get(config_hash)
+        if config is None:
+            config = await self.get_config(block)
+            self.configs.put(config_hash, config)  # so next time it's found by the hash from the state proof
 
-        # set libs
-        libs = []
-        self._find_libs(account.account.storage.state.state_init.code, libs)
-        libs = [i for i in libs if i.hex() not in self.libs]
-        if libs:
-            self.libs |= await self.get_libraries(libs)
+        sstate = ShardStateUnsplit.deserialize(Cell.from_boc(shard_state_boc)[1][0].begin_parse())
+        balance = account.account.storage.balance.grams
+        # todo set prev blocks info
 
-        if libs and self.libs:
-            def value_serializer(src: Cell, dest: Builder):
-                if src is not None:
-                    dest.store_uint(0, 2).store_ref(src).store_maybe_ref(None)
+        libraries = await self._get_code_libraries(code)
+        # an emulator keeps the libraries it was created with, a changed set of them needs another one
+        key = (code.hash, data.hash, config_hash, libraries.hash if libraries is not None else b'')
+        if self.get_method_executor is None:
+            emulator = self.emulators.get(key)
+            if emulator is None:
+                emulator = create_emulator(code, data, libraries)
+                self.emulators.put(key, emulator)
+            results = [run_emulator(emulator, address, sstate.gen_utime, balance, config.cell_b64, method,
+                                    stack, gas_limit, get_random(32)) for method, stack in methods]
+        else:
+            libraries_boc = libraries.to_boc() if libraries is not None else None
+            code_boc, data_boc = code.to_boc(), data.to_boc()
+            loop = asyncio.get_running_loop()
+            # the config is sent with the first calls only, a worker which hasn't got it yet asks for it
+            config_sent = config_hash in self._executor_configs
+
+            async def run(method, stack):
+                args = (key, code_boc, data_boc, libraries_boc, address, sstate.gen_utime, balance)
+                if config_sent:
+                    try:
+                        return await loop.run_in_executor(self.get_method_executor, run_get_method_boc, *args, None,
+                                                          method, stack.to_boc(), gas_limit, get_random(32))
+                    except ConfigNotLoaded:
+                        pass
+                return await loop.run_in_executor(self.get_method_executor, run_get_method_boc, *args,
+                                                  config.cell_b64, method, stack.to_boc(), gas_limit, get_random(32))
 
-            hm = HashMap(256, value_serializer=value_serializer)
-            hm.map = {int(k, 16): v for k, v in self.libs.items() if v is not None}
-            emulator.set_libraries(hm.serialize())
+            results = await asyncio.gather(*[run(method, stack) for method, stack in methods])
+            self._executor_configs.add(config_hash)
 
-        # todo set prev blocks info
+        for (method, _), result in zip(methods, results):
+            if result['vm_exit_code'] != 0:
+                raise RunGetMethodError(address=address, method=method, exit_code=result['vm_exit_code'])
+        return results
 
-        result = emulator.run_get_method(method, stack)
-        if result['vm_exit_code'] != 0:
-            raise RunGetMethodError(address=address, method=method, exit_code=result['vm_exit_code'])
-        return result['stack']
+    async def _get_code_libraries(self, code: Cell) -> typing.Optional[Cell]:
+        """
+        :return: serialized dictionary of the libraries the code uses, None if it doesn't use any
+        """
+        libs = []
+        self._find_libs(code, libs)
+        if not libs:
+            return None
+        libs = [lib.hex() for lib in libs]
+        await self.prefetch_libraries(libs)
+        return self.libs.get_dict(libs)
 
     async def raw_get_shard_info(self, block: typing.Optional[BlockIdExt] = None,
                                  wc: int = 0, shard: int = -9223372036854775808,
@@ -705,13 +1549,13 @@ class LiteClient:
         result = await self.liteserver_request('getAllShardsInfo', data)
 
         shard_hashes_cell = Cell.one_from_boc(result['data'])
+        proof_cells = Cell.from_boc(result['proof'])
 
         if self.trust_level <= 1:
 
             if not trusted and not self.trust_level:
                 await self.get_mc_block_proof(known_block=self.last_key_block, target_block=block)
 
-            proof_cells = Cell.from_boc(result['proof'])
             if len(proof_cells) == 2:
                 state_hash = check_block_header_proof(proof_cells[0][0], block_hash=block.root_hash, store_state_hash=True)
                 check_proof(proof_cells[1], state_hash)
@@ -724,6 +1568,8 @@ class LiteClient:
             else:
                 check_block_header_proof(proof_cells[0][0], block_hash=block.root_hash, store_state_hash=False)
                 assert shard_hashes_cell[0].get_hash(0) == proof_cells[0][0][3][3][0].get_hash(0)  # masterchain_state_extra -> shard_hashes
+        # the block updater gets this for every new masterchain block, header info comes with the proof
+        self._index_mc_block(block, BlockInfo.deserialize(proof_cells[0][0][0].begin_parse()))
 
         return deserialize_shard_hashes(shard_hashes_cell.begin_parse())
 
@@ -755,6 +1601,12 @@ class LiteClient:
         if isinstance(address, str):
             address = Address(address)
 
+        cache_key = ('transaction', block, address.wc, address.hash_part, lt)
+        if self.block_cache is not None:
+            cached = self.block_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         data = {'id': block.to_dict(), 'account': address.to_tl_account_id(), 'lt': lt}
         result = await self.liteserver_request('getOneTransaction', data)
         if not result['transaction']:
@@ -779,7 +1631,10 @@ class LiteClient:
             if tr.get_hash(0) != transaction_root.get_hash(0):
                 raise LiteClientError(f'Proof check failed! Transaction hashes mismatch')
 
-        return Transaction.deserialize(transaction_root.begin_parse())
+        transaction = Transaction.deserialize(transaction_root.begin_parse())
+        if self.block_cache is not None:
+            self.block_cache.put(cache_key, transaction, len(result['transaction']))
+        return transaction
 
     async def raw_get_transactions(self, address: typing.Union[Address, str], count: int,
                                    from_lt: int = None, from_hash: typing.Optional[bytes] = None
@@ -793,6 +1648,16 @@ class LiteClient:
             state, shard_account = await self.raw_get_account_state(address)
             from_lt, from_hash = shard_account.last_trans_lt, shard_account.last_trans_hash
 
+        stored_result, stored_block_ids = [], []
+        if self.disk_store is not None and self.trust_level:  # blocks of stored transactions are not proven
+            stored_result, stored_block_ids = self._get_stored_transactions(count, from_hash)
+            if stored_result:
+                last = stored_result[-1]
+                if len(stored_result) == count or not last.prev_trans_lt:
+                    return stored_result, stored_block_ids
+                count -= len(stored_result)
+                from_lt, from_hash = last.prev_trans_lt, last.prev_trans_hash
+
         data = {'count': count, 'account': address.to_tl_account_id(), 'lt': from_lt, 'hash': from_hash.hex()}
 
         result = await self.liteserver_request('getTransactions', data)
@@ -811,12 +1676,44 @@ class LiteClient:
                 if current_hash != prev_tr_hash:
                     raise LiteClientError(f'Transaction hashes mismatch. Expected {prev_tr_hash}, got {current_hash}')
             transaction = Transaction.deserialize(tr.begin_parse())
+            if self.disk_store is not None:
+                self.disk_store.put('transactions', tr.get_hash(0), self._pack_block_id(block_ids[-1]) + tr.to_boc())
             prev_tr_hash = transaction.prev_trans_hash
             tr_result.append(transaction)
             i += 1
 
         # assert len(tr_result) == count, f'expected {count} transactions, got {len(tr_result)}'
-        return tr_result, block_ids
+        return stored_result + tr_result, stored_block_ids + block_ids
+
+    _block_id_struct = struct.Struct('<iqi32s32s')
+
+    @classmethod
+    def _pack_block_id(cls, block: BlockIdExt) -> bytes:
+        return cls._block_id_struct.pack(block.workchain, block.shard, block.seqno, block.root_hash, block.file_hash)
+
+    def _get_stored_transactions(self, count: int, from_hash: bytes
+                                 ) -> typing.Tuple[typing.List[Transaction], typing.List[BlockIdExt]]:
+        """
+        Follows the transactions chain in the disk store while it has the transactions
+        :return: up to `count` transactions starting from `from_hash` and their blocks
+        """
+        transactions, block_ids = [], []
+        tr_hash = from_hash
+        while len(transactions) < count:
+            record = self.disk_store.get('transactions', tr_hash)
+            if record is None:
+                break
+            size = self._block_id_struct.size
+            tr = Cell.one_from_boc(record[size:])
+            if tr.get_hash(0) != tr_hash:
+                break
+            transaction = Transaction.deserialize(tr.begin_parse())
+            transactions.append(transaction)
+            block_ids.append(BlockIdExt(*self._block_id_struct.unpack_from(record)))
+            if not transaction.prev_trans_lt:  # the first account transaction
+                break
+            tr_hash = transaction.prev_trans_hash
+        return transactions, block_ids
 
     async def get_transactions(self, address: typing.Union[Address, str], count: int,
                                from_lt: int = None, from_hash: typing.Optional[bytes] = None,
@@ -852,6 +1749,44 @@ class LiteClient:
         # assert len(result) == count, f'expected {count} transactions, got {len(result)}'
         return result
 
+    async def iter_transactions(self, address: typing.Union[Address, str],
+                                from_lt: int = None, from_hash: typing.Optional[bytes] = None,
+                                to_lt: int = 0, page_size: int = 16
+                                ) -> typing.AsyncIterator[Transaction]:
+        """
+        Yields account transactions one by one, from the newest (or `from_lt`) to the oldest (or the last with lt > `to_lt`).
+        Next page is requested while the caller handles the current one, so no more than two pages are kept in memory
+        >>> async for transaction in client.iter_transactions(address):
+        ...     print(transaction.lt)
+        :param address:
+        :param from_lt: lt of the first transaction, last account transaction if not provided
+        :param from_hash: hash of the first transaction
+        :param to_lt: stop at the transaction with this lt, it's not yielded
+        :param page_size: transactions requested at once, up to 16
+        """
+        async for transaction in iter_transactions(self.raw_get_account_state, self.raw_get_transactions, address,
+                                                   from_lt, from_hash, to_lt, page_size):
+            yield transaction
+
+    async def iter_accounts_transactions(self, accounts: typing.Iterable[typing.Union[Address, str, tuple]],
+                                         concurrency: int = 16, page_size: int = 16
+                                         ) -> typing.AsyncIterator[typing.Tuple[Address, typing.List[Transaction]]]:
+        """
+        Walks transaction chains of many accounts at once and yields `(address, transactions page)` as pages arrive.
+        Pages of different accounts are interleaved, pages of one account come in order, from the newest to the oldest.
+        At most `concurrency` accounts are walked (and `concurrency` requests are in flight) at a time
+        >>> async for address, transactions in client.iter_accounts_transactions([addr1, (addr2, None, None, lt)]):
+        ...     print(address, len(transactions))
+        :param accounts: addresses, or `(address, from_lt, from_hash, to_lt)` tuples with the same meaning
+            as in `iter_transactions`, `from_lt` and `from_hash` may be None to start from the last transaction.
+            Iterable is consumed lazily
+        :param concurrency: number of accounts walked concurrently
+        :param page_size: transactions requested at once, up to 16
+        """
+        async for item in iter_accounts_transactions(self.raw_get_account_state, self.raw_get_transactions, accounts,
+                                                     concurrency, page_size):
+            yield item
+
     async def raw_get_block_transactions(self, block: BlockIdExt, count: int = 1024) -> typing.List[dict]:
 
         def parse_transactions(result: dict):
@@ -875,6 +1810,11 @@ class LiteClient:
 
             return transactions_ids
 
+        if self.block_cache is not None:
+            cached = self.block_cache.get(('block_transactions', block))
+            if cached is not None:
+                return [dict(tr) for tr in cached]  # the list and its dicts are not shared with the callers
+
         mode = 39  # 100111
         data = {'id': block.to_dict(), 'mode': mode, 'count': count, 'want_proof': b''}
         result = await self.liteserver_request('listBlockTransactions', data)
@@ -890,48 +1830,41 @@ class LiteClient:
             result = await self.liteserver_request('listBlockTransactions', data)
             transactions += parse_transactions(result)
 
+        if self.block_cache is not None:
+            # account, lt and hash of each transaction
+            self.block_cache.put(('block_transactions', block), [dict(tr) for tr in transactions], 128 * len(transactions))
         return transactions
 
     async def raw_get_block_transactions_ext(self, block: BlockIdExt, count: int = 1024) -> typing.List[Transaction]:
 
-        def parse_transactions(result: dict):
-            if not result['transactions']:
-                return []
-
-            transactions_cells = Cell.from_boc(result['transactions'])
-
-            if self.trust_level <= 1:
-                proof = Cell.one_from_boc(result['proof'])
-                check_block_header_proof(proof[0], block.root_hash)
-                acc_block = Block.deserialize(proof[0].begin_parse()).extra.account_blocks[0]
-            tr_result = []
-
-            for tr_root in transactions_cells:
-                transaction = Transaction.deserialize(tr_root.begin_parse())
-                if self.trust_level <= 1:
-                    prunned_tr_cell = acc_block.get(int(transaction.account_addr_hex, 16)).transactions[0].get(
-                        transaction.lt)
-                    assert prunned_tr_cell.get_hash(0) == tr_root.get_hash(0)
-                # transaction.account = Address((block.workchain, bytes.fromhex(transaction.account_addr)))
-                tr_result.append(transaction)
+        async def parse_transactions(result: dict):
+            return await self.run_cpu(parse_block_transactions_ext, result, block.root_hash, self.trust_level <= 1,
+                                       method='listBlockTransactionsExt')
 
-            return tr_result
+        if self.block_cache is not None:
+            cached = self.block_cache.get(('block_transactions_ext', block))
+            if cached is not None:
+                return list(cached)
 
         mode = 39  # 100111
         data = {'id': block.to_dict(), 'mode': mode, 'count': count, 'want_proof': b''}
         result = await self.liteserver_request('listBlockTransactionsExt', data)
+        size = len(result['transactions'])
 
         if not self.trust_level and block != self.last_mc_block:
             await self.prove_block(block)
 
-        transactions = parse_transactions(result)
+        transactions = await parse_transactions(result)
 
         while result['incomplete']:
             mode = 167  # 10100111
             data |= {'mode': mode, 'after': {'account': transactions[-1].account_addr_hex, 'lt': transactions[-1].lt}}
             result = await self.liteserver_request('listBlockTransactionsExt', data)
-            transactions += parse_transactions(result)
+            size += len(result['transactions'])
+            transactions += await parse_transactions(result)
 
+        if self.block_cache is not None:
+            self.block_cache.put(('block_transactions_ext', block), list(transactions), size)
         return transactions
 
     async def raw_get_mc_block_proof(self, known_block: BlockIdExt, target_block: typing.Optional[BlockIdExt] = None,
@@ -958,68 +1891,24 @@ class LiteClient:
         best_key = None
         best_key_ts = 0
         for step in result['steps']:
+            to_block, from_seqno, from_utime, to_seqno, to_utime = await self.run_cpu(
+                check_block_link, step, last_trusted, method='getBlockProof')
             if 'config_proof' in step:  # blockLinkForward
-                assert last_trusted == BlockIdExt.from_dict(step['from'])
-                to_block = BlockIdExt.from_dict(step['to'])
-
-                dest_proof = Cell.one_from_boc(step['dest_proof'])
-                config_proof = Cell.one_from_boc(step['config_proof'])
-                check_block_header_proof(dest_proof[0], to_block.root_hash)
-
-                block = Block.deserialize(config_proof[0].begin_parse())
-                dest_block = Block.deserialize(dest_proof[0].begin_parse())
-                if self.last_key_block is None or block.info.seqno > self.last_key_block.seqno:
+                if self.last_key_block is None or from_seqno > self.last_key_block.seqno:
                     self.last_key_block = last_trusted
                 if step['to_key_block']:
-                    if self.last_key_block is None or dest_block.info.seqno > self.last_key_block.seqno:
+                    if self.last_key_block is None or to_seqno > self.last_key_block.seqno:
                         self.last_key_block = to_block
                 if return_best_key_block:
-                    best_key, best_key_ts = choose_key_block(best_key, best_key_ts, last_trusted, block.info.gen_utime)
+                    best_key, best_key_ts = choose_key_block(best_key, best_key_ts, last_trusted, from_utime)
                     if step['to_key_block']:
-                        best_key, best_key_ts = choose_key_block(best_key, best_key_ts, to_block, dest_block.info.gen_utime)
-
-                param_34 = ConfigParam34.deserialize(block.extra.custom.config.config[34])
-                param_28 = ConfigParam28.deserialize(block.extra.custom.config.config[28])
-
-                nodes = compute_validator_set(param_28, to_block, param_34.cur_validators)
-                check_block_signatures(nodes=nodes, signatures=step['signatures']['signatures'], blk=to_block)
-                last_trusted = to_block
-
-            else:  # blockLinkBack
-                assert last_trusted == BlockIdExt.from_dict(step['from'])
-                to_block = BlockIdExt.from_dict(step['to'])
-                if step['to_key_block']:
-                    dest_proof = Cell.one_from_boc(step['dest_proof'])
-                    state_proof = Cell.one_from_boc(step['state_proof'])
-                    proof = Cell.one_from_boc(step['proof'])
-                    block = Block.deserialize(proof[0].begin_parse())
-                    if return_best_key_block:
-                        best_key, best_key_ts = choose_key_block(best_key, best_key_ts, to_block, block.info.gen_utime)
-                    state_hash = check_block_header_proof(proof[0], last_trusted.root_hash, True)
-                    assert state_hash == state_proof[0].get_hash(0)
-
-                    state = ShardStateUnsplit.deserialize(state_proof[0].begin_parse())
-                    last_key = state.custom.last_key_block
-                    check_block_header_proof(dest_proof[0], last_key.root_hash)
-                    assert to_block.root_hash == last_key.root_hash
-                    if self.last_key_block is None or to_block.seqno > self.last_key_block.seqno:
-                        self.last_key_block = to_block
-                    last_trusted = to_block
-                else:
-                    dest_proof = Cell.one_from_boc(step['dest_proof'])  # ?
-                    state_proof = Cell.one_from_boc(step['state_proof'])
-                    proof = Cell.one_from_boc(step['proof'])
-
-                    state_hash = check_block_header_proof(proof[0], last_trusted.root_hash, True)
-                    assert state_hash == state_proof[0].get_hash(0)
-                    state = ShardStateUnsplit.deserialize(state_proof[0].begin_parse())
-                    blk = state.custom.prev_blocks[0].get(to_block.seqno)
-                    if not blk:
-                        raise LiteClientError(f'cannot find {to_block} in OldMcBlocksInfo')
-                    blk: KeyExtBlkRef
-
-                    assert blk.blk_ref.root_hash == to_block.root_hash
-                    last_trusted = to_block
+                        best_key, best_key_ts = choose_key_block(best_key, best_key_ts, to_block, to_utime)
+            elif step['to_key_block']:  # blockLinkBack to key block
+                if return_best_key_block:
+                    best_key, best_key_ts = choose_key_block(best_key, best_key_ts, to_block, to_utime)
+                if self.last_key_block is None or to_seqno > self.last_key_block.seqno:
+                    self.last_key_block = to_block
+            last_trusted = to_block
         return last_trusted == target_block, last_trusted, best_key, best_key_ts
 
     async def get_mc_block_proof(self, known_block: BlockIdExt,
@@ -1045,61 +1934,90 @@ class LiteClient:
             await self.get_shard_block_proof(target_block, True)
 
     def unpack_config(self, block: BlockIdExt, config_proof: Cell, state_proof: Cell) -> dict:
+        """
+        :return: config params of the block, deserialized if known
+        """
+        return BlockchainConfig(self._unpack_config_params(block, config_proof, state_proof)).get_all()
+
+    def _unpack_config_params(self, block: BlockIdExt, config_proof: Cell, state_proof: Cell) -> typing.Dict[int, Slice]:
+        """
+        :return: raw config params of the block, checked against its state hash if trust level allows
+        """
         if self.trust_level <= 1:
             state_hash = check_block_header_proof(state_proof[0], block.root_hash, True)
             if config_proof[0].get_hash(0) != state_hash:
                 raise LiteClientError('hashes mismach')
         shard = ShardStateUnsplit.deserialize(config_proof[0].begin_parse())
-        config = shard.custom.config.config
-        config_res = {}
-        for i, v in config.items():
-            if i in ConfigParam.params:
-                config_res[i] = ConfigParam.params[i].deserialize(v)
-            else:
-                config_res[i] = v
-
-        return config_res
+        return shard.custom.config.config
 
-    async def get_config_all(self, blk: typing.Optional[BlockIdExt] = None) -> dict:
-        trusted = False
+    async def get_config(self, blk: typing.Optional[BlockIdExt] = None) -> BlockchainConfig:
+        """
+        Returns blockchain config from the configs cache, loading it once per key block
+        :param blk: masterchain block, last one if not provided
+        :return: config with both parsed params and serialized config dictionary
+        """
         if blk is None:
             blk = self.last_mc_block
-            trusted = True
+        key_block = await self._get_config_key_block(blk)
+        config = self.configs.get_by_key_block(key_block)
+        if config is None:
+            config = await self._load_config(blk, key_block)
+        return config
 
-        mode = 0  # ?
-
-        data = {'mode': mode, 'id': blk.to_dict()}
+    async def _get_config_key_block(self, blk: BlockIdExt) -> int:
+        """
+        :return: seqno of the key block the masterchain block takes the config from
+        """
+        key_block = self.configs.get_key_block(blk.seqno)
+        if key_block is not None:
+            return key_block
+        if not self.trust_level and blk == self.last_mc_block and self.last_key_block is not None:
+            key_block = self.last_key_block.seqno  # last block was just proven from the last key block
+        else:
+            info = (await self.raw_get_block_header(blk)).info
+            key_block = blk.seqno if info.key_block else info.prev_key_block_seqno
+        self.configs.set_key_block(blk.seqno, key_block)
+        return key_block
 
-        result = await self.liteserver_request('getConfigAll', data)
+    async def _load_config(self, blk: BlockIdExt, key_block: int) -> BlockchainConfig:
+        result = await self.liteserver_request('getConfigAll', {'mode': 0, 'id': blk.to_dict()})
 
-        if not self.trust_level and not trusted:
+        if not self.trust_level and blk != self.last_mc_block:
             await self.prove_block(blk)
 
-        config_proof = Cell.one_from_boc(result['config_proof'])
-        state_proof = Cell.one_from_boc(result['state_proof'])
-        return self.unpack_config(blk, config_proof, state_proof)
-
-    async def get_config_params(self, params: typing.List[int], blk: typing.Optional[BlockIdExt] = None) -> dict:
-        trusted = False
-        if blk is None:
-            blk = self.last_mc_block
-            trusted = True
+        params = self._unpack_config_params(blk, Cell.one_from_boc(result['config_proof']),
+                                            Cell.one_from_boc(result['state_proof']))
+        config = BlockchainConfig(params, key_block)
+        self.configs.put(config.cell.hash, config)
+        return config
 
-        mode = 0  # ?
-        data = {'mode': mode, 'id': blk.to_dict(), 'param_list': params}
-        result = await self.liteserver_request('getConfigParams', data)
-
-        if not self.trust_level and not trusted:
-            await self.prove_block(blk)
+    async def get_config_all(self, blk: typing.Optional[BlockIdExt] = None) -> dict:
+        return (await self.get_config(blk)).get_all()
 
-        config_proof = Cell.one_from_boc(result['config_proof'])
-        state_proof = Cell.one_from_boc(result['state_proof'])
-        return self.unpack_config(blk, config_proof, state_proof)
+    async def get_config_params(self, params: typing.List[int], blk: typing.Optional[BlockIdExt] = None) -> dict:
+        """
+        :return: requested params which are present in the config, answered from the configs cache.
+            Parsed params are shared with other callers, copy them before changing
+        """
+        return (await self.get_config(blk)).get_params(params)
 
     async def _get_libraries(self, library_list: typing.List[typing.Union[bytes, str]]) -> typing.Dict[str, typing.Optional[Cell]]:
         if len(library_list) > 16:
             raise LiteClientError('maximum libraries num could be requested is 16')
         library_list = [lib.hex() if isinstance(lib, bytes) else lib for lib in library_list]
+
+        stored = {}
+        if self.disk_store is not None:
+            for lib in library_list:
+                data = self.disk_store.get('libraries', bytes.fromhex(lib))
+                if data is not None:
+                    cell = Cell.one_from_boc(data)
+                    if cell.hash.hex() == lib:
+                        stored[lib] = cell
+            library_list = [lib for lib in library_list if lib not in stored]
+            if not library_list:
+                return stored
+
         data = {'library_list': library_list}
 
         result = await self.liteserver_request('getLibraries', data)
@@ -1114,8 +2032,10 @@ class LiteClient:
             if self.trust_level < 2:
                 if result[lib].hash.hex() != lib:
                     raise LiteClientError('library hash mismatch')
+            if self.disk_store is not None:
+                self.disk_store.put('libraries', bytes.fromhex(lib), result[lib].to_boc())
 
-        return result
+        return stored | result
 
     async def get_libraries(self, library_list: typing.List[typing.Union[bytes, str]]) -> typing.Dict[str, typing.Optional[Cell]]:
         """
@@ -1128,6 +2048,26 @@ class LiteClient:
         result = await asyncio.gather(*[self._get_libraries(lib) for lib in libs])
         return {k: v for d in result for k, v in d.items()}
 
+    async def prefetch_libraries(self, library_list: typing.List[typing.Union[bytes, str]]) -> int:
+        """
+        Loads libraries which are not in the library cache yet, e.g. code of popular wallets and jetton wallets
+        at startup, so the first `run_get_method_local` calls don't wait for them
+
+        :param library_list: list of library hashes in bytes or string hex form
+        :return: number of libraries loaded from liteserver or disk store
+        """
+        missing = self.libs.missing(lib.hex() if isinstance(lib, bytes) else lib for lib in library_list)
+        if not missing:
+            return 0
+        loaded = 0
+        for lib_hash, lib in (await self.get_libraries(missing)).items():
+            if lib is None:
+                self.libs.put_not_found(lib_hash)
+                continue
+            self.libs.put(lib_hash, lib)
+            loaded += 1
+        return loaded
+
     async def get_out_msg_queue_sizes(self, wc: int = None, shard: int = None):
         """
         If wc and shard are not None, returns queue size for all children shards of the provided shard.
@@ -0,0 +1,99 @@
+"""
+Local get methods execution for `LiteClient.run_get_method_local`.
+`run_get_method_boc` takes and returns only bytes and plain values, so it can be run in a thread or process pool;
+every worker thread keeps its own emulators cache, as an emulator can't be used by two threads at once.
+Configs are kept by every worker process, so the config BoC is sent to a worker only once per config.
+TVM engine calls release the GIL, so a thread pool already runs get methods in parallel.
+"""
+import collections
+import threading
+import typing
+
+from pytoniq_core.boc import Cell
+
+from .cache import EmulatorCache
+
+_local = threading.local()
+_configs: typing.OrderedDict[bytes, bytes] = collections.OrderedDict()  # config hash : base64 config BoC
+_configs_lock = threading.Lock()
+max_configs = 8
+
+
+class ConfigNotLoaded(Exception):
+    """
+    Raised by `run_get_method_boc` called without the config BoC by a worker which doesn't have the config yet
+    """
+
+
+def _worker_emulators() -> EmulatorCache:
+    cache = getattr(_local, 'emulators', None)
+    if cache is None:
+        cache = _local.emulators = EmulatorCache()
+    return cache
+
+
+def create_emulator(code: Cell, data: Cell, libraries: typing.Optional[Cell]):
+    """
+    :param libraries: serialized libraries dictionary, as `LibraryCache.get_dict` returns it
+    :return: TvmEmulator with code, data and libraries set
+    """
+    from pytvm.tvm_emulator import TvmEmulator
+    emulator = TvmEmulator(code=code, data=data)
+    if libraries is not None:
+        emulator.set_libraries(libraries)
+    return emulator
+
+
+def run_emulator(emulator, address: str, unixtime: int, balance: int, config_b64: bytes,
+                 method: typing.Union[int, str], stack: Cell, gas_limit: int, rand_seed: bytes) -> dict:
+    """
+    Sets per call parts of the emulator state and runs the get method
+    :param config_b64: base64 BoC of the config dictionary, `BlockchainConfig.cell_b64`
+    :param stack: serialized VmStack
+    :return: raw emulator result, `stack` is a base64 BoC
+    """
+    from pytvm.utils import get_method_id
+    if isinstance(method, str):
+        method = get_method_id(method)
+    emulator.set_gas_limit(gas_limit)
+    # the same as emulator.set_c7(), but config BoC is serialized once per config, not on every call.
+    # It's not public pytvm API, so pytvm version is pinned in setup.py
+    emulator.engine.tvm_emulator_set_c7(emulator.emulator, address.encode(), unixtime, balance,
+                                        rand_seed.hex().encode(), config_b64)
+    return emulator.raw_run_get_method(method, stack)
+
+
+def _worker_config(config_hash: bytes, config_b64: typing.Optional[bytes]) -> bytes:
+    with _configs_lock:
+        if config_b64 is not None:
+            _configs[config_hash] = config_b64
+            while len(_configs) > max_configs:
+                _configs.popitem(last=False)
+        else:
+            config_b64 = _configs.get(config_hash)
+            if config_b64 is None:
+                raise ConfigNotLoaded(config_hash.hex())
+        _configs.move_to_end(config_hash)
+    return config_b64
+
+
+def run_get_method_boc(key: typing.Tuple[bytes, bytes, bytes, bytes], code_boc: bytes, data_boc: bytes,
+                       libraries_boc: typing.Optional[bytes], address: str, unixtime: int, balance: int,
+                       config_b64: typing.Optional[bytes], method: typing.Union[int, str], stack_boc: bytes,
+                       gas_limit: int, rand_seed: bytes) -> dict:
+    """
+    `run_emulator` for executors: account code, data and libraries are passed as BoC bytes
+    and deserialized only if the worker doesn't have the emulator for them yet
+    :param key: (code hash, data hash, config hash, libraries dictionary hash or empty bytes)
+    :param config_b64: base64 config BoC, may be None if it was already sent to the worker,
+        `ConfigNotLoaded` is raised if the worker doesn't have it
+    """
+    config_b64 = _worker_config(key[2], config_b64)
+    cache = _worker_emulators()
+    emulator = cache.get(key)
+    if emulator is None:
+        libraries = Cell.one_from_boc(libraries_boc) if libraries_boc is not None else None
+        emulator = create_emulator(Cell.one_from_boc(code_boc), Cell.one_from_boc(data_boc), libraries)
+        cache.put(key, emulator)
+    return run_emulator(emulator, address, unixtime, balance, config_b64, method, Cell.one_from_boc(stack_boc),
+                        gas_limit, rand_seed)
@@ -0,0 +1,187 @@
+import array
+import bisect
+import heapq
+import struct
+import typing
+
+from pytoniq_core.tl.block import BlockIdExt
+
+
+class MasterchainIndex:
+    """
+    Compact index of known masterchain blocks: (seqno, gen_utime, start_lt, end_lt, root_hash, file_hash)
+    kept as sorted columns, 88 bytes per block. Filled by LiteClient from every verified masterchain header it sees,
+    including every new block the block updater gets, and by `LiteClient.backfill_mc_index`,
+    answers lt and unix time lookups by binary search. Seqnos may have gaps, a lookup is answered only
+    if the known blocks around it determine the result, otherwise it's a miss and the client asks the liteserver.
+    Answers are the same as liteserver `lookupBlock` gives:
+    - by lt: the block with `start_lt <= lt < end_lt`
+    - by unix time: the first block with `gen_utime >= utime`, the previous block must be known too
+    At most about `max_blocks` blocks are kept, the oldest ones are dropped first
+    >>> index = MasterchainIndex.from_bytes(open('mc_index.bin', 'rb').read())
+    >>> client = LiteClient(host, port, pub_key, mc_index=index)
+    """
+
+    record = struct.Struct('<IIQQ32s32s')
+    max_inserts = 16  # more out of order blocks than this are merged by rebuilding the columns
+
+    def __init__(self, max_blocks: int = 2**20):
+        self.max_blocks = max_blocks
+        self._seqnos = array.array('I')
+        self._utimes = array.array('I')
+        self._start_lts = array.array('Q')
+        self._end_lts = array.array('Q')
+        self._hashes = bytearray()  # root hash + file hash of each block
+        self._pending: typing.List[tuple] = []  # out of order records, merged on the next read
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        self._merge()
+        return len(self._seqnos)
+
+    def __contains__(self, seqno: int) -> bool:
+        self._merge()
+        i = bisect.bisect_left(self._seqnos, seqno)
+        return i < len(self._seqnos) and self._seqnos[i] == seqno
+
+    def add(self, block: BlockIdExt, gen_utime: int, start_lt: int, end_lt: int) -> None:
+        """
+        Blocks newer than the last known one are appended at once, others are merged on the next read
+        :param block: masterchain block id, its header must be already checked
+        """
+        record = (block.seqno, gen_utime, start_lt, end_lt, block.root_hash, block.file_hash)
+        if not self._pending and (not self._seqnos or block.seqno > self._seqnos[-1]):
+            self._append(self._seqnos, self._utimes, self._start_lts, self._end_lts, self._hashes, record)
+            self._trim()
+        else:
+            self._pending.append(record)
+
+    def update(self, blocks: typing.Iterable[typing.Tuple[BlockIdExt, int, int, int]]) -> None:
+        """
+        :param blocks: (block, gen_utime, start_lt, end_lt)
+        """
+        for block in blocks:
+            self.add(*block)
+
+    def get(self, seqno: int) -> typing.Optional[BlockIdExt]:
+        self._merge()
+        i = bisect.bisect_left(self._seqnos, seqno)
+        if i < len(self._seqnos) and self._seqnos[i] == seqno:
+            return self._found(i)
+        return self._found(None)
+
+    def find_by_lt(self, lt: int) -> typing.Optional[BlockIdExt]:
+        """
+        :return: block which lt range contains `lt` or None if it's not known
+        """
+        self._merge()
+        i = bisect.bisect_right(self._end_lts, lt)
+        if i < len(self._seqnos) and self._start_lts[i] <= lt:
+            return self._found(i)
+        return self._found(None)
+
+    def find_by_utime(self, utime: int) -> typing.Optional[BlockIdExt]:
+        """
+        :return: the first block generated not earlier than `utime` or None if it's not known
+        """
+        self._merge()
+        i = bisect.bisect_left(self._utimes, utime)
+        if 0 < i < len(self._seqnos) and self._seqnos[i - 1] == self._seqnos[i] - 1:
+            return self._found(i)
+        return self._found(None)
+
+    def missing(self, from_seqno: int, to_seqno: int) -> typing.List[int]:
+        """
+        :return: seqnos in [from_seqno, to_seqno) which are not in the index
+        """
+        self._merge()
+        start = bisect.bisect_left(self._seqnos, from_seqno)
+        end = bisect.bisect_left(self._seqnos, to_seqno)
+        known = set(self._seqnos[start:end])
+        return [seqno for seqno in range(from_seqno, to_seqno) if seqno not in known]
+
+    def to_bytes(self) -> bytes:
+        self._merge()
+        return b''.join(self.record.pack(*self._record(i)) for i in range(len(self._seqnos)))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, max_blocks: int = 2**20) -> "MasterchainIndex":
+        index = cls(max_blocks)
+        index._load(sorted(cls.record.iter_unpack(data[:len(data) - len(data) % cls.record.size]), key=lambda r: r[0]))
+        index._trim()
+        return index
+
+    def to_dict(self) -> dict:
+        self._merge()
+        return {
+            'blocks': len(self._seqnos),
+            'first_seqno': self._seqnos[0] if self._seqnos else None,
+            'last_seqno': self._seqnos[-1] if self._seqnos else None,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _record(self, i: int) -> tuple:
+        return (self._seqnos[i], self._utimes[i], self._start_lts[i], self._end_lts[i],
+                bytes(self._hashes[i * 64:i * 64 + 32]), bytes(self._hashes[i * 64 + 32:i * 64 + 64]))
+
+    @staticmethod
+    def _append(seqnos: array.array, utimes: array.array, start_lts: array.array, end_lts: array.array,
+                hashes: bytearray, record: tuple) -> None:
+        seqno, gen_utime, start_lt, end_lt, root_hash, file_hash = record
+        seqnos.append(seqno)
+        utimes.append(gen_utime)
+        start_lts.append(start_lt)
+        end_lts.append(end_lt)
+        hashes += root_hash + file_hash
+
+    def _load(self, records: typing.Iterable[tuple]) -> None:
+        """
+        Replaces the columns with `records` sorted by seqno, only the first record of a seqno is kept
+        """
+        columns = array.array('I'), array.array('I'), array.array('Q'), array.array('Q'), bytearray()
+        seqnos = columns[0]
+        for record in records:
+            if not seqnos or seqnos[-1] != record[0]:
+                self._append(*columns, record)
+        self._seqnos, self._utimes, self._start_lts, self._end_lts, self._hashes = columns
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = sorted(self._pending, key=lambda r: r[0]), []
+        if len(pending) > self.max_inserts:
+            known = (self._record(i) for i in range(len(self._seqnos)))
+            self._load(heapq.merge(known, pending, key=lambda r: r[0]))  # known records go first on equal seqnos
+            self._trim()
+            return
+        for record in pending:
+            i = bisect.bisect_left(self._seqnos, record[0])
+            if i < len(self._seqnos) and self._seqnos[i] == record[0]:
+                continue
+            seqno, gen_utime, start_lt, end_lt, root_hash, file_hash = record
+            self._seqnos.insert(i, seqno)
+            self._utimes.insert(i, gen_utime)
+            self._start_lts.insert(i, start_lt)
+            self._end_lts.insert(i, end_lt)
+            self._hashes[i * 64:i * 64] = root_hash + file_hash
+        self._trim()
+
+    def _trim(self) -> None:
+        """
+        Drops the oldest blocks once there are `max_blocks / 16` extra ones, so columns are not shifted on every new block
+        """
+        extra = len(self._seqnos) - self.max_blocks
+        if extra <= self.max_blocks // 16:
+            return
+        del self._seqnos[:extra], self._utimes[:extra], self._start_lts[:extra], self._end_lts[:extra]
+        del self._hashes[:extra * 64]
+
+    def _found(self, i: typing.Optional[int]) -> typing.Optional[BlockIdExt]:
+        if i is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return BlockIdExt(-1, -2**63, self._seqnos[i], bytes(self._hashes[i * 64:i * 64 + 32]),
+                          bytes(self._hashes[i * 64 + 32:i * 64 + 64]))
@@ -0,0 +1,141 @@
+import bisect
+import typing
+
+
+class RequestStats:
+    """
+    Numbers of one liteserver query, passed to `MetricsHook.on_request`.
+    All times are in seconds, `None` when the stage wasn't reached (e.g. query timed out)
+    """
+
+    __slots__ = ('latency', 'network_wait', 'decrypt', 'decode', 'request_bytes', 'response_bytes', 'error_code',
+                 'timed_out')
+
+    def __init__(self, latency: float, request_bytes: int, network_wait: typing.Optional[float] = None,
+                 decrypt: typing.Optional[float] = None, decode: typing.Optional[float] = None,
+                 response_bytes: int = 0, error_code: typing.Optional[int] = None, timed_out: bool = False):
+        self.latency = latency  # from the call until the answer is ready, including waiting for free in-flight slot
+        self.network_wait = network_wait  # from the write until the answer frame is received
+        self.decrypt = decrypt
+        self.decode = decode  # checksum and TL deserialization
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.error_code = error_code  # LiteServerError code if liteserver answered with an error
+        self.timed_out = timed_out
+
+    def __repr__(self):
+        return f'RequestStats({", ".join(f"{k}={getattr(self, k)}" for k in self.__slots__)})'
+
+
+class MetricsHook:
+    """
+    Receiver of LiteClient metrics. Subclass it and override needed methods,
+    then pass to `LiteClient(metrics=...)` or set `client.metrics`.
+    Methods are called from the event loop, so they should be fast and must not block.
+    """
+
+    def on_request(self, method: str, stats: RequestStats) -> None:
+        """
+        Called after each liteserver query
+        :param method: TL method name without `liteServer.` prefix, e.g. `getBlock`
+        """
+
+    def on_proof(self, method: str, seconds: float) -> None:
+        """
+        Called after BoC deserialization and proof checks of an answer
+        :param method: TL method name the answer belongs to
+        """
+
+
+class MethodMetrics:
+
+    def __init__(self, buckets: typing.Sequence[float]):
+        self.buckets = buckets
+        self.histogram = [0] * (len(buckets) + 1)  # latency counts, last one is for latencies above all buckets
+        self.requests = 0
+        self.timeouts = 0
+        self.errors: typing.Dict[int, int] = {}  # LiteServerError code : count
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latency = 0.0
+        self.network_wait = 0.0
+        self.decrypt = 0.0
+        self.decode = 0.0
+        self.proof = 0.0
+        self.proofs = 0
+
+    def percentile(self, p: float) -> typing.Optional[float]:
+        """
+        :param p: from 0 to 1
+        :return: upper bound of the histogram bucket the percentile falls into, inf if above all buckets
+        """
+        if not self.requests:
+            return None
+        rank = p * self.requests
+        total = 0
+        for i, count in enumerate(self.histogram):
+            total += count
+            if total >= rank and count:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'timeouts': self.timeouts,
+            'errors': dict(self.errors),
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'latency': self.latency,
+            'network_wait': self.network_wait,
+            'decrypt': self.decrypt,
+            'decode': self.decode,
+            'proof': self.proof,
+            'histogram': dict(zip([*self.buckets, float('inf')], self.histogram)),
+        }
+
+
+class LiteClientMetrics(MetricsHook):
+    """
+    In-memory metrics aggregated per TL method: latency histogram, request and response bytes,
+    errors by liteserver error code and total time spent in network wait, decrypt, TL decode and proof checks
+    """
+
+    default_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: typing.Sequence[float] = default_buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.methods: typing.Dict[str, MethodMetrics] = {}
+
+    def get(self, method: str) -> MethodMetrics:
+        metrics = self.methods.get(method)
+        if metrics is None:
+            metrics = self.methods[method] = MethodMetrics(self.buckets)
+        return metrics
+
+    def on_request(self, method: str, stats: RequestStats) -> None:
+        m = self.get(method)
+        m.requests += 1
+        m.histogram[bisect.bisect_left(self.buckets, stats.latency)] += 1
+        m.latency += stats.latency
+        m.request_bytes += stats.request_bytes
+        m.response_bytes += stats.response_bytes
+        if stats.timed_out:
+            m.timeouts += 1
+        if stats.error_code is not None:
+            m.errors[stats.error_code] = m.errors.get(stats.error_code, 0) + 1
+        if stats.network_wait is not None:
+            m.network_wait += stats.network_wait
+            m.decrypt += stats.decrypt
+            m.decode += stats.decode
+
+    def on_proof(self, method: str, seconds: float) -> None:
+        m = self.get(method)
+        m.proof += seconds
+        m.proofs += 1
+
+    def to_dict(self) -> dict:
+        return {method: m.to_dict() for method, m in self.methods.items()}
+
+    def reset(self) -> None:
+        self.methods.clear()
@@ -0,0 +1,111 @@
+"""
+Walking account transaction chains page by page for `LiteClient` and `LiteBalancer`.
+Functions here only know how to fetch an account state and a page of transactions, they are given these callables,
+so the balancer spreads page requests over its peers while the client sends them to its liteserver.
+"""
+import asyncio
+import typing
+
+from pytoniq_core.boc.address import Address
+from pytoniq_core.tlb.account import Account, ShardAccount
+from pytoniq_core.tlb.transaction import Transaction
+
+GetAccountState = typing.Callable[[Address], typing.Awaitable[typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]]]
+GetTransactions = typing.Callable[[Address, int, int, bytes], typing.Awaitable[typing.Tuple[typing.List[Transaction], typing.Any]]]
+
+
+async def iter_transactions(get_account_state: GetAccountState, get_transactions: GetTransactions,
+                            address: typing.Union[Address, str], from_lt: int = None,
+                            from_hash: typing.Optional[bytes] = None, to_lt: int = 0, page_size: int = 16
+                            ) -> typing.AsyncIterator[Transaction]:
+    """
+    :param get_account_state: `raw_get_account_state`
+    :param get_transactions: `raw_get_transactions`
+    Other arguments are the same as `LiteClient.iter_transactions` has
+    """
+    if isinstance(address, str):
+        address = Address(address)
+
+    if not from_lt or not from_hash:
+        _, shard_account = await get_account_state(address)
+        if shard_account is None:  # account doesn't exist
+            return
+        from_lt, from_hash = shard_account.last_trans_lt, shard_account.last_trans_hash
+
+    page = None
+    if from_lt > to_lt:
+        page = asyncio.ensure_future(get_transactions(address, page_size, from_lt, from_hash))
+    try:
+        while page is not None:
+            transactions, _ = await page
+            page = None
+            if not transactions:
+                return
+            last = transactions[-1]
+            if last.prev_trans_lt > to_lt:
+                page = asyncio.ensure_future(get_transactions(address, page_size, last.prev_trans_lt, last.prev_trans_hash))
+            for transaction in transactions:
+                if transaction.lt <= to_lt:
+                    return
+                yield transaction
+            del transactions, last  # don't hold the page while waiting for the next one
+    finally:
+        if page is not None:
+            page.cancel()
+
+
+async def iter_accounts_transactions(get_account_state: GetAccountState, get_transactions: GetTransactions,
+                                     accounts: typing.Iterable[typing.Union[Address, str, tuple]],
+                                     concurrency: int = 16, page_size: int = 16
+                                     ) -> typing.AsyncIterator[typing.Tuple[Address, typing.List[Transaction]]]:
+    """
+    :param get_account_state: `raw_get_account_state`
+    :param get_transactions: `raw_get_transactions`
+    Other arguments are the same as `LiteClient.iter_accounts_transactions` has
+    """
+    accounts = iter(accounts)  # shared by the workers, each account is taken by one of them
+    queue = asyncio.Queue(concurrency)  # bounds pages waiting for the caller
+
+    async def walk(address, from_lt: int = None, from_hash: typing.Optional[bytes] = None, to_lt: int = 0):
+        if isinstance(address, str):
+            address = Address(address)
+        if not from_lt or not from_hash:
+            _, shard_account = await get_account_state(address)
+            if shard_account is None:
+                return
+            from_lt, from_hash = shard_account.last_trans_lt, shard_account.last_trans_hash
+        while from_lt > to_lt:
+            transactions, _ = await get_transactions(address, page_size, from_lt, from_hash)
+            if not transactions:
+                return
+            from_lt, from_hash = transactions[-1].prev_trans_lt, transactions[-1].prev_trans_hash
+            if transactions[-1].lt <= to_lt:
+                transactions = [tr for tr in transactions if tr.lt > to_lt]
+            if transactions:
+                await queue.put((address, transactions))
+
+    async def worker():
+        try:
+            for account in accounts:
+                if not isinstance(account, tuple):
+                    account = (account,)
+                await walk(*account)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            item = await queue.get()
+            if item is None:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for w in workers:
+            w.cancel()
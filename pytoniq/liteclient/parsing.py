@@ -0,0 +1,147 @@
+"""
+CPU-heavy parts of LiteClient answers processing: BoC deserialization and proof checks.
+Functions here are pure and module-level, so they can be run in a thread or process pool.
+"""
+import typing
+
+from pytoniq_core.boc import Cell, begin_cell
+from pytoniq_core.boc.address import Address
+from pytoniq_core.proof.check_proof import check_block_header_proof, check_shard_proof, check_account_proof, \
+    check_block_signatures, compute_validator_set
+from pytoniq_core.tl.block import BlockIdExt
+from pytoniq_core.tlb.account import Account, ShardAccount
+from pytoniq_core.tlb.block import Block, ShardStateUnsplit, KeyExtBlkRef
+from pytoniq_core.tlb.config import ConfigParam34, ConfigParam28
+from pytoniq_core.tlb.transaction import Transaction
+
+
+def parse_block(data: bytes, block_root_hash: bytes, check_proof: bool) -> Block:
+    """
+    :param data: block BoC
+    :param block_root_hash: expected block root hash
+    :param check_proof: check that data is the block with provided root hash
+    :return: deserialized Block
+    """
+    result_block = Cell.one_from_boc(data)
+    if check_proof:
+        check_block_header_proof(result_block, block_hash=block_root_hash)
+    return Block.deserialize(result_block.begin_parse())
+
+
+def parse_block_transactions_ext(result: dict, block_root_hash: bytes, check_proof: bool) -> typing.List[Transaction]:
+    """
+    :param result: liteServer.blockTransactionsExt answer
+    :param block_root_hash: block root hash
+    :param check_proof: check transactions are in the block
+    :return: list of transactions
+    """
+    if not result['transactions']:
+        return []
+
+    transactions_cells = Cell.from_boc(result['transactions'])
+
+    if check_proof:
+        proof = Cell.one_from_boc(result['proof'])
+        check_block_header_proof(proof[0], block_root_hash)
+        acc_block = Block.deserialize(proof[0].begin_parse()).extra.account_blocks[0]
+    tr_result = []
+
+    for tr_root in transactions_cells:
+        transaction = Transaction.deserialize(tr_root.begin_parse())
+        if check_proof:
+            prunned_tr_cell = acc_block.get(int(transaction.account_addr_hex, 16)).transactions[0].get(
+                transaction.lt)
+            assert prunned_tr_cell.get_hash(0) == tr_root.get_hash(0)
+        tr_result.append(transaction)
+
+    return tr_result
+
+
+def parse_account_state(result: dict, block: BlockIdExt, address: Address,
+                        check_proof: bool) -> typing.Tuple[Account, ShardAccount]:
+    """
+    :param result: liteServer.accountState answer with not empty state
+    :param block: masterchain block the state was requested for
+    :param address: account address
+    :param check_proof: check shard block is in the masterchain block
+    :return: account and shard account
+    """
+    shrd_blk = BlockIdExt.from_dict(result['shardblk'])
+    account_state_root = Cell.one_from_boc(result['state'])
+    if check_proof:
+        check_account_shard_proof(result, block)
+    shard_account = check_account_proof(proof=result['proof'], shrd_blk=shrd_blk, address=address, account_state_root=account_state_root, return_account_descr=True)
+    account = Account.deserialize(account_state_root.begin_parse())
+    full_shard_account_cell = begin_cell().store_bytes(shard_account.cell.begin_parse().load_bytes(40)).store_ref(account_state_root).end_cell()
+    return account, ShardAccount.deserialize(full_shard_account_cell.begin_parse())
+
+
+def check_account_shard_proof(result: dict, block: BlockIdExt) -> None:
+    """
+    Checks the shard block of liteServer.accountState answer is in the masterchain block.
+    The shard proof is the same for all accounts of one shard block
+    :param result: liteServer.accountState answer
+    :param block: masterchain block the state was requested for
+    """
+    check_shard_proof(shard_proof=result['shard_proof'], blk=block, shrd_blk=BlockIdExt.from_dict(result['shardblk']))
+
+
+def parse_account_states(results: typing.List[dict], block: BlockIdExt, addresses: typing.List[Address]
+                         ) -> typing.List[typing.Tuple[typing.Optional[Account], typing.Optional[ShardAccount]]]:
+    """
+    Parses a batch of liteServer.accountState answers, shard proofs must be already checked
+    :return: (account, shard account) for each answer, (None, None) for not existing accounts
+    """
+    return [parse_account_state(result, block, address, False) if result['state'] else (None, None)
+            for result, address in zip(results, addresses)]
+
+
+def check_block_link(step: dict, last_trusted: BlockIdExt) -> typing.Tuple[BlockIdExt, typing.Optional[int], typing.Optional[int], typing.Optional[int], typing.Optional[int]]:
+    """
+    Checks one step of liteServer.partialBlockProof
+    :param step: liteServer.blockLinkForward or liteServer.blockLinkBack
+    :param last_trusted: block the step starts from
+    :return: (proved block, from block seqno, from block gen_utime, to block seqno, to block gen_utime),
+        seqnos and utimes are None if the step doesn't provide them
+    """
+    assert last_trusted == BlockIdExt.from_dict(step['from'])
+    to_block = BlockIdExt.from_dict(step['to'])
+
+    if 'config_proof' in step:  # blockLinkForward
+        dest_proof = Cell.one_from_boc(step['dest_proof'])
+        config_proof = Cell.one_from_boc(step['config_proof'])
+        check_block_header_proof(dest_proof[0], to_block.root_hash)
+
+        block = Block.deserialize(config_proof[0].begin_parse())
+        dest_block = Block.deserialize(dest_proof[0].begin_parse())
+
+        param_34 = ConfigParam34.deserialize(block.extra.custom.config.config[34])
+        param_28 = ConfigParam28.deserialize(block.extra.custom.config.config[28])
+
+        nodes = compute_validator_set(param_28, to_block, param_34.cur_validators)
+        check_block_signatures(nodes=nodes, signatures=step['signatures']['signatures'], blk=to_block)
+        return to_block, block.info.seqno, block.info.gen_utime, dest_block.info.seqno, dest_block.info.gen_utime
+
+    # blockLinkBack
+    dest_proof = Cell.one_from_boc(step['dest_proof'])
+    state_proof = Cell.one_from_boc(step['state_proof'])
+    proof = Cell.one_from_boc(step['proof'])
+
+    state_hash = check_block_header_proof(proof[0], last_trusted.root_hash, True)
+    assert state_hash == state_proof[0].get_hash(0)
+    state = ShardStateUnsplit.deserialize(state_proof[0].begin_parse())
+
+    if step['to_key_block']:
+        block = Block.deserialize(proof[0].begin_parse())
+        last_key = state.custom.last_key_block
+        check_block_header_proof(dest_proof[0], last_key.root_hash)
+        assert to_block.root_hash == last_key.root_hash
+        return to_block, None, None, to_block.seqno, block.info.gen_utime
+
+    blk = state.custom.prev_blocks[0].get(to_block.seqno)
+    if not blk:
+        from .client import LiteClientError  # client module imports this one
+        raise LiteClientError(f'cannot find {to_block} in OldMcBlocksInfo')
+    blk: KeyExtBlkRef
+    assert blk.blk_ref.root_hash == to_block.root_hash
+    return to_block, None, None, None, None
@@ -0,0 +1,104 @@
+import mmap
+import os
+import struct
+import typing
+
+
+class _Segment:
+    """
+    Two append-only files of one kind of objects: `<kind>.dat` with values written one after another
+    and `<kind>.idx` with fixed size entries (key, offset, length) pointing into it
+    """
+
+    entry = struct.Struct('<32sQI')
+
+    def __init__(self, path: str, kind: str):
+        self.data_file = open(os.path.join(path, kind + '.dat'), 'a+b')
+        self.index_file = open(os.path.join(path, kind + '.idx'), 'a+b')
+        self.index: typing.Dict[bytes, typing.Tuple[int, int]] = {}  # key : (offset, length)
+        self.size = os.fstat(self.data_file.fileno()).st_size
+        self._map: typing.Optional[mmap.mmap] = None
+
+        self.index_file.seek(0)
+        raw = self.index_file.read()
+        for i in range(0, len(raw) - self.entry.size + 1, self.entry.size):
+            key, offset, length = self.entry.unpack_from(raw, i)
+            if offset + length <= self.size:  # values are written before their index entries, but the disk may lie
+                self.index[key] = (offset, length)
+
+    def get(self, key: bytes) -> typing.Optional[bytes]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        if self._map is None or len(self._map) < offset + length:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:offset + length]
+
+    def put(self, key: bytes, value: bytes) -> None:
+        if key in self.index:
+            return
+        self.data_file.write(value)
+        self.data_file.flush()
+        self.index_file.write(self.entry.pack(key, self.size, len(value)))
+        self.index_file.flush()
+        self.index[key] = (self.size, len(value))
+        self.size += len(value)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self.data_file.close()
+        self.index_file.close()
+
+
+class DiskStore:
+    """
+    Persistent store of immutable objects keyed by their 32-byte hash: block BoCs by root hash,
+    transactions by hash and library cells by hash. LiteClient reads from it before asking the liteserver
+    and checks hashes of everything it reads, so a damaged file results in a liteserver request, not in wrong data.
+    Each kind has an append-only data file and an index file in `path`, index is loaded into memory on open
+    and values are read through mmap. Only one process may write into the directory at a time
+    >>> store = DiskStore('/var/lib/indexer/ton')
+    >>> client = LiteClient(host, port, pub_key, disk_store=store)
+    """
+
+    kinds = ('blocks', 'transactions', 'libraries')
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._segments = {kind: _Segment(path, kind) for kind in self.kinds}
+
+    def get(self, kind: str, key: bytes) -> typing.Optional[bytes]:
+        """
+        :param kind: one of `kinds`
+        :param key: 32-byte hash
+        :return: stored value or None
+        """
+        return self._segments[kind].get(key)
+
+    def put(self, kind: str, key: bytes, value: bytes) -> None:
+        """
+        Appends value if the key isn't stored yet
+        :param kind: one of `kinds`
+        :param key: 32-byte hash
+        :param value: bytes
+        """
+        self._segments[kind].put(key, value)
+
+    def __contains__(self, item: typing.Tuple[str, bytes]) -> bool:
+        kind, key = item
+        return key in self._segments[kind].index
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            segment.close()
+
+    def __enter__(self) -> "DiskStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
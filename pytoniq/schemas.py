@@ -0,0 +1,34 @@
+import functools
+import os
+import types
+import typing
+
+from pytoniq_core.tl.generator import TlGenerator, TlSchemas
+
+
+@functools.lru_cache(maxsize=None)
+def _generate(path: typing.Optional[str]) -> TlSchemas:
+    if path is None:
+        schemas = TlGenerator.with_default_schemas().generate()
+    else:
+        schemas = TlGenerator(path).generate()
+    # the same object is shared by every client and transport, so nobody should be able to change it
+    schemas.list = tuple(schemas.list)
+    schemas.id_map = types.MappingProxyType(schemas.id_map)
+    schemas.name_map = types.MappingProxyType(schemas.name_map)
+    schemas.class_name_map = types.MappingProxyType(schemas.class_name_map)
+    schemas.untouchables = types.MappingProxyType({k: frozenset(v) for k, v in schemas.untouchables.items()})
+    return schemas
+
+
+def get_schemas(tl_schemas_path: typing.Optional[str] = None) -> TlSchemas:
+    """
+    Returns process-wide TL schemas registry. Schemas are parsed only once per path
+    and then shared by all LiteClients, ADNL transports and DHT helpers.
+
+    :param tl_schemas_path: path to custom .tl file or directory, None for default pytoniq-core schemas
+    :return: read-only TlSchemas
+    """
+    if tl_schemas_path is not None:
+        tl_schemas_path = os.path.abspath(tl_schemas_path)
+    return _generate(tl_schemas_path)
@@ -28,6 +28,6 @@ setuptools.setup(
         "setuptools>=65.5.1",
     ],
     extras_require={
-        'tvm': ['pytvm>=0.0.11'],
+        'tvm': ['pytvm==0.0.14'],  # liteclient/emulation.py uses its engine directly, see test_pytvm_engine_api
     }
 )
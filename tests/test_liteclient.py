@@ -1,12 +1,22 @@
 import asyncio
+import concurrent.futures
+import hashlib
 import time
 
 import pytest
 import random
+from types import SimpleNamespace
 
 import pytest_asyncio
 
-from pytoniq import LiteClient
+from pytoniq import LiteClient, LiteBalancer, ConfigCache, LiteClientMetrics, RequestStats, LiteClientError, RunGetMethodError, BlockIdExt, Address, BlockCache, DiskStore, LibraryCache, BlockchainConfig, EmulatorCache, MasterchainIndex, HashMap, Slice, begin_cell
+from pytoniq.liteclient.client import LiteServerProtocol
+from pytoniq.liteclient import parsing
+from pytoniq_core import Builder
+from pytoniq_core.boc import Cell
+from pytoniq_core.tlb.account import Account, StorageInfo, StorageUsed, StorageExtraInfo, AccountStorage, AccountState, StateInit
+from pytoniq_core.tlb.block import CurrencyCollection
+from pytoniq_core.crypto.ciphers import get_random, create_aes_ctr_cipher, aes_ctr_encrypt
 
 
 @pytest_asyncio.fixture
@@ -22,6 +32,38 @@ async def client():
             continue
 
 
+class FakeTransport:
+
+    def __init__(self):
+        self.writes = []
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.writes.append(data)
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    abort = close
+
+
+def offline_client(**kwargs) -> LiteClient:
+    """
+    Client with a fake transport which only records what is written, queries are never answered
+    """
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', **kwargs)
+    client.loop = asyncio.get_running_loop()
+    client.enc_sipher = create_aes_ctr_cipher(get_random(32), get_random(16))
+    client.protocol = LiteServerProtocol(client)
+    client.transport = FakeTransport()
+    client.protocol.connection_made(client.transport)
+    client._in_flight_limiter = asyncio.Semaphore(client.max_in_flight) if client.max_in_flight else None
+    return client
+
+
 @pytest.mark.asyncio
 async def test_init():
     # client = LiteClient.from_mainnet_config(ls_i=0, trust_level=2)
@@ -64,3 +106,885 @@ async def test_get_method(client: LiteClient):
     result2 = await client.run_get_method_local(address='EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG', method='seqno',
                                                 stack=[])
     assert result2 == result
+
+
+@pytest.mark.asyncio
+async def test_protocol_frames():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    client.loop = asyncio.get_running_loop()
+    key, iv = get_random(32), get_random(16)
+    client.dec_sipher = create_aes_ctr_cipher(key, iv)
+    enc_sipher = create_aes_ctr_cipher(key, iv)
+    protocol = LiteServerProtocol(client)
+
+    stream, expected = b'', {}
+    for size in (10, 300, 10, 3 * 2**20, 10):  # short and long TL bytes, frame bigger than buffer
+        qid = get_random(32).hex()
+        answer = client.schemas.serialize('liteServer.blockData', {'id': {'workchain': -1, 'shard': -2**63, 'seqno': 1, 'root_hash': qid, 'file_hash': qid}, 'data': get_random(size)})
+        frame = get_random(32) + client.schemas.serialize('adnl.message.answer', {'query_id': qid, 'answer': answer})
+        frame += hashlib.sha256(frame).digest()
+        stream += len(frame).to_bytes(4, 'little') + frame
+        client.tasks[qid] = client.loop.create_future()
+        expected[qid] = (client.tasks[qid], answer)
+    stream = aes_ctr_encrypt(enc_sipher, stream)
+
+    i = 0
+    while i < len(stream):  # socket delivers arbitrary chunks
+        buffer = protocol.get_buffer(-1)
+        n = min(len(buffer), random.choice((1, 3, 100, 5000, 2**16, 2**20)), len(stream) - i)
+        buffer[:n] = stream[i:i + n]
+        protocol.buffer_updated(n)
+        i += n
+
+    assert not client.tasks
+    for qid, (future, answer) in expected.items():
+        assert future.result()['data'] == client.schemas.deserialize(answer)[0]['data']
+    assert len(protocol._buffer) <= protocol.max_buffer_size  # big frame buffer is not kept
+
+
+@pytest.mark.asyncio
+async def test_query_deadline():
+    client = offline_client(max_in_flight=1)
+    with pytest.raises(asyncio.TimeoutError):
+        await client._query(b'never answered', 'a', 0.05, None)
+    assert not client.tasks and client.timed_out_requests == 1 and client.in_flight == 0
+
+    first = asyncio.ensure_future(client._query(b'never answered', 'a', 10, None))  # holds the only slot
+    await asyncio.sleep(0.01)
+    assert list(client.tasks) == ['a'] and len(client.transport.writes) == 2
+    started = client.loop.time()
+    with pytest.raises(asyncio.TimeoutError):
+        await client._query(b'waits for the slot', 'b', 0.05, None)
+    assert client.loop.time() - started < 1  # within its own deadline, not the first one's
+    assert list(client.tasks) == ['a'] and len(client.transport.writes) == 2 and client.timed_out_requests == 2
+
+    first.cancel()  # releases the slot
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert not client.tasks and client.timed_out_requests == 2
+    third = asyncio.ensure_future(client._query(b'gets the slot', 'c', 10, None))
+    await asyncio.sleep(0.01)
+    client.tasks['c'].set_result({'now': 1})
+    assert await third == {'now': 1} and not client.tasks
+
+
+@pytest.mark.asyncio
+async def test_choose_session():
+    client = offline_client(block_cache=BlockCache())
+    pool, dedicated = client._new_session(), client._new_session()
+    client._pool, client._dedicated_pool = [pool], [dedicated]
+    for session in client.sessions:
+        session.transport, session.listener = FakeTransport(), client.loop.create_future()
+    for cache in ('block_cache', 'libs', 'configs', 'emulators', 'mc_index'):
+        assert getattr(pool, cache) is getattr(client, cache) and getattr(dedicated, cache) is getattr(client, cache)
+
+    client.tasks['busy'] = client.loop.create_future()
+    assert client._choose_session('getTime') is pool  # the least loaded one
+    assert client._choose_session('getBlock') is dedicated
+
+    reopened = []
+
+    async def connect_session():
+        reopened.append(dedicated)
+        dedicated.transport, dedicated.listener = FakeTransport(), client.loop.create_future()
+
+    dedicated.connect_session = connect_session
+    dedicated.listener.set_result(None)  # connection lost, the session closed itself
+    assert client._choose_session('getBlock') is pool  # dead session gets no queries
+    assert list(client._reopening) == [dedicated]
+    await asyncio.sleep(0)
+    assert reopened == [dedicated] and not client._reopening
+    assert client._choose_session('getBlock') is dedicated
+
+    pool.transport = None
+    client._reopening[pool] = client.loop.create_future()  # being reopened already
+    assert client._choose_session('getTime') is client
+
+
+def pruned_cell(data: bytes) -> Cell:
+    return Builder(type_=1).store_uint(1, 8).store_uint(1, 8).store_bytes(hashlib.sha256(data).digest()).store_uint(0, 16).end_cell()
+
+
+def shard_ident_cell(wc: int) -> Cell:
+    return begin_cell().store_uint(0, 8).store_int(wc, 32).store_uint(2**63, 64).end_cell()
+
+
+def block_cell(wc: int, seqno: int, state: Cell) -> Cell:
+    """
+    Block with real BlockInfo, pruned value flow and extra, and `state` as the new state of its state update
+    """
+    info = begin_cell().store_bytes(b'\x9b\xc7\xa9\x87').store_uint(0, 32).store_bit(wc != -1).store_uint(0, 15) \
+        .store_uint(seqno, 32).store_uint(0, 32).store_cell(shard_ident_cell(wc)).store_uint(1700000000, 32) \
+        .store_uint(seqno * 1000, 64).store_uint(seqno * 1000 + 900, 64).store_uint(0, 128)
+    if wc != -1:
+        info.store_ref(begin_cell().store_uint(10, 64).store_uint(5, 32).store_bytes(b'\x02' * 64).end_cell())
+    info.store_ref(begin_cell().store_uint(seqno * 1000 - 100, 64).store_uint(seqno - 1, 32).store_bytes(b'\x01' * 64).end_cell())
+    update = begin_cell().store_ref(pruned_cell(b'old state')).store_ref(state).end_cell()
+    return begin_cell().store_bytes(b'\x11\xefU\xaa').store_int(-239, 32).store_ref(info.end_cell()) \
+        .store_ref(pruned_cell(b'value flow')).store_ref(update).store_ref(pruned_cell(b'extra')).end_cell()
+
+
+def account_cell(address: Address) -> Cell:
+    state = AccountState('account_active', state_init=StateInit(code=begin_cell().store_uint(1, 8).end_cell(),
+                                                                data=begin_cell().store_uint(2, 8).end_cell()))
+    return Account(address, StorageInfo(StorageUsed(3, 100), StorageExtraInfo('storage_extra_none'), 1700000000, None),
+                   AccountStorage(5000, CurrencyCollection(10**9), state)).serialize()
+
+
+def shard_state_cell(address: Address, account: Cell) -> Cell:
+    """
+    Shard state with only the account in its accounts dictionary, other parts are pruned
+    """
+    def value_serializer(src: Cell, dest: Builder):  # DepthBalanceInfo extra and ShardAccount
+        dest.store_uint(0, 5).store_coins(10**9).store_bit(0).store_cell(src)
+
+    accounts = HashMap(256, value_serializer=value_serializer)
+    accounts.set_int_key(int.from_bytes(address.hash_part, 'big'),
+                         begin_cell().store_ref(account).store_bytes(b'\x03' * 32).store_uint(5000, 64).end_cell())
+    accounts = begin_cell().store_bit(1).store_ref(accounts.serialize()).store_uint(0, 5).store_coins(10**9).store_bit(0)
+    return begin_cell().store_bytes(b'\x90#\xaf\xe2').store_int(-239, 32).store_cell(shard_ident_cell(address.wc)) \
+        .store_uint(20, 32).store_uint(0, 32).store_uint(1700000000, 32).store_uint(20000, 64).store_uint(5, 32) \
+        .store_ref(pruned_cell(b'queue')).store_bit(0).store_ref(accounts.end_cell()).store_ref(pruned_cell(b'other')) \
+        .store_bit(0).end_cell()
+
+
+def transaction_cell(address: Address, lt: int) -> Cell:
+    update = begin_cell().store_uint(0x72, 8).store_bytes(b'\x04' * 64).end_cell()
+    description = begin_cell().store_uint(1, 4).store_coins(10).store_uint(0, 2).end_cell()  # trans_storage
+    return begin_cell().store_uint(0b0111, 4).store_bytes(address.hash_part).store_uint(lt, 64) \
+        .store_bytes(b'\x05' * 32).store_uint(lt - 1000, 64).store_uint(1700000000, 32).store_uint(0, 15) \
+        .store_uint(0b1010, 4).store_ref(begin_cell().store_uint(0, 2).end_cell()).store_coins(10).store_bit(0) \
+        .store_ref(update).store_ref(description).end_cell()
+
+
+def many_to_boc(roots: list) -> bytes:
+    """
+    BoC with several roots, as liteservers send proofs and transactions lists
+    """
+    holder = begin_cell()
+    for root in roots:
+        holder.store_ref(root)
+    cells = list(holder.end_cell().order({}))[1:]  # parents go before children
+    index = {cell: i for i, cell in enumerate(cells)}
+    payload = b''.join(cell.serialize(index, 1) for cell in cells)
+    return b'\xb5\xee\x9cr' + bytes([1, 2, len(cells), len(roots), 0]) + len(payload).to_bytes(2, 'big') + \
+        bytes(index[root] for root in roots) + payload
+
+
+@pytest.mark.asyncio
+async def test_parsing_in_process_pool():
+    address = Address('EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG')
+    account = account_cell(address)
+    state = shard_state_cell(address, account)
+    shard_block, mc_block_cell = block_cell(0, 20, state), block_cell(-1, 30, pruned_cell(b'mc state'))
+    shard_block_id = BlockIdExt(0, -2**63, 20, shard_block.get_hash(0), b'\x06' * 32)
+    mc_block_id = BlockIdExt(-1, -2**63, 30, mc_block_cell.get_hash(0), b'\x07' * 32)
+    state_result = {'shardblk': shard_block_id.to_dict(), 'state': account.to_boc(), 'shard_proof': b'',
+                    'proof': many_to_boc([begin_cell().store_ref(shard_block).end_cell(), begin_cell().store_ref(state).end_cell()])}
+    transactions = {'transactions': many_to_boc([transaction_cell(address, 5000 + i) for i in range(3)]), 'proof': b''}
+    calls = [
+        (parsing.parse_block, mc_block_cell.to_boc(), mc_block_id.root_hash, True),
+        (parsing.parse_block_transactions_ext, transactions, shard_block_id.root_hash, False),
+        (parsing.parse_account_state, state_result, mc_block_id, address, False),
+        (parsing.parse_account_states, [state_result, {'state': b''}], mc_block_id, [address, address]),
+    ]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', executor=executor)
+        results = []
+        for func, *args in calls:
+            local = func(*args)
+            remote = await client.run_cpu(func, *args)  # arguments and results are pickled
+            assert remote is not local and repr(remote) == repr(local)
+            results.append(remote)
+    block, transactions, (account, shard_account), states = results
+    assert block.info.seqno == 30 and [tx.lt for tx in transactions] == [5000, 5001, 5002]
+    assert account.storage.balance.grams == 10**9 and shard_account.last_trans_lt == 5000
+    assert states[1] == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_background_reconnect():
+    client = offline_client(auto_reconnect=True)
+    client.listener = asyncio.create_task(client.listen())
+    allow_reconnect = asyncio.Event()
+
+    async def reopen_session():
+        await allow_reconnect.wait()
+        client.transport, client.protocol = FakeTransport(), LiteServerProtocol(client)
+        client.protocol.connection_made(client.transport)
+        client.listener = asyncio.create_task(client.listen())
+
+    client._reopen_session = reopen_session
+    started = client.loop.time()
+    short = asyncio.ensure_future(client.liteserver_query(b'in flight, short deadline', 'a', timeout=0.1))
+    resent = asyncio.ensure_future(client.liteserver_query(b'in flight', 'b', timeout=5))
+    await asyncio.sleep(0.01)
+    assert len(client.transport.writes) == 2
+
+    client.protocol.connection_lost(ConnectionResetError())
+    await asyncio.sleep(0.01)
+    assert client.reconnecting and not client.tasks  # both queries are parked until the session is back
+    parked = asyncio.ensure_future(client.liteserver_query(b'sent while reconnecting', 'c', timeout=5))
+    with pytest.raises(asyncio.TimeoutError):
+        await short
+    assert 0.1 <= client.loop.time() - started < 0.5 and client.timed_out_requests == 1  # its own deadline
+
+    allow_reconnect.set()
+    await asyncio.sleep(0.01)
+    assert not client.reconnecting and sorted(client.tasks) == ['b', 'c']
+    assert len(client.transport.writes) == 2  # resent to the new session
+    client.tasks['b'].set_result({'now': 1})
+    client.tasks['c'].set_result({'now': 2})
+    assert await resent == {'now': 1} and await parked == {'now': 2}
+    client.listener.cancel()
+
+
+def test_metrics():
+    metrics = LiteClientMetrics(buckets=(0.01, 0.1))
+    metrics.on_request('getBlock', RequestStats(0.005, 100, network_wait=0.004, decrypt=0.0005, decode=0.0005, response_bytes=2**20))
+    metrics.on_request('getBlock', RequestStats(0.05, 100, error_code=651, network_wait=0.04, decrypt=0.0, decode=0.0))
+    metrics.on_request('getBlock', RequestStats(1.0, 100, timed_out=True))
+    metrics.on_proof('getBlock', 0.2)
+
+    block = metrics.methods['getBlock']
+    assert block.requests == 3 and block.timeouts == 1
+    assert block.errors == {651: 1}
+    assert block.histogram == [1, 1, 1]
+    assert block.percentile(0.5) == 0.1 and block.percentile(1) == float('inf')
+    assert block.request_bytes == 300 and block.response_bytes == 2**20
+    assert block.proofs == 1 and block.proof == 0.2
+    assert metrics.to_dict()['getBlock']['histogram'] == {0.01: 1, 0.1: 1, float('inf'): 1}
+
+
+def test_pack_adnl_ls_query():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    schemas = client.schemas
+    qid = get_random(32)
+    for size in (0, 3, 4, 245, 248, 249, 250, 253, 254, 1000, 2**17):
+        payload = get_random(size)
+        expected = schemas.serialize(client.adnl_query_sch, {
+            'query_id': qid.hex(),
+            'query': schemas.serialize(client.ls_query_sch, {'data': payload})
+        })
+        assert client.pack_adnl_ls_query(client.pack_ls_query(payload), qid) == (expected, qid.hex())
+
+
+def test_rtt_estimate():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    assert client.rtt is None
+    client.update_rtt(0.1)
+    assert client.rtt == 0.1 and client.rtt_var == 0.05
+    for _ in range(100):
+        client.update_rtt(0.02)
+    assert abs(client.rtt - 0.02) < 1e-4 and client.rtt_var < 1e-4
+
+
+@pytest.mark.asyncio
+async def test_subscribe_masterchain():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    client.loop = asyncio.get_running_loop()
+
+    def blk(seqno):
+        return BlockIdExt(workchain=-1, shard=-2**63, seqno=seqno, root_hash=b'\x00' * 32, file_hash=b'\x00' * 32)
+
+    client.last_mc_block, client.last_shard_blocks = blk(1), {0: blk(1)}
+
+    async def consume(n):
+        result = []
+        async for mc_block, shard_blocks in client.subscribe_masterchain():
+            result.append(mc_block.seqno)
+            if len(result) == n:
+                return result
+
+    consumers = [asyncio.create_task(consume(4)) for _ in range(3)]
+    await asyncio.sleep(0)
+    for seqno in (2, 3, 5):
+        client.last_mc_block = blk(seqno)
+        client._publish_mc_update()
+    assert [await c for c in consumers] == [[1, 2, 3, 5]] * 3
+
+    late = asyncio.create_task(consume(2))
+    await asyncio.sleep(0)
+    await client.close()
+    with pytest.raises(LiteClientError):
+        await late
+
+
+@pytest.mark.asyncio
+async def test_iter_transactions():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    requested = []
+
+    async def raw_get_transactions(address, count, from_lt, from_hash):
+        requested.append(from_lt)
+        await asyncio.sleep(0.01)
+        lts = range(from_lt, max(from_lt - count * 10, 0), -10)
+        return [SimpleNamespace(lt=lt, prev_trans_lt=lt - 10, prev_trans_hash=b'') for lt in lts], []
+
+    client.raw_get_transactions = raw_get_transactions
+    address = 'EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG'
+
+    result = []
+    async for tr in client.iter_transactions(address, from_lt=1000, from_hash=b'\x00' * 32, to_lt=300, page_size=16):
+        if not result:
+            await asyncio.sleep(0)
+            assert requested == [1000, 840]  # next page is requested while the first one is handled
+        result.append(tr.lt)
+    assert result == list(range(1000, 300, -10))
+
+    requested.clear()
+    assert [tr.lt async for tr in client.iter_transactions(address, from_lt=100, from_hash=b'\x00' * 32)] == list(range(100, 0, -10))
+    assert requested == [100]
+
+
+@pytest.mark.asyncio
+async def test_iter_accounts_transactions():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    in_flight = max_in_flight = 0
+
+    async def raw_get_transactions(address, count, from_lt, from_hash):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(random.random() / 100)
+        in_flight -= 1
+        lts = range(from_lt, max(from_lt - count * 10, 0), -10)
+        return [SimpleNamespace(lt=lt, prev_trans_lt=lt - 10, prev_trans_hash=b'') for lt in lts], []
+
+    async def raw_get_account_state(address):
+        return None, SimpleNamespace(last_trans_lt=500, last_trans_hash=b'\x01' * 32)
+
+    client.raw_get_transactions = raw_get_transactions
+    client.raw_get_account_state = raw_get_account_state
+    addresses = [Address((0, i.to_bytes(32, 'big'))) for i in range(20)]
+    accounts = [(a, 1000, b'\x00' * 32, 200) for a in addresses[:10]] + addresses[10:]
+
+    result = {}
+    async for address, transactions in client.iter_accounts_transactions(accounts, concurrency=4, page_size=16):
+        result.setdefault(address, []).extend(tr.lt for tr in transactions)
+    assert max_in_flight == 4
+    for a in addresses[:10]:
+        assert result[a] == list(range(1000, 200, -10))
+    for a in addresses[10:]:
+        assert result[a] == list(range(500, 0, -10))
+
+    async def failing(*args):
+        raise LiteClientError('failed')
+
+    client.raw_get_transactions = failing
+    with pytest.raises(LiteClientError):
+        async for _ in client.iter_accounts_transactions(addresses):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_balancer_iter_transactions():
+    balancer = LiteBalancer([])
+    requested = []
+
+    async def raw_get_transactions(address, count, from_lt, from_hash):
+        requested.append(from_lt)
+        lts = range(from_lt, max(from_lt - count * 10, 0), -10)
+        return [SimpleNamespace(lt=lt, prev_trans_lt=lt - 10, prev_trans_hash=b'') for lt in lts], []
+
+    async def raw_get_account_state(address):
+        return None, SimpleNamespace(last_trans_lt=100, last_trans_hash=b'\x01' * 32)
+
+    balancer.raw_get_transactions = raw_get_transactions
+    balancer.raw_get_account_state = raw_get_account_state
+    address = Address((0, b'\x01' * 32))
+    assert [tr.lt async for tr in balancer.iter_transactions(address, page_size=4)] == list(range(100, 0, -10))
+    assert requested == [100, 60, 20]
+
+    result = {}
+    async for a, transactions in balancer.iter_accounts_transactions([address, (Address((0, b'\x02' * 32)), 50, b'\x00' * 32, 20)]):
+        result.setdefault(a, []).extend(tr.lt for tr in transactions)
+    assert result == {address: list(range(100, 0, -10)), Address((0, b'\x02' * 32)): [50, 40, 30]}
+
+
+@pytest.mark.asyncio
+async def test_get_account_states(monkeypatch):
+    from pytoniq.liteclient import client as client_module, parsing
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    client.last_mc_block = BlockIdExt(-1, -2**63, 100, b'\x01' * 32, b'\x02' * 32)
+    shards = [BlockIdExt(0, shard, 90, bytes([shard & 0xff]) * 32, b'\x00' * 32).to_dict() for shard in (2**62, -2**62)]
+
+    in_flight = max_in_flight = 0
+
+    async def liteserver_request(method, data):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(random.random() / 1000)
+        in_flight -= 1
+        account = bytes.fromhex(data['account']['id'])
+        exists = account[0] % 3 != 0
+        return {'state': exists and account, 'shardblk': shards[account[0] % 2], 'shard_proof': b'proof%d' % (account[0] % 2),
+                'proof': b''}
+
+    checked = []
+    monkeypatch.setattr(client_module, 'check_account_shard_proof', lambda result, block: checked.append(result['shard_proof']))
+    monkeypatch.setattr(parsing, 'parse_account_state', lambda result, block, address, check_proof: (address, result['state']))
+    client.liteserver_request = liteserver_request
+
+    addresses = [Address((0, bytes([i]) * 32)) for i in range(200)]
+    result = await client.get_account_states(addresses, concurrency=8)
+    assert max_in_flight == 8
+    assert sorted(checked) == [b'proof0', b'proof1']
+    assert result == [(None, None) if i % 3 == 0 else (a, bytes([i]) * 32) for i, a in enumerate(addresses)]
+
+
+def test_block_cache():
+    cache = BlockCache(max_bytes=100)
+    blocks = [BlockIdExt(0, -2**63, i, bytes([i]) * 32, b'\x00' * 32) for i in range(5)]
+    for i, b in enumerate(blocks[:3]):
+        cache.put(('block', b), i, 40)  # the first one is evicted
+    assert ('block', blocks[0]) not in cache and cache.size == 80
+    assert cache.get(('block', blocks[1])) == 1  # now blocks[2] is the least recently used
+    cache.put(('header', blocks[3]), 3, 20)
+    cache.put(('header', blocks[4]), 4, 20)
+    assert ('block', blocks[2]) not in cache and cache.get(('block', blocks[1])) == 1
+    cache.put(('block', blocks[0]), 0, 101)  # larger than the cache
+    assert cache.get(('block', blocks[0])) is None
+    assert cache.to_dict() == {'size': 80, 'max_bytes': 100, 'entries': 3, 'hits': {'block': 2},
+                               'misses': {'block': 1}, 'evictions': {'block': 2}}
+
+
+@pytest.mark.asyncio
+async def test_block_cache_client():
+    cache = BlockCache()
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', block_cache=cache)
+    block = BlockIdExt(0, -2**63, 1, b'\x01' * 32, b'\x00' * 32)
+    requests = []
+
+    async def liteserver_request(method, data):
+        requests.append(method)
+        raise LiteClientError('unexpected request')
+
+    client.liteserver_request = liteserver_request
+    full_block = object()
+    cache.put(('block', block), full_block, 1000)
+    assert await client.raw_get_block(block) is full_block
+    assert await client.raw_get_block_header(block) is full_block  # header is taken from the full block
+    assert requests == []
+
+
+def test_disk_store(tmp_path):
+    with DiskStore(str(tmp_path)) as store:
+        store.put('blocks', b'\x01' * 32, b'block 1')
+        store.put('blocks', b'\x02' * 32, b'block 2')
+        assert store.get('blocks', b'\x01' * 32) == b'block 1'
+        store.put('blocks', b'\x03' * 32, b'block 3')  # written after the file was mapped
+        assert store.get('blocks', b'\x03' * 32) == b'block 3'
+        assert store.get('transactions', b'\x01' * 32) is None
+    with open(tmp_path / 'blocks.idx', 'ab') as f:
+        f.write(b'\x04' * 32 + (1000).to_bytes(8, 'little') + (5).to_bytes(4, 'little') + b'\x00\x01')  # broken tail
+    with DiskStore(str(tmp_path)) as store:
+        assert [store.get('blocks', bytes([i]) * 32) for i in range(1, 5)] == [b'block 1', b'block 2', b'block 3', None]
+
+
+@pytest.mark.asyncio
+async def test_disk_store_trust_level(tmp_path):
+    address = Address('EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG')
+    block = block_cell(-1, 30, pruned_cell(b'mc state'))
+    block_id = BlockIdExt(-1, -2**63, 30, block.get_hash(0), b'\x07' * 32)
+    transaction = transaction_cell(address, 5000)
+    requested, proven = [], []
+
+    async def liteserver_request(method, data):
+        requested.append(method)
+        return {'transactions': many_to_boc([transaction]), 'ids': [block_id.to_dict()]}
+
+    async def prove_block(blk):
+        proven.append(blk)
+
+    with DiskStore(str(tmp_path)) as store:
+        store.put('blocks', block_id.root_hash, block.to_boc())  # e.g. by a client with trust_level 2
+        store.put('transactions', transaction.get_hash(0), LiteClient._pack_block_id(block_id) + transaction.to_boc())
+        for trust_level in (1, 0):
+            client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', trust_level=trust_level,
+                                init_key_block=block_id, disk_store=store)
+            client.liteserver_request, client.prove_block = liteserver_request, prove_block
+            assert (await client.raw_get_block(block_id)).info.seqno == 30
+            transactions, block_ids = await client.raw_get_transactions(address, 1, 5000, transaction.get_hash(0))
+            assert [tr.lt for tr in transactions] == [5000] and block_ids == [block_id]
+        assert proven == [block_id]  # stored block is proven at trust_level 0 too
+        assert requested == ['getTransactions']  # its stored block ids are not proven, so not used
+
+
+@pytest.mark.asyncio
+async def test_disk_store_libraries(tmp_path):
+    store = DiskStore(str(tmp_path))
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', disk_store=store)
+    libs = [begin_cell().store_uint(i, 32).end_cell() for i in range(3)]
+    requested = []
+
+    async def liteserver_request(method, data):
+        requested.extend(data['library_list'])
+        return {'result': [{'hash': lib.hash.hex(), 'data': lib.to_boc()} for lib in libs if lib.hash.hex() in data['library_list']]}
+
+    client.liteserver_request = liteserver_request
+    result = await client.get_libraries([lib.hash for lib in libs[:2]])
+    assert requested == [lib.hash.hex() for lib in libs[:2]]
+    requested.clear()
+    result = await client.get_libraries([lib.hash for lib in libs])
+    assert requested == [libs[2].hash.hex()]
+    assert {k: v.hash for k, v in result.items()} == {lib.hash.hex(): lib.hash for lib in libs}
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_library_cache():
+    cache = LibraryCache(max_libraries=2)
+    libs = [begin_cell().store_uint(i, 32).end_cell() for i in range(3)]
+    hashes = [lib.hash.hex() for lib in libs]
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', library_cache=cache)
+    requested = []
+
+    async def liteserver_request(method, data):
+        requested.extend(data['library_list'])
+        return {'result': [{'hash': lib.hash.hex(), 'data': lib.to_boc()} for lib in libs if lib.hash.hex() in data['library_list']]}
+
+    client.liteserver_request = liteserver_request
+    assert await client.prefetch_libraries([libs[0].hash, hashes[1]]) == 2
+    assert await client.prefetch_libraries(hashes[:2]) == 0
+    assert requested == hashes[:2]
+
+    lib_dict = cache.get_dict(hashes[:2])
+    assert cache.get_dict(reversed(hashes[:2])) is lib_dict  # built once per libraries set
+    assert HashMap.parse(lib_dict.begin_parse(), 256).keys() == {int(h, 16) for h in hashes[:2]}
+
+    cache.put(hashes[2], libs[2])  # evicts the first one and dictionaries with it
+    assert hashes[0] not in cache and cache.evictions == 1
+    assert cache.get_dict(hashes) is not lib_dict
+
+    requested.clear()
+    unknown = (b'\xff' * 32).hex()
+    assert await client.prefetch_libraries([unknown]) == 0
+    assert await client.prefetch_libraries([unknown]) == 0
+    assert requested == [unknown]  # not found is remembered too
+    cache.not_found_ttl = 0
+    time.sleep(0.001)
+    assert await client.prefetch_libraries([unknown]) == 0
+    assert requested == [unknown, unknown]
+
+
+@pytest.mark.asyncio
+async def test_config_cache():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    params = {i: begin_cell().store_uint(i, 32).end_cell().begin_parse() for i in (1000, 1001)}
+    headers, loads = [], []
+
+    async def raw_get_block_header(blk):
+        headers.append(blk.seqno)
+        return SimpleNamespace(info=SimpleNamespace(key_block=blk.seqno == 20, prev_key_block_seqno=10 if blk.seqno < 20 else 20))
+
+    async def load_config(blk, key_block):
+        loads.append(key_block)
+        config = BlockchainConfig(dict(params), key_block)
+        client.configs.put(config.cell.hash, config)
+        return config
+
+    client.raw_get_block_header = raw_get_block_header
+    client._load_config = load_config
+    blocks = [BlockIdExt(-1, -2**63, seqno, bytes([seqno]) * 32, b'\x00' * 32) for seqno in (15, 16, 20, 21)]
+
+    client.last_mc_block = blocks[0]
+    assert (await client.get_config_params([1000, 5])) == {1000: params[1000]}
+    client.last_mc_block = blocks[1]
+    assert (await client.get_config_all()) == params
+    assert loads == [10]  # the same key block
+    assert await client.get_config_params([1001]) == {1001: params[1001]} and headers == [15, 16]
+
+    client.last_mc_block = blocks[2]  # a new key block
+    config = await client.get_config()
+    assert loads == [10, 20] and config.key_block_seqno == 20
+    assert client.configs.get(config.cell.hash) is config  # found by the config dictionary hash too
+    assert await client.get_config(blocks[0]) is not config
+    assert loads == [10, 20] and headers == [15, 16, 20]
+
+    mc_block = lambda seqno: BlockIdExt(-1, -2**63, seqno, bytes([seqno]) * 32, b'\x00' * 32)
+    assert await client.get_config(mc_block(30)) is config and headers == [15, 16, 20, 30]
+    assert await client.get_config(mc_block(25)) is config  # no key blocks between the 20th and the 30th
+    assert await client.get_config(mc_block(18)) is not config and headers == [15, 16, 20, 30, 18]
+    # headers the client checks anyway, e.g. of new blocks the block updater gets, are used too
+    client._index_mc_block(mc_block(31), SimpleNamespace(gen_utime=1, start_lt=1, end_lt=2,
+                                                         key_block=False, prev_key_block_seqno=20))
+    client.last_mc_block = mc_block(31)
+    assert await client.get_config_params([1000]) == {1000: params[1000]}
+    assert headers == [15, 16, 20, 30, 18] and loads == [10, 20]
+
+
+def test_config_cache_key_blocks():
+    cache = ConfigCache(max_blocks=3)
+    for seqno, key_block in ((30, 20), (10, 5), (20, 20), (40, 20)):  # the 30th is evicted
+        cache.set_key_block(seqno, key_block)
+    assert cache._seqnos == [10, 20, 40]
+    assert cache.get_key_block(25) == cache.get_key_block(39) == 20  # between known blocks of the same key block
+    assert cache.get_key_block(15) is None and cache.get_key_block(41) is None  # may be after a new key block
+
+
+@pytest.mark.asyncio
+async def test_config_key_block_from_shards_info():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', trust_level=2)
+    block = block_cell(-1, 30, pruned_cell(b'mc state'))
+    client.last_mc_block = BlockIdExt(-1, -2**63, 30, block.get_hash(0), b'\x07' * 32)
+
+    async def liteserver_request(method, data):
+        return {'data': begin_cell().store_bit(0).end_cell().to_boc(),
+                'proof': many_to_boc([begin_cell().store_ref(block).end_cell()])}
+
+    client.liteserver_request = liteserver_request
+    await client.raw_get_all_shards_info()  # as the block updater does for every new block
+    assert client.configs.get_key_block(30) == 0  # so no header request for the config, whatever the trust level
+    assert client.mc_index.get(30) == client.last_mc_block  # and later lookups of it are local
+
+
+def test_emulator_cache():
+    cache = EmulatorCache(max_emulators=2)
+    keys = [(bytes([i]) * 32, b'\x00' * 32, b'\x00' * 32, b'') for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, i)
+    assert cache.get(keys[0]) == 0
+    cache.put(keys[2], 2)  # evicts keys[1], the least recently used one
+    assert cache.get(keys[1]) is None and cache.get(keys[2]) == 2
+    assert cache.to_dict() == {'emulators': 2, 'hits': 2, 'misses': 1, 'evictions': 1}
+
+
+def test_pytvm_engine_api():
+    pytest.importorskip('pytvm')
+    import inspect
+    from importlib.metadata import version
+    from pytvm.tvm_emulator import TvmEmulator
+    # run_emulator calls the engine directly, update it together with the pinned version
+    assert version('pytvm') == '0.0.14'
+    emulator = TvmEmulator(code=begin_cell().end_cell(), data=begin_cell().end_cell())
+    assert list(inspect.signature(emulator.engine.tvm_emulator_set_c7).parameters) == \
+        ['emulator', 'address', 'unixtime', 'balance', 'rand_seed_hex', 'config_boc']
+    assert emulator.emulator and callable(emulator.raw_run_get_method)
+
+
+def test_run_get_method_boc():
+    pytest.importorskip('pytvm')
+    from pytoniq.liteclient.emulation import run_get_method_boc
+    from pytoniq_core.tlb.vm_stack import VmStack
+    code = begin_cell().store_uint(0x30, 8).store_uint(0x72, 8).end_cell()  # DROP, PUSHINT 2
+    data = begin_cell().end_cell()
+    config = BlockchainConfig({0: begin_cell().store_uint(0, 256).end_cell().begin_parse()})
+    args = ((code.hash, data.hash, config.cell.hash, b''), code.to_boc(), data.to_boc(), None,
+            'EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG', 1700000000, 10**9, config.cell_b64, 'seqno',
+            VmStack.serialize([]).to_boc(), 10000)
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        results = list(executor.map(lambda _: run_get_method_boc(*args, get_random(32)), range(4)))
+    assert [VmStack.deserialize(Slice.one_from_boc(r['stack'])) for r in results] == [[2]] * 4
+
+    from pytoniq.liteclient.emulation import _worker_emulators
+    libraries = LibraryCache()
+    libraries.put(code.hash.hex(), code)
+    lib_dict = libraries.get_dict([code.hash.hex()])
+    run_get_method_boc(*args, get_random(32))
+    emulator = _worker_emulators().get(args[0])
+    with_libraries = ((code.hash, data.hash, config.cell.hash, lib_dict.hash), *args[1:3], lib_dict.to_boc(), *args[4:])
+    run_get_method_boc(*with_libraries, get_random(32))
+    assert _worker_emulators().get(with_libraries[0]) is not emulator  # not the one without libraries
+
+    from pytoniq.liteclient.emulation import ConfigNotLoaded
+    other_config = BlockchainConfig({0: begin_cell().store_uint(1, 256).end_cell().begin_parse()})
+    without_config = list(args)
+    without_config[0] = (code.hash, data.hash, other_config.cell.hash, b'')
+    without_config[7] = None
+    with pytest.raises(ConfigNotLoaded):
+        run_get_method_boc(*without_config, get_random(32))
+    without_config[7] = other_config.cell_b64
+    run_get_method_boc(*without_config, get_random(32))
+    without_config[7] = None  # the worker has it now
+    assert VmStack.deserialize(Slice.one_from_boc(run_get_method_boc(*without_config, get_random(32))['stack'])) == [2]
+
+
+@pytest.mark.asyncio
+async def test_run_get_methods():
+    from pytoniq_core.tlb.vm_stack import VmStack
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', trust_level=2)
+    client.last_mc_block = BlockIdExt(-1, -2**63, 10, b'\x01' * 32, b'\x02' * 32)
+    requested = []
+
+    async def liteserver_request(method, data):
+        requested.append((data['method_id'], data['id']['seqno']))
+        client.last_mc_block = BlockIdExt(-1, -2**63, 11, b'\x03' * 32, b'\x04' * 32)  # a new block comes meanwhile
+        await asyncio.sleep(0)
+        stack = VmStack.deserialize(Slice.one_from_boc(data['params']))
+        return {'exit_code': 0 if data['method_id'] != 13 else 11, 'result': VmStack.serialize([data['method_id']] + stack).to_boc()}
+
+    client.liteserver_request = liteserver_request
+    address = 'EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG'
+    assert await client.run_get_methods(address, [(1, []), (2, [5]), (3, [])]) == [[1], [2, 5], [3]]
+    assert requested == [(1, 10), (2, 10), (3, 10)]  # all at the block of the call
+    with pytest.raises(RunGetMethodError):
+        await client.run_get_methods(address, [(1, []), (13, [])])
+
+
+@pytest.mark.asyncio
+async def test_run_get_methods_local_concurrent():
+    pytest.importorskip('pytvm')
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', trust_level=2)
+    client.last_mc_block = BlockIdExt(-1, -2**63, 30, b'\x01' * 32, b'\x02' * 32)
+    address = Address('EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG')
+    code = begin_cell().store_uint(0x30, 8).store_uint(0x72, 8).end_cell()  # DROP, PUSHINT 2
+    storage = SimpleNamespace(state=SimpleNamespace(type_='account_active', state_init=StateInit(code=code, data=Cell.empty())),
+                              balance=CurrencyCollection(10**9))
+    shard_state_boc = many_to_boc([pruned_cell(b'block'), begin_cell().store_ref(shard_state_cell(address, account_cell(address))).end_cell()])
+    config_hashes = []
+
+    async def raw_get_account_state(addr, block, proofs):
+        config = pruned_cell(b'config %d' % len(config_hashes))  # every call sees its own config
+        config_hashes.append(config.get_hash(0))
+        client.configs.put(config.get_hash(0), BlockchainConfig({0: begin_cell().store_uint(0, 256).end_cell().begin_parse()}))
+        extra = begin_cell().store_ref(pruned_cell(b'shards')).store_ref(config).end_cell()
+        state = begin_cell().store_ref(pruned_cell(b'1')).store_ref(pruned_cell(b'2')).store_ref(pruned_cell(b'3')).store_ref(extra)
+        await asyncio.sleep(0.01 if len(config_hashes) == 1 else 0)  # the first call finishes last
+        proofs.append((shard_state_boc, many_to_boc([pruned_cell(b'block'), begin_cell().store_ref(state.end_cell()).end_cell()])))
+        return None, SimpleNamespace(account=SimpleNamespace(storage=storage))
+
+    client._raw_get_account_state = raw_get_account_state
+    results = await asyncio.gather(client.run_get_method_local(address, 'seqno', []),
+                                   client.run_get_method_local(address, 'get_public_key', []))
+    assert results == [[2], [2]]
+    assert {key[2] for key in client.emulators._emulators} == set(config_hashes)  # each call used its own proofs
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_calls():
+    from pytoniq_core.tlb.vm_stack import VmStack
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=', trust_level=2, deduplicate=True)
+    client.last_mc_block = BlockIdExt(-1, -2**63, 10, b'\x01' * 32, b'\x02' * 32)
+    requested = []
+
+    async def liteserver_request(method, data):
+        requested.append(data['method_id'])
+        await asyncio.sleep(0.01)
+        return {'exit_code': 0, 'result': VmStack.serialize([data['method_id']]).to_boc()}
+
+    client.liteserver_request = liteserver_request
+    address = 'EQBvW8Z5huBkMJYdnfAEM5JqTNkuWX3diqYENkWsIL0XggGG'
+    calls = [asyncio.ensure_future(client.run_get_method(address, 1, [])) for _ in range(5)]
+    calls.append(asyncio.ensure_future(client.run_get_method(address, 2, [])))
+    await asyncio.sleep(0.001)
+    calls[0].cancel()  # doesn't cancel the request for the others
+    results = await asyncio.gather(*calls[1:])
+    assert results == [[1]] * 4 + [[2]]
+    assert requested == [1, 2] and client.deduplicated_calls == 4
+    assert not client._single_flights
+
+    await client.run_get_method(address, 1, [])  # finished calls are not reused
+    assert requested == [1, 2, 1]
+    client.deduplicate = False
+    await asyncio.gather(client.run_get_method(address, 1, []), client.run_get_method(address, 1, []))
+    assert requested == [1, 2, 1, 1, 1] and client.deduplicated_calls == 4
+
+    pytest.importorskip('pytvm')
+    client.deduplicate = True
+    local = []
+
+    async def run_get_methods_local(address, methods, block, gas_limit):
+        local.append(address)
+        await asyncio.sleep(0.01)
+        return [{'stack': VmStack.serialize([7]).to_boc()}]
+
+    client._run_get_methods_local = run_get_methods_local
+    forms = [address, Address(address).to_str(is_bounceable=False), Address(address).to_str(is_user_friendly=False), Address(address)]
+    results = await asyncio.gather(*[client.run_get_method_local(a, 'seqno', []) for a in forms])
+    assert results == [[7]] * 4 and len(local) == 1 and client.deduplicated_calls == 7  # keyed on the raw address
+    assert results[0] is not results[1]  # every caller gets its own stack
+
+
+def mc_block(seqno: int) -> tuple:
+    # every block is 5 seconds and 1000 lt long, lts of neighbour blocks don't touch
+    return BlockIdExt(-1, -2**63, seqno, bytes([seqno % 256]) * 32, b'\x00' * 32), 1000 + seqno * 5, seqno * 1000, seqno * 1000 + 900
+
+
+def test_mc_index():
+    index = MasterchainIndex()
+    index.update(mc_block(i) for i in [5, 6, 7, 10, 11])
+    index.update(mc_block(i) for i in range(30, 0, -1) if i not in (5, 6, 7, 10, 11, 20, 21))  # merged at once
+    index.add(*mc_block(5))  # already known
+    assert len(index) == 28 and 20 not in index and index.missing(18, 23) == [20, 21]
+    assert index.get(7) == mc_block(7)[0] and index.get(20) is None
+
+    assert index.find_by_lt(7000) == index.find_by_lt(7899) == mc_block(7)[0]
+    assert index.find_by_lt(7950) is None  # between blocks
+    # as liteservers do, the first block generated at or after the time
+    assert index.find_by_utime(1031) == index.find_by_utime(1035) == mc_block(7)[0]
+    assert index.find_by_utime(1036) == mc_block(8)[0]
+    assert index.find_by_utime(1104) is None  # block 21, which isn't known
+    assert index.find_by_utime(1005) is None  # block 1, but block 0 isn't known, so it may be generated at 1005 too
+    assert index.find_by_utime(1151) is None  # after the last known block
+
+    restored = MasterchainIndex.from_bytes(index.to_bytes())
+    assert len(restored) == 28 and restored.find_by_lt(30000) == mc_block(30)[0]
+    assert index.to_dict() == {'blocks': 28, 'first_seqno': 1, 'last_seqno': 30, 'hits': 6, 'misses': 5}
+
+
+def test_mc_index_max_blocks():
+    index = MasterchainIndex(max_blocks=32)
+    index.update(mc_block(i) for i in range(1, 35))
+    assert len(index) == 34  # the oldest blocks are dropped in batches
+    index.add(*mc_block(35))
+    assert len(index) == 32 and index.get(3) is None and index.get(4) == mc_block(4)[0]
+    assert index.find_by_utime(1000 + 4 * 5) is None and index.find_by_utime(1000 + 5 * 5) == mc_block(5)[0]
+    index.update(mc_block(i) for i in range(60, 30, -1))  # merged by rebuilding
+    assert len(index) == 32 and index.to_dict()['first_seqno'] == 29
+    restored = MasterchainIndex.from_bytes(MasterchainIndex().to_bytes() + index.to_bytes(), max_blocks=16)
+    assert len(restored) == 16 and restored.get(60) == mc_block(60)[0]
+
+
+@pytest.mark.asyncio
+async def test_lookup_mc_block():
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    client.last_mc_block = mc_block(100)[0]
+    lookups = []
+
+    async def lookup_block(wc, shard, seqno=-1, lt=None, utime=None):
+        lookups.append((seqno, lt, utime))
+        if seqno == -1:
+            seqno = lt // 1000 if lt is not None else -(-(utime - 1000) // 5)
+        block, gen_utime, start_lt, end_lt = mc_block(seqno)
+        header = SimpleNamespace(info=SimpleNamespace(gen_utime=gen_utime, start_lt=start_lt, end_lt=end_lt,
+                                                      key_block=False, prev_key_block_seqno=0))
+        client._index_mc_block(block, header.info)
+        return block, header
+
+    client.lookup_block = lookup_block
+    assert await client.lookup_mc_block(lt=50100) == mc_block(50)[0]
+    assert await client.lookup_mc_block(lt=50200) == mc_block(50)[0]
+    assert lookups == [(-1, 50100, None)]
+
+    assert await client.backfill_mc_index(40, concurrency=4) == 60
+    assert len(lookups) == 61 and client.mc_index.missing(40, 101) == []
+    assert await client.backfill_mc_index(40) == 0
+    assert await client.lookup_mc_block(utime=1000 + 60 * 5 + 3) == mc_block(61)[0]
+    assert await client.lookup_mc_block(utime=1000 + 60 * 5) == mc_block(60)[0]  # exactly at the boundary
+    assert await client.lookup_mc_block(seqno=70) == mc_block(70)[0]
+    assert await client.lookup_mc_block(utime=1000 + 10 * 5) == mc_block(10)[0]  # not indexed
+    assert len(lookups) == 62
+    with pytest.raises(LiteClientError):
+        await client.lookup_mc_block(seqno=1, lt=1000)
+
+    running = []
+
+    async def failing_lookup_block(wc, shard, seqno=-1, lt=None, utime=None):
+        running.append(seqno)
+        try:
+            await asyncio.sleep(0.01 if seqno != 22 else 0)
+            if seqno == 22:
+                raise LiteClientError('failed')
+            return await lookup_block(wc, shard, seqno)
+        finally:
+            running.remove(seqno)
+
+    client.lookup_block = failing_lookup_block
+    with pytest.raises(LiteClientError):
+        await client.backfill_mc_index(20, 40, concurrency=4)
+    assert not running  # the other workers are cancelled and finished before the error is raised
+    lookups.clear()
+    await asyncio.sleep(0.02)
+    assert lookups == [] and 21 not in client.mc_index
@@ -0,0 +1,19 @@
+import pytest
+
+from pytoniq.schemas import get_schemas
+from pytoniq import LiteClient, AdnlTransport
+
+
+def test_shared_schemas():
+    schemas = get_schemas()
+    assert get_schemas(None) is schemas
+
+    client = LiteClient('127.0.0.1', 1, 'LFnKVKTO+GYsOBrTH2xaVAGsOGEgSNGo0TRdDZmBeL4=')
+    assert client.schemas is schemas
+    assert AdnlTransport().schemas is schemas
+
+    with pytest.raises(TypeError):
+        schemas.name_map['tcp.ping'] = None
+
+    ping = schemas.serialize(schemas.get_by_name('tcp.ping'), {'random_id': 1})
+    assert schemas.deserialize(ping)[0] == {'@type': 'tcp.ping', 'random_id': 1}